@@ -1,499 +1,1030 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import requests
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
 from bs4 import BeautifulSoup
-import json
+import logging
+import os
 from datetime import datetime
-from urllib.parse import quote_plus, unquote
+from urllib.parse import quote_plus
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+# Not the builtin TimeoutError before Python 3.11
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from fetch_scheduler import FetchMemo, FetchScheduler
+from http_pool import DEADLINE, NOT_HTML, DownloadCounters, PooledSession, is_html, read_streamed
+from verdict_cache import VerdictCache
+from singleflight import SingleFlight
+from stance import STANCE_MATCHER
+from relevance import SentenceIndex
+from verdict import VerdictTally, classify_stance
+from dedup import FingerprintCache, SourceDeduper
+from sources import ContentStore, SourceRecord
+from article_cache import ArticleCache, DEFAULT_PATH as DEFAULT_ARTICLE_CACHE_PATH
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, StageClock, configure_logging, new_request_id, render as render_metrics,
+    span, submit_in_context, timed
+)
+from job_queue import (
+    JobQueue, JobRunner, QueueFull, DEFAULT_PATH as DEFAULT_JOB_QUEUE_PATH,
+    DEFAULT_PRIORITY, MIN_PRIORITY, MAX_PRIORITY, DONE, FAILED
+)
+from parsing import ParsePool, extract_article_text, soup_features
+from profiling import Profile, ProfileStore
+from responses import dumps, encode_body, parse_projection
+from providers import CLOSED, ERROR, HALF_OPEN, OPEN, TIMEOUT, Provider, ProviderCall, ProviderRegistry, outcome_of
+from streaming_extractor import ByteStreamExtractor
+from urls import TRUSTED_DOMAINS, DomainClassifier, canonical_url, extract_real_url, host_of
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
+# LOG_LEVEL=DEBUG adds per-source scoring details and a line per span
+configure_logging(os.environ.get('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger('app')
+
+STOP_WORDS = {'the', 'is', 'are', 'was', 'were', 'a', 'an', 'in', 'on', 'at', 'to', 'for',
+              'of', 'and', 'or', 'but', 'that', 'this', 'these', 'those', 'it', 'be'}
+
+# (DuckDuckGo site filter, source name) pairs queried by search_news_api
+NEWS_SITES = [
+    ('site:reuters.com', 'Reuters'),
+    ('site:apnews.com', 'Associated Press'),
+    ('site:bbc.com', 'BBC News'),
+    ('site:npr.org', 'NPR'),
+]
+
+# factchecker_provider_circuit_state values
+CIRCUIT_LEVELS = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def default_providers():
+    """The built-in providers, in the order their results are reported.
+    
+    Each search runs on either engine (see providers.py).
+    """
+    return [
+        Provider('wikipedia',
+                 lambda checker, claim, fetch: (checker.search_wikipedia_batched(claim) if checker.batch_wikipedia
+                                                else checker.search_wikipedia(claim)),
+                 message='Searching Wikipedia...', reliability=8, concurrency=16,
+                 sources=[('Wikipedia', 'encyclopedia')]),
+        Provider('news', lambda checker, claim, fetch: checker.search_news_api(claim, fetch=fetch),
+                 message='Searching news sources...', reliability=9, concurrency=8,
+                 sources=[(source_name, 'news') for site_query, source_name in NEWS_SITES]),
+        Provider('scholar', lambda checker, claim, fetch: checker.search_google_scholar(claim),
+                 message='Searching academic sources...', reliability=9, concurrency=4,
+                 sources=[('Google Scholar', 'academic')]),
+        Provider('web', lambda checker, claim, fetch: checker.search_duckduckgo(claim, limit=3, fetch=fetch),
+                 message='Searching web...', reliability=5, concurrency=8,
+                 sources=[('Web Search', 'search')])
+    ]
+
 class FactChecker:
-    def __init__(self):
+    def __init__(self, fanout=True, provider_timeout=15, provider_timeouts=None,
+                 request_budget=25, endpoints=None, connect_timeout=3.05, read_timeout=10,
+                 batch_wikipedia=True, cache_ttl=600, cache_stale_ttl=3600,
+                 cache_max_bytes=64 * 1024 * 1024, article_cache=None, whole_word_relevance=False,
+                 parser_backend='streaming', parse_processes=0, stream_articles=True,
+                 max_article_bytes=2 * 1024 * 1024, article_deadline=15, batch_concurrency=4,
+                 breaker_failures=5, breaker_reset=60,
+                 trusted_domains_path=None):
+        # fanout=True queries every provider at once; False keeps the original
+        # one-after-another behaviour. provider_timeout is the default deadline
+        # for each provider (override per provider name with provider_timeouts)
+        # and request_budget caps the whole check_claim call. All in seconds.
+        self.fanout = fanout
+        self.provider_timeout = provider_timeout
+        self.provider_timeouts = provider_timeouts or {}
+        self.batch_wikipedia = batch_wikipedia
+        # Claim keywords match sentences as substrings ("flat" matches
+        # "flatten"); True requires whole-word matches instead
+        self.whole_word_relevance = whole_word_relevance
+        self.request_budget = request_budget
+        self.provider_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='provider')
+        
+        # Providers are looked up in a registry (more can be registered).
+        # Each has a circuit breaker: after breaker_failures failed or empty
+        # searches in a row it is skipped until a probe, breaker_reset
+        # seconds later, succeeds
+        self.providers = ProviderRegistry(failure_threshold=breaker_failures, reset_timeout=breaker_reset)
+        for provider in default_providers():
+            provider.timeout = self.provider_timeouts.get(provider.name, provider.timeout or provider_timeout)
+            self.providers.register(provider)
+        
+        # check_claims works through a batch batch_concurrency claims at a time
+        self.batch_concurrency = batch_concurrency
+        self.batch_pool = ThreadPoolExecutor(max_workers=batch_concurrency, thread_name_prefix='batch')
+        
+        # Verdicts are cached per normalized claim; stale entries are served
+        # immediately while refresh_pool recomputes them in the background
+        self.verdict_cache = VerdictCache(cache_ttl, cache_stale_ttl, cache_max_bytes)
+        self.refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='refresh')
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        
+        # Optional ArticleCache: extracted article text persisted across restarts
+        self.article_cache = article_cache
+        
+        # SimHash fingerprints of article text, for collapsing syndicated
+        # copies of one story (see dedup.py)
+        self.fingerprints = FingerprintCache()
+        
+        # Sources are kept as SourceRecords, their article text compressed
+        # in content_store and shared between claims (see sources.py)
+        self.content_store = ContentStore()
+        
+        # HTML parser backend (see parsing.py) and, when parse_processes > 0,
+        # a process pool that extracts article text outside the GIL
+        self.parser_backend = parser_backend
+        self.parse_pool = ParsePool(parse_processes, parser_backend) if parse_processes else None
+        
+        # Article pages are streamed: only HTML bodies are read, at most
+        # max_article_bytes of them, within article_deadline seconds, and
+        # reading stops once the streaming extractor has settled the text
+        self.stream_articles = stream_articles
+        self.max_article_bytes = max_article_bytes
+        self.article_deadline = article_deadline
+        self.downloads = DownloadCounters()
+        
+        # Identical claims (and article URLs) requested concurrently share one
+        # in-flight computation instead of each scraping the sources
+        self.claim_flight = SingleFlight()
+        self.article_flight = SingleFlight()
+        
+        # Article pages are fetched in parallel across hosts, but at most once
+        # a second per host; DuckDuckGo result pages are spaced more tightly
+        self.fetch_scheduler = FetchScheduler(
+            self.fetch_article_content,
+            max_workers=8,
+            min_interval=1.0,
+            host_intervals={'html.duckduckgo.com': 0.2}
+        )
+        
+        self.endpoints = {
+            'wikipedia': 'https://en.wikipedia.org/w/api.php',
+            'duckduckgo': 'https://html.duckduckgo.com/html/',
+            'scholar': 'https://scholar.google.com/scholar'
+        }
+        if endpoints:
+            self.endpoints.update(endpoints)
+        
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        self.trusted_domains = [
-            'wikipedia.org', 'britannica.com', 'nature.com', 'science.org',
-            'nih.gov', 'cdc.gov', 'who.int', 'nasa.gov', 'edu',
-            'reuters.com', 'apnews.com', 'bbc.com', 'nytimes.com',
-            'wsj.com', 'economist.com', 'scientificamerican.com'
-        ]
-    
-    def extract_real_url(self, duckduckgo_url):
-        """Extract real URL from DuckDuckGo redirect"""
-        try:
-            if 'uddg=' in duckduckgo_url:
-                uddg_param = duckduckgo_url.split('uddg=')[1]
-                if '&' in uddg_param:
-                    uddg_param = uddg_param.split('&')[0]
-                real_url = unquote(uddg_param)
-                return real_url
-            return duckduckgo_url
-        except:
-            return duckduckgo_url
+        # Web results on these domains (and their subdomains) are trusted;
+        # trusted_domains_path adds the domains listed in a file
+        self.trusted_domains = DomainClassifier(TRUSTED_DOMAINS, score=8)
+        if trusted_domains_path:
+            self.trusted_domains.load(trusted_domains_path)
+        
+        # One keep-alive session for every outbound call. The search
+        # endpoints get larger pools since every claim hits them.
+        self.http = PooledSession(
+            headers=self.headers,
+            pool_maxsize=10,
+            host_pool_sizes={host_of(url): 16 for url in self.endpoints.values()},
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout
+        )
     
     def fetch_article_content(self, url, max_chars=5000):
         """Fetch and extract main content from an article URL"""
+        content, shared = self.article_flight.do((url, max_chars), self._fetch_article_content, url, max_chars)
+        return content
+    
+    def _fetch_article_content(self, url, max_chars):
+        cached = None
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            cached = self.article_cache.get(url) if self.article_cache else None
+            if cached and self.article_cache.is_fresh(cached):
+                return cached.content[:max_chars]
+            
+            headers = cached.conditional_headers() if cached else None
+            with span('fetch'):
+                if self.stream_articles:
+                    response, content, reason = self.stream_article(url, headers, max_chars)
+                else:
+                    response = self.http.get(url, upstream='article', headers=headers)
+                    content = reason = None
+            if response.status_code == 304 and cached:
+                self.article_cache.revalidated(url)
+                return cached.content[:max_chars]
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-                    script.decompose()
-                
-                content = ""
-                
-                article_selectors = [
-                    'article',
-                    '[role="main"]',
-                    '.article-content',
-                    '.article-body',
-                    '.story-body',
-                    '.entry-content',
-                    'main'
-                ]
-                
-                for selector in article_selectors:
-                    article_elem = soup.select_one(selector)
-                    if article_elem:
-                        paragraphs = article_elem.find_all('p')
-                        content = ' '.join([p.get_text(strip=True) for p in paragraphs])
-                        if len(content) > 200:
-                            break
-                
-                if len(content) < 200:
-                    paragraphs = soup.find_all('p')
-                    content = ' '.join([p.get_text(strip=True) for p in paragraphs])
-                
-                return content[:max_chars]
+                if content is None:
+                    content = self.parse_article(response.content, max_chars)
+                # A page cut short by its deadline may come through whole next time
+                if self.article_cache and reason != DEADLINE:
+                    self.article_cache.put(
+                        url,
+                        content,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                return content
         except Exception as e:
-            print(f"Error fetching article content from {url}: {e}")
-            return ""
+            logger.warning("Article fetch failed url=%s error=%s", url, e)
+            return cached.content[:max_chars] if cached else ""
         
         return ""
     
+    def stream_article(self, url, headers=None, max_chars=5000):
+        """Download an article page within the byte budget and deadline.
+        
+        Returns (response, text, stop reason). text is None unless the status
+        is 200, and "" for a body that is not HTML.
+        """
+        deadline = time.monotonic() + self.article_deadline
+        timeout = (self.http.timeout[0], min(self.http.timeout[1], self.article_deadline))
+        streaming = self.parser_backend == 'streaming' and not self.parse_pool
+        with self.http.get(url, upstream='article', headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                return response, None, None
+            if not is_html(response.headers.get('Content-Type')):
+                self.downloads.record(NOT_HTML)
+                return response, "", NOT_HTML
+            if streaming:
+                # Parsing happens chunk by chunk inside the download; its
+                # share of the time is reported as the parse stage
+                extractor = ByteStreamExtractor(max_chars)
+                parsing = StageClock('parse')
+                received, reason = read_streamed(response, parsing.wrap(extractor.feed),
+                                                 self.max_article_bytes, deadline)
+            else:
+                # Other backends and the parse pool take the page in one piece
+                body = bytearray()
+                received, reason = read_streamed(response, body.extend, self.max_article_bytes, deadline)
+        self.downloads.record(reason, received)
+        if streaming:
+            text = parsing.call(extractor.close)
+            parsing.observe()
+            return response, text, reason
+        return response, self.parse_article(bytes(body), max_chars), reason
+    
+    def extract_article_content(self, html, max_chars=5000):
+        """Extract the main article text from a page's HTML"""
+        return extract_article_text(html, max_chars, self.parser_backend)
+    
+    @timed('parse')
+    def parse_article(self, html, max_chars=5000):
+        """extract_article_content, on the parse process pool when one is configured"""
+        if self.parse_pool:
+            return self.parse_pool.extract(html, max_chars)
+        return self.extract_article_content(html, max_chars)
+    
+    def scholar_url(self, query):
+        return f"{self.endpoints['scholar']}?q={quote_plus(query)}&hl=en"
+    
+    def search_url(self, query):
+        return f"{self.endpoints['duckduckgo']}?q={quote_plus(query)}"
+    
+    def parse_scholar_results(self, html, limit=5):
+        """Source dicts from a Google Scholar results page"""
+        results = []
+        soup = BeautifulSoup(html, soup_features(self.parser_backend))
+        articles = soup.find_all('div', class_='gs_ri', limit=limit)
+        
+        for article in articles:
+            title_elem = article.find('h3', class_='gs_rt')
+            snippet_elem = article.find('div', class_='gs_rs')
+            
+            if title_elem:
+                link_elem = title_elem.find('a')
+                url_link = link_elem.get('href', '') if link_elem else ''
+                title_text = title_elem.get_text(strip=True)
+                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
+                
+                results.append({
+                    'source': 'Google Scholar',
+                    'title': title_text,
+                    'url': url_link,
+                    'snippet': snippet,
+                    'full_content': '',
+                    'reliability_score': 9
+                })
+        
+        return results
+    
+    def parse_search_hits(self, html, limit=5):
+        """(title, url, snippet) for each DuckDuckGo result, redirects unwrapped"""
+        hits = []
+        soup = BeautifulSoup(html, soup_features(self.parser_backend))
+        search_results = soup.find_all('div', class_='result', limit=limit)
+        
+        for result in search_results:
+            title_elem = result.find('a', class_='result__a')
+            snippet_elem = result.find('a', class_='result__snippet')
+            
+            if title_elem:
+                url_link = extract_real_url(title_elem.get('href', ''))
+                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
+                hits.append((title_elem.get_text(strip=True), url_link, snippet))
+        
+        return hits
+    
+    def web_reliability(self, url):
+        """Reliability score for a generic web result"""
+        return self.trusted_domains.classify(url, default=5)
+    
     def search_google_scholar(self, query, limit=5):
         """Search Google Scholar for academic articles"""
         results = []
         try:
-            url = f"https://scholar.google.com/scholar?q={quote_plus(query)}&hl=en"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http.get(self.scholar_url(query), upstream='scholar')
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                articles = soup.find_all('div', class_='gs_ri', limit=limit)
-                
-                for article in articles:
-                    title_elem = article.find('h3', class_='gs_rt')
-                    snippet_elem = article.find('div', class_='gs_rs')
-                    
-                    if title_elem:
-                        link_elem = title_elem.find('a')
-                        url_link = link_elem.get('href', '') if link_elem else ''
-                        title_text = title_elem.get_text(strip=True)
-                        snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
-                        
-                        results.append({
-                            'source': 'Google Scholar',
-                            'title': title_text,
-                            'url': url_link,
-                            'snippet': snippet,
-                            'full_content': '',
-                            'reliability_score': 9
-                        })
+                results = self.parse_scholar_results(response.content, limit)
         except Exception as e:
-            print(f"Google Scholar search error: {e}")
+            logger.warning("Google Scholar search error: %s", e)
         
         return results
     
-    def search_news_api(self, query, limit=8):
-        """Search for news articles across multiple news sites"""
-        results = []
+    def search_news_api(self, query, limit=8, fetch=None):
+        """Search for news articles across multiple news sites.
         
-        news_queries = [
-            ('site:reuters.com', 'Reuters'),
-            ('site:apnews.com', 'Associated Press'),
-            ('site:bbc.com', 'BBC News'),
-            ('site:npr.org', 'NPR'),
-        ]
+        fetch(url) schedules an article download and returns its Future
+        (fetch_scheduler.submit unless a batch shares its downloads).
+        """
+        fetch = fetch or self.fetch_scheduler.submit
+        results = []
+        pending = []
         
         try:
-            for site_query, source_name in news_queries:
-                search_query = f"{query} {site_query}"
-                url = f"https://html.duckduckgo.com/html/?q={quote_plus(search_query)}"
-                response = requests.get(url, headers=self.headers, timeout=10)
+            for site_query, source_name in NEWS_SITES:
+                url = self.search_url(f"{query} {site_query}")
+                self.fetch_scheduler.throttle(url)
+                response = self.http.get(url, upstream='duckduckgo')
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    search_results = soup.find_all('div', class_='result', limit=2)
-                    
-                    for result in search_results:
-                        title_elem = result.find('a', class_='result__a')
-                        snippet_elem = result.find('a', class_='result__snippet')
+                    for title, url_link, snippet in self.parse_search_hits(response.content, limit=2):
+                        # Start the article fetch now; it runs while the
+                        # next site query is being made
+                        logger.debug("Fetching content from %s", url_link)
+                        pending.append((len(results), fetch(url_link)))
                         
-                        if title_elem:
-                            raw_url = title_elem.get('href', '')
-                            url_link = self.extract_real_url(raw_url)
-                            snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
-                            
-                            print(f"Fetching content from: {url_link}")
-                            full_content = self.fetch_article_content(url_link)
-                            
-                            results.append({
-                                'source': source_name,
-                                'title': title_elem.get_text(strip=True),
-                                'url': url_link,
-                                'snippet': snippet,
-                                'full_content': full_content,
-                                'reliability_score': 9
-                            })
-                            
-                            time.sleep(1)
-                
-                time.sleep(0.5)
+                        results.append({
+                            'source': source_name,
+                            'title': title,
+                            'url': url_link,
+                            'snippet': snippet,
+                            'full_content': '',
+                            'reliability_score': 9
+                        })
                 
         except Exception as e:
-            print(f"News API search error: {e}")
+            logger.warning("News search error: %s", e)
+        
+        for index, future in pending:
+            results[index]['full_content'] = future.result()
         
         return results
     
-    def search_duckduckgo(self, query, limit=5):
-        """Search using DuckDuckGo HTML scraping"""
+    def search_duckduckgo(self, query, limit=5, fetch=None):
+        """Search using DuckDuckGo HTML scraping (fetch as for search_news_api)"""
+        fetch = fetch or self.fetch_scheduler.submit
         results = []
+        pending = []
         try:
-            url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            url = self.search_url(query)
+            self.fetch_scheduler.throttle(url)
+            response = self.http.get(url, upstream='duckduckgo')
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                search_results = soup.find_all('div', class_='result', limit=limit)
-                
-                for result in search_results:
-                    title_elem = result.find('a', class_='result__a')
-                    snippet_elem = result.find('a', class_='result__snippet')
+                for title, url_link, snippet in self.parse_search_hits(response.content, limit):
+                    reliability = self.web_reliability(url_link)
                     
-                    if title_elem:
-                        raw_url = title_elem.get('href', '')
-                        url_link = self.extract_real_url(raw_url)
-                        
-                        reliability = 5
-                        for trusted_domain in self.trusted_domains:
-                            if trusted_domain in url_link.lower():
-                                reliability = 8
-                                break
-                        
-                        full_content = ""
-                        if reliability >= 8:
-                            print(f"Fetching content from: {url_link}")
-                            full_content = self.fetch_article_content(url_link)
-                            time.sleep(1)
-                        
-                        results.append({
-                            'source': 'Web Search',
-                            'title': title_elem.get_text(strip=True),
-                            'url': url_link,
-                            'snippet': snippet_elem.get_text(strip=True) if snippet_elem else '',
-                            'full_content': full_content,
-                            'reliability_score': reliability
-                        })
+                    if reliability >= 8:
+                        logger.debug("Fetching content from %s", url_link)
+                        pending.append((len(results), fetch(url_link)))
+                    
+                    results.append({
+                        'source': 'Web Search',
+                        'title': title,
+                        'url': url_link,
+                        'snippet': snippet,
+                        'full_content': '',
+                        'reliability_score': reliability
+                    })
         except Exception as e:
-            print(f"DuckDuckGo search error: {e}")
+            logger.warning("DuckDuckGo search error: %s", e)
+        
+        for index, future in pending:
+            results[index]['full_content'] = future.result()
         
         return results
     
+    def wikipedia_search_params(self, query, limit=3):
+        return {
+            'action': 'query',
+            'list': 'search',
+            'srsearch': query,
+            'format': 'json',
+            'srlimit': limit
+        }
+    
+    def wikipedia_extract_params(self, page_title):
+        return {
+            'action': 'query',
+            'prop': 'extracts',
+            'exintro': True,
+            'explaintext': True,
+            'titles': page_title,
+            'format': 'json'
+        }
+    
+    def wikipedia_batch_params(self, query, limit=3):
+        """list=search plus generator=search feeding prop=extracts, in one request"""
+        return {
+            'action': 'query',
+            'list': 'search',
+            'srsearch': query,
+            'srlimit': limit,
+            'generator': 'search',
+            'gsrsearch': query,
+            'gsrlimit': limit,
+            'prop': 'extracts',
+            'exintro': True,
+            'explaintext': True,
+            'exlimit': limit,
+            'format': 'json'
+        }
+    
+    def wikipedia_result(self, item, full_content):
+        """Source dict for one list=search hit"""
+        page_title = item.get('title', '')
+        return {
+            'source': 'Wikipedia',
+            'title': page_title,
+            'url': f"https://en.wikipedia.org/wiki/{page_title.replace(' ', '_')}",
+            'snippet': BeautifulSoup(item.get('snippet', ''), soup_features(self.parser_backend)).get_text(),
+            'full_content': full_content[:5000],
+            'reliability_score': 8
+        }
+    
+    def parse_wikipedia_extract(self, data):
+        """Intro extract from a prop=extracts response for a single title"""
+        full_content = ""
+        pages = data.get('query', {}).get('pages', {})
+        for page_id, page_data in pages.items():
+            full_content = page_data.get('extract', '')
+        return full_content
+    
+    def parse_wikipedia_batch(self, data):
+        """Source dicts from a wikipedia_batch_params response"""
+        data = data.get('query', {})
+        extracts = {
+            page_data.get('title', ''): page_data.get('extract', '')
+            for page_data in data.get('pages', {}).values()
+        }
+        return [
+            self.wikipedia_result(item, extracts.get(item.get('title', ''), ''))
+            for item in data.get('search', [])
+        ]
+    
     def search_wikipedia(self, query):
         """Search Wikipedia API"""
         results = []
         try:
-            url = "https://en.wikipedia.org/w/api.php"
-            params = {
-                'action': 'query',
-                'list': 'search',
-                'srsearch': query,
-                'format': 'json',
-                'srlimit': 3
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            url = self.endpoints['wikipedia']
+            response = self.http.get(url, upstream='wikipedia', params=self.wikipedia_search_params(query))
             if response.status_code == 200:
-                data = response.json()
-                searches = data.get('query', {}).get('search', [])
+                searches = response.json().get('query', {}).get('search', [])
                 
                 for item in searches:
-                    page_title = item.get('title', '')
-                    wiki_url = f"https://en.wikipedia.org/wiki/{page_title.replace(' ', '_')}"
-                    
-                    content_params = {
-                        'action': 'query',
-                        'prop': 'extracts',
-                        'exintro': True,
-                        'explaintext': True,
-                        'titles': page_title,
-                        'format': 'json'
-                    }
-                    
-                    content_response = requests.get(url, params=content_params, timeout=10)
+                    content_params = self.wikipedia_extract_params(item.get('title', ''))
+                    content_response = self.http.get(url, upstream='wikipedia', params=content_params)
                     full_content = ""
                     
                     if content_response.status_code == 200:
-                        content_data = content_response.json()
-                        pages = content_data.get('query', {}).get('pages', {})
-                        for page_id, page_data in pages.items():
-                            full_content = page_data.get('extract', '')[:5000]
+                        full_content = self.parse_wikipedia_extract(content_response.json())
                     
-                    results.append({
-                        'source': 'Wikipedia',
-                        'title': page_title,
-                        'url': wiki_url,
-                        'snippet': BeautifulSoup(item.get('snippet', ''), 'html.parser').get_text(),
-                        'full_content': full_content,
-                        'reliability_score': 8
-                    })
+                    results.append(self.wikipedia_result(item, full_content))
                     
                     time.sleep(0.3)
                     
         except Exception as e:
-            print(f"Wikipedia search error: {e}")
+            logger.warning("Wikipedia search error: %s", e)
+        
+        return results
+    
+    def search_wikipedia_batched(self, query, limit=3):
+        """Search Wikipedia and fetch intro extracts in a single API request.
+        
+        list=search supplies the ranked titles and snippets, while
+        generator=search feeds the same hits into prop=extracts, so one round
+        trip replaces the search call plus one extracts call per title.
+        """
+        results = []
+        try:
+            url = self.endpoints['wikipedia']
+            response = self.http.get(url, upstream='wikipedia', params=self.wikipedia_batch_params(query, limit))
+            if response.status_code == 200:
+                results = self.parse_wikipedia_batch(response.json())
+                    
+        except Exception as e:
+            logger.warning("Wikipedia search error: %s", e)
         
         return results
     
     def extract_claim_keywords(self, claim):
         """Extract the main subject/keywords from the claim"""
-        stop_words = {'the', 'is', 'are', 'was', 'were', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 
-                      'of', 'and', 'or', 'but', 'that', 'this', 'these', 'those', 'it', 'be'}
         claim_lower = claim.lower()
         words = re.findall(r'\b\w+\b', claim_lower)
-        keywords = [w for w in words if w not in stop_words and len(w) > 3]
+        keywords = [w for w in words if w not in STOP_WORDS and len(w) > 3]
         return keywords
     
-    def find_claim_context_sentences(self, claim, content):
+    def normalize_claim(self, claim):
+        """Cache key for a claim: case-folded, stop words dropped, whitespace collapsed.
+        
+        Uses the same tokenizing and stop words as extract_claim_keywords but
+        keeps short words, so "is not flat" and "is flat" stay distinct keys.
+        """
+        words = re.findall(r'\b\w+\b', claim.casefold())
+        return ' '.join(w for w in words if w not in STOP_WORDS)
+    
+    def find_claim_context_sentences(self, claim, content, claim_keywords=None):
         """Find sentences in content that actually discuss the claim subject"""
-        claim_keywords = self.extract_claim_keywords(claim)
-        content_lower = content.lower()
+        if claim_keywords is None:
+            claim_keywords = self.extract_claim_keywords(claim)
         
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', content_lower)
+        # A sentence must contain at least 2 claim keywords
+        index = SentenceIndex(content)
+        return index.relevant_sentences(claim_keywords, whole_words=self.whole_word_relevance)
+    
+    def relevant_sentences(self, result, claim_keywords):
+        """find_claim_context_sentences over a source's text (or snippet).
         
-        relevant_sentences = []
-        for sentence in sentences:
-            # Check if sentence contains at least 2 claim keywords
-            keyword_count = sum(1 for keyword in claim_keywords if keyword in sentence)
-            if keyword_count >= min(2, len(claim_keywords)):
-                relevant_sentences.append(sentence.strip())
+        A SourceRecord keeps the sentences, so a source scored as it
+        arrives and again for the final analysis is only searched once.
+        """
+        keywords = tuple(claim_keywords)
+        record = result if isinstance(result, SourceRecord) else None
+        if record and record.relevant and record.relevant[0] == keywords:
+            return record.relevant[1]
         
-        return relevant_sentences
+        text_to_analyze = result.get('full_content', '') or result.get('snippet', '')
+        sentences = self.find_claim_context_sentences(None, text_to_analyze, claim_keywords)
+        if record:
+            record.relevant = (keywords, tuple(sentences))
+        return sentences
     
-    def analyze_results(self, claim, all_results):
-        """Analyze only sentences that actually discuss the claim"""
-        if not all_results:
-            return {
-                'verdict': 'INSUFFICIENT_DATA',
-                'confidence': 0,
-                'summary': 'Not enough information found to verify this claim.',
-                'stats': {
-                    'supporting': 0,
-                    'contradicting': 0,
-                    'neutral': 0,
-                    'total': 0
-                }
-            }
-        
-        # Agreement/support patterns - MUST be about the claim
-        support_patterns = [
-            r'\b(is|are|was|were)\s+(true|correct|accurate|valid|confirmed|verified)\b',
-            r'\b(proves?|shows?|demonstrates?|confirms?|validates?)\s+that\b',
-            r'\b(evidence|research|studies|data)\s+(shows?|suggests?|indicates?|proves?)\b',
-            r'\b(indeed|in fact|actually|truly)\b',
-            r'\b(established|proven|documented)\s+(fact|truth)\b'
-        ]
+    def score_source(self, result, claim_keywords, tally):
+        """Score one source's stance and add it to a VerdictTally.
         
-        # Disagreement/contradiction patterns
-        contradict_patterns = [
-            r'\b(is|are|was|were)\s+(not|false|incorrect|inaccurate|untrue|wrong|fake)\b',
-            r'\b(no evidence|lacks evidence|unproven|unverified|unfounded|baseless)\b',
-            r'\b(myth|hoax|misconception|misinformation|disinformation)\b',
-            r'\b(debunked|refuted|disproven|contradicted|disputed)\b',
-            r'\b(however|but|although|despite)\b.*\b(not|false|incorrect)\b',
-            r'\bnot\s+(true|accurate|correct|valid|proven)\b'
-        ]
+        Returns the stance: 'supporting', 'contradicting' or 'neutral'.
+        """
+        # Find sentences that actually discuss the claim
+        relevant_sentences = self.relevant_sentences(result, claim_keywords)
         
-        # Uncertainty patterns
-        uncertainty_patterns = [
-            r'\b(unclear|unknown|uncertain|disputed|controversial|debated)\b',
-            r'\b(may|might|could|possibly|perhaps|potentially)\s+be\b',
-            r'\b(some|many|few)\s+(believe|think|claim|argue)\b',
-            r'\b(mixed|conflicting|varying)\s+(evidence|views|opinions)\b'
-        ]
+        if not relevant_sentences:
+            logger.debug("Source %s: no relevant sentences found", result.get('source'))
+            tally.add_unscored()
+            return 'neutral'
         
-        weighted_positive = 0
-        weighted_negative = 0
-        weighted_neutral = 0
+        reliability = result.get('reliability_score', 5)
+        weight = reliability / 10.0
         
-        supporting_count = 0
-        contradicting_count = 0
-        neutral_count = 0
+        # Analyze only the relevant sentences
+        combined_relevant = ' '.join(relevant_sentences)
+        
+        # Count support/contradict/uncertainty patterns in one pass
+        stance_counts = STANCE_MATCHER.count(combined_relevant)
+        support_score = stance_counts['support']
+        contradict_score = stance_counts['contradict']
+        uncertain_score = stance_counts['uncertain']
+        
+        stance, amount, reason = classify_stance(support_score, contradict_score, uncertain_score, weight)
+        tally.add(stance, amount)
+        logger.debug("Source %s: relevant=%d support=%d contradict=%d uncertain=%d -> %s%s",
+                     result.get('source'), len(relevant_sentences), support_score, contradict_score,
+                     uncertain_score, stance.upper(), f" ({reason})" if reason else "")
+        return stance
+    
+    @timed('analyze')
+    def analyze_results(self, claim, all_results):
+        """Analyze only sentences that actually discuss the claim"""
+        tally = VerdictTally()
+        if not all_results:
+            return tally.result()
         
         claim_keywords = self.extract_claim_keywords(claim)
-        print(f"Claim keywords: {claim_keywords}")
+        logger.debug("Claim keywords: %s", claim_keywords)
         
         for result in all_results:
-            text_to_analyze = result.get('full_content', '') or result.get('snippet', '')
-            
-            # Find sentences that actually discuss the claim
-            relevant_sentences = self.find_claim_context_sentences(claim, text_to_analyze)
-            
-            if not relevant_sentences:
-                print(f"Source: {result.get('source')} - No relevant sentences found")
-                neutral_count += 1
-                continue
-            
-            print(f"\nSource: {result.get('source')}")
-            print(f"Found {len(relevant_sentences)} relevant sentences")
-            
-            reliability = result.get('reliability_score', 5)
-            weight = reliability / 10.0
-            
-            # Analyze only the relevant sentences
-            combined_relevant = ' '.join(relevant_sentences)
-            
-            support_score = 0
-            contradict_score = 0
-            uncertain_score = 0
-            
-            # Check for support patterns
-            for pattern in support_patterns:
-                matches = re.findall(pattern, combined_relevant, re.IGNORECASE)
-                support_score += len(matches)
-            
-            # Check for contradiction patterns
-            for pattern in contradict_patterns:
-                matches = re.findall(pattern, combined_relevant, re.IGNORECASE)
-                contradict_score += len(matches)
-            
-            # Check for uncertainty patterns
-            for pattern in uncertainty_patterns:
-                matches = re.findall(pattern, combined_relevant, re.IGNORECASE)
-                uncertain_score += len(matches)
-            
-            print(f"  Support patterns: {support_score}")
-            print(f"  Contradict patterns: {contradict_score}")
-            print(f"  Uncertainty patterns: {uncertain_score}")
-            
-            # Determine stance
-            if uncertain_score >= 2:
-                weighted_neutral += weight
-                neutral_count += 1
-                print(f"  → NEUTRAL (uncertainty)")
-            elif contradict_score > support_score * 1.5:
-                weighted_negative += weight * (1 + contradict_score * 0.2)
-                contradicting_count += 1
-                print(f"  → CONTRADICTING")
-            elif support_score > contradict_score * 1.5:
-                weighted_positive += weight * (1 + support_score * 0.2)
-                supporting_count += 1
-                print(f"  → SUPPORTING")
-            elif support_score == 0 and contradict_score == 0:
-                # No clear stance found in relevant sentences
-                weighted_neutral += weight * 0.5
-                neutral_count += 1
-                print(f"  → NEUTRAL (no clear stance)")
-            else:
-                # Mixed signals
-                weighted_neutral += weight * 0.7
-                neutral_count += 1
-                print(f"  → NEUTRAL (mixed)")
-        
-        total = len(all_results)
-        total_weight = weighted_positive + weighted_negative + weighted_neutral
-        
-        print(f"\n{'='*60}")
-        print(f"Final weights - Pos: {weighted_positive:.2f}, Neg: {weighted_negative:.2f}, Neutral: {weighted_neutral:.2f}")
-        print(f"{'='*60}")
-        
-        # Calculate verdict - now MUCH more conservative
-        if total_weight == 0:
-            verdict = 'INSUFFICIENT_DATA'
-            confidence = 0
-        elif weighted_negative > weighted_positive * 3:
-            verdict = 'LIKELY_FALSE'
-            confidence = min(90, int((weighted_negative / total_weight) * 100))
-        elif weighted_positive > weighted_negative * 3:
-            verdict = 'LIKELY_TRUE'
-            confidence = min(90, int((weighted_positive / total_weight) * 100))
-        elif weighted_neutral > (weighted_positive + weighted_negative):
-            verdict = 'DISPUTED'
-            confidence = 45
-        elif weighted_positive > weighted_negative * 1.5:
-            verdict = 'LIKELY_TRUE'
-            confidence = min(70, int((weighted_positive / total_weight) * 85))
-        elif weighted_negative > weighted_positive * 1.5:
-            verdict = 'LIKELY_FALSE'
-            confidence = min(70, int((weighted_negative / total_weight) * 85))
-        else:
-            verdict = 'DISPUTED'
-            confidence = 50
+            self.score_source(result, claim_keywords, tally)
         
-        summary = f"Analyzed {total} sources focusing on claim-relevant content: {supporting_count} supporting, {contradicting_count} contradicting, {neutral_count} neutral/unclear."
+        logger.debug("Final weights pos=%.2f neg=%.2f neutral=%.2f",
+                     tally.weighted_positive, tally.weighted_negative, tally.weighted_neutral)
         
-        return {
-            'verdict': verdict,
-            'confidence': confidence,
-            'summary': summary,
-            'stats': {
-                'supporting': supporting_count,
-                'contradicting': contradicting_count,
-                'neutral': neutral_count,
-                'total': total
-            }
-        }
+        return tally.result()
     
-    def check_claim(self, claim):
-        """Main method to check a claim"""
-        print(f"\n{'='*60}")
-        print(f"Checking claim: {claim}")
-        print(f"{'='*60}\n")
+    def provider_deadline(self, provider):
+        """Seconds a provider may run: its own timeout, capped by request_budget"""
+        return min(provider.timeout or self.provider_timeout, self.request_budget)
+    
+    def run_provider(self, provider, claim, fetch=None, deadline=None, call=None):
+        """Run one provider's search within its concurrency limit, recording
+        the outcome (ok, empty, error, or timeout past the monotonic deadline)
+        on its circuit breaker.
         
+        Waiting for a free slot stops at the deadline, so calls queued behind
+        a slow provider do not hold provider_pool threads the others need.
+        call is the ProviderCall the caller may give up on at the deadline.
+        fetch is passed on to the providers that download article pages.
+        """
+        health = self.providers.health(provider.name)
+        if call is None:
+            call = ProviderCall(health)
+        wait_for = None if deadline is None else max(deadline - time.monotonic(), 0)
+        if not health.slots.acquire(timeout=wait_for):
+            # Spent the whole deadline waiting for a slot; not its fault
+            call.finish(TIMEOUT)
+            return []
+        try:
+            if deadline is not None and time.monotonic() >= deadline or not call.start():
+                call.finish(TIMEOUT)
+                return []
+            try:
+                results = provider.search(self, claim, fetch)
+            except Exception as e:
+                call.finish(ERROR, str(e))
+                raise
+        finally:
+            health.slots.release()
+        
+        call.finish(outcome_of(results, time.monotonic(), deadline))
+        return self.source_records(results)
+    
+    def source_records(self, results):
+        """A provider's result dicts as SourceRecords"""
+        return [SourceRecord.from_result(result, self.content_store) for result in results]
+    
+    def allowed_providers(self, skipped):
+        """Registered providers whose breaker lets them run; the others are
+        appended to skipped"""
+        allowed = []
+        for provider in self.providers:
+            if self.providers.health(provider.name).allow():
+                allowed.append(provider)
+            else:
+                skipped.append(provider.name)
+                logger.info("Provider %s skipped: circuit open", provider.name)
+        return allowed
+    
+    def source_deduper(self):
+        """A SourceDeduper for one claim's sources"""
+        return SourceDeduper(self.fingerprints)
+    
+    def unique_sources(self, results):
+        """results with only the first copy of an article found under several
+        URLs or syndicated by several outlets"""
+        dedupe = self.source_deduper()
+        unique = dedupe.unique(results)
+        if dedupe.collapsed:
+            logger.debug("Collapsed %d repeated sources", dedupe.collapsed)
+        return unique
+    
+    def in_provider_order(self, results_by_provider):
+        """Concatenate per-provider results in registry order, without repeats"""
+        all_results = []
+        for provider in self.providers:
+            all_results.extend(results_by_provider.get(provider.name, []))
+        return self.unique_sources(all_results)
+    
+    def gather_sequential(self, claim, fetch=None):
+        """Query providers one after another (original behaviour)"""
         all_results = []
+        skipped = []
+        providers = self.allowed_providers(skipped)
         
-        print("Searching Wikipedia...")
-        wiki_results = self.search_wikipedia(claim)
-        all_results.extend(wiki_results)
-        time.sleep(0.5)
+        for index, provider in enumerate(providers):
+            logger.debug(provider.message)
+            try:
+                all_results.extend(self.run_provider(provider, claim, fetch))
+            except Exception as e:
+                logger.warning("Provider %s error: %s", provider.name, e)
+            if index < len(providers) - 1:
+                time.sleep(0.5)
         
-        print("Searching news sources...")
-        news_results = self.search_news_api(claim)
-        all_results.extend(news_results)
-        time.sleep(0.5)
+        return self.unique_sources(all_results), [], skipped
+    
+    def iter_provider_results(self, claim, timed_out, fetch=None, skipped=None):
+        """Start every provider at once and yield (name, results) as each finishes.
         
-        print("Searching academic sources...")
-        scholar_results = self.search_google_scholar(claim)
-        all_results.extend(scholar_results)
-        time.sleep(0.5)
+        Each provider gets its own deadline (see provider_deadline) and the
+        whole call is capped by request_budget. Providers still running when
+        their deadline passes are cancelled and their names appended to
+        timed_out; providers whose circuit is open are not started and are
+        appended to skipped. Closing the generator early drops the providers
+        that have not started yet; running ones finish in the background.
+        """
+        started = time.monotonic()
         
-        print("Searching web...")
-        ddg_results = self.search_duckduckgo(claim, limit=3)
-        all_results.extend(ddg_results)
+        pending = {}
+        for provider in self.allowed_providers(skipped if skipped is not None else []):
+            logger.debug(provider.message)
+            deadline = started + self.provider_deadline(provider)
+            call = ProviderCall(self.providers.health(provider.name))
+            future = submit_in_context(self.provider_pool, self.run_provider, provider, claim, fetch, deadline, call)
+            pending[future] = (provider.name, deadline, call)
         
-        print(f"\nFound {len(all_results)} total sources")
+        try:
+            while pending:
+                next_deadline = min(deadline for name, deadline, call in pending.values())
+                done, not_done = wait(pending, timeout=max(0, next_deadline - time.monotonic()),
+                                      return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    name, deadline, call = pending.pop(future)
+                    if call.started is None:
+                        # Gave up waiting for a slot at its deadline
+                        timed_out.append(name)
+                        logger.warning("Provider %s timed out after %.1fs", name, deadline - started)
+                        continue
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        logger.warning("Provider %s error: %s", name, e)
+                        results = []
+                    yield name, results
+                
+                now = time.monotonic()
+                for future in not_done:
+                    name, deadline, call = pending[future]
+                    if deadline <= now:
+                        del pending[future]
+                        future.cancel()
+                        # Recorded now rather than when (or if) the search returns
+                        call.finish(TIMEOUT)
+                        timed_out.append(name)
+                        logger.warning("Provider %s timed out after %.1fs", name, deadline - started)
+        finally:
+            for future, (name, deadline, call) in pending.items():
+                if future.cancel():
+                    # Never started, so never recorded
+                    call.finish(TIMEOUT)
+    
+    def gather_concurrent(self, claim, fetch=None):
+        """Query all providers concurrently, keeping results in provider order"""
+        timed_out = []
+        skipped = []
+        results_by_provider = dict(self.iter_provider_results(claim, timed_out, fetch, skipped))
+        return self.in_provider_order(results_by_provider), timed_out, skipped
+    
+    @timed('check')
+    def check_claim(self, claim, fetch=None):
+        """Main method to check a claim"""
+        logger.debug("Checking claim: %s", claim)
         
+        if fetch is None:
+            # Each article is downloaded once per claim, whichever forms of
+            # its URL the providers found
+            fetch = FetchMemo(self.fetch_scheduler.submit, key=canonical_url).submit
+        
+        if self.fanout:
+            all_results, timed_out, skipped = self.gather_concurrent(claim, fetch)
+        else:
+            all_results, timed_out, skipped = self.gather_sequential(claim, fetch)
         analysis = self.analyze_results(claim, all_results)
         
+        logger.info("Checked claim=%r sources=%d verdict=%s timed_out=%s skipped=%s", claim, len(all_results),
+                    analysis['verdict'], timed_out, skipped)
+        
         return {
             'claim': claim,
             'analysis': analysis,
             'sources': all_results,
             'timestamp': datetime.now().isoformat(),
-            'source_count': len(all_results)
+            'source_count': len(all_results),
+            'timed_out_providers': timed_out,
+            'skipped_providers': skipped
+        }
+
+    def check_claim_stream(self, claim):
+        """Check a claim, yielding (event, data) pairs as results arrive.
+        
+        Emits 'source' for each source as soon as its provider returns and
+        the source is scored, with a provisional analysis of everything seen
+        so far; 'timeout' for each provider that misses its deadline; and
+        finally 'result' with the same dict check_claim_cached returns. Its
+        sources are the streamed ones, in the order they were streamed (not
+        in provider order as check_claim's), so a story found by two
+        providers is kept under the URL the client was sent.
+        """
+        key = self.normalize_claim(claim)
+        cached, state = self.verdict_cache.get(key)
+        if state != 'miss':
+            if state == 'stale':
+                self._schedule_refresh(key, claim)
+            yield 'result', dict(cached, claim=claim, cache=state)
+            return
+        
+        logger.debug("Streaming claim: %s", claim)
+        
+        claim_keywords = self.extract_claim_keywords(claim)
+        tally = VerdictTally()
+        timed_out = []
+        skipped = []
+        all_results = []
+        dedupe = self.source_deduper()
+        reported = 0
+        fetch = FetchMemo(self.fetch_scheduler.submit, key=canonical_url).submit
+        
+        for name, results in self.iter_provider_results(claim, timed_out, fetch, skipped):
+            for result in results:
+                if dedupe.is_repeat(result):
+                    continue
+                all_results.append(result)
+                stance = self.score_source(result, claim_keywords, tally)
+                yield 'source', {
+                    'provider': name,
+                    'source': result,
+                    'stance': stance,
+                    'analysis': tally.result()
+                }
+            for provider in timed_out[reported:]:
+                yield 'timeout', {'provider': provider}
+            reported = len(timed_out)
+        
+        for provider in timed_out[reported:]:
+            yield 'timeout', {'provider': provider}
+        
+        result = {
+            'claim': claim,
+            'analysis': self.analyze_results(claim, all_results),
+            'sources': all_results,
+            'timestamp': datetime.now().isoformat(),
+            'source_count': len(all_results),
+            'timed_out_providers': timed_out,
+            'skipped_providers': skipped
+        }
+        self.verdict_cache.set(key, result)
+        yield 'result', dict(result, cache='miss')
+    
+    def check_claim_cached(self, claim, fetch=None):
+        """check_claim behind the verdict cache.
+        
+        Returns the result with a 'cache' field of 'hit', 'stale' or 'miss'.
+        """
+        key = self.normalize_claim(claim)
+        cached, state = self.verdict_cache.get(key)
+        
+        if state == 'miss':
+            result, shared = self.claim_flight.do(key, self._check_and_cache, key, claim, fetch)
+            return dict(result, claim=claim, cache='miss')
+        
+        if state == 'stale':
+            self._schedule_refresh(key, claim)
+        
+        return dict(cached, claim=claim, cache=state)
+    
+    def _check_and_cache(self, key, claim, fetch=None):
+        result = self.check_claim(claim, fetch)
+        self.verdict_cache.set(key, result)
+        return result
+    
+    def _schedule_refresh(self, key, claim):
+        """Recompute a stale entry in the background, once per key"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                self.claim_flight.do(key, self._check_and_cache, key, claim)
+            except Exception as e:
+                logger.warning("Cache refresh error for %r: %s", claim, e)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        submit_in_context(self.refresh_pool, refresh)
+    
+    def check_claims_iter(self, claims, timeout=None, memo=None):
+        """Check a batch of claims, yielding (input indexes, result) as each finishes.
+        
+        Claims that normalize to the same text are checked once, and their
+        result is yielded with every index that asked for it. All checks
+        share one FetchMemo (pass memo to read its counters afterwards), so
+        an article found for several claims is downloaded once. A result is
+        what check_claim_cached returns, or {'claim', 'error'} for a check
+        that failed or was still running after timeout seconds. At the
+        timeout (or when the caller stops early) checks that have not started
+        are dropped, while running ones finish in the background and fill the
+        verdict cache for a retry. AsyncFactChecker.check_claims_iter does
+        the same.
+        """
+        memo = memo or FetchMemo(self.fetch_scheduler.submit, key=canonical_url)
+        indexes_by_key = {}
+        for index, claim in enumerate(claims):
+            indexes_by_key.setdefault(self.normalize_claim(claim), []).append(index)
+        
+        pending = {
+            submit_in_context(self.batch_pool, self.check_claim_cached, claims[indexes[0]], memo.submit): indexes
+            for indexes in indexes_by_key.values()
         }
+        try:
+            try:
+                for future in as_completed(list(pending), timeout=timeout):
+                    indexes = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning("Batch check error for %r: %s", claims[indexes[0]], e)
+                        result = {'claim': claims[indexes[0]], 'error': f'Internal server error: {str(e)}'}
+                    yield indexes, result
+            except FuturesTimeoutError:
+                pass
+            
+            while pending:
+                future, indexes = pending.popitem()
+                future.cancel()
+                yield indexes, {'claim': claims[indexes[0]], 'error': f'Timed out after {timeout}s'}
+        finally:
+            # The caller stopped early: drop the checks that have not started
+            for future in pending:
+                future.cancel()
+    
+    def check_claims(self, claims, timeout=None, progress=None):
+        """Check a list of claims, returning their results in input order.
+        
+        See check_claims_iter. progress(completed, total) is called each
+        time more of the input is answered.
+        """
+        results = [None] * len(claims)
+        completed = 0
+        for indexes, result in self.check_claims_iter(claims, timeout):
+            for index in indexes:
+                results[index] = dict(result, claim=claims[index])
+            completed += len(indexes)
+            if progress:
+                progress(completed, len(claims))
+        return results
 
-# Initialize fact checker
-fact_checker = FactChecker()
+def create_fact_checker():
+    """The server's FactChecker, configured from the environment"""
+    return FactChecker(
+        article_cache=ArticleCache(os.environ.get('ARTICLE_CACHE_PATH', DEFAULT_ARTICLE_CACHE_PATH)),
+        parser_backend=os.environ.get('PARSER_BACKEND', 'streaming'),
+        parse_processes=int(os.environ.get('PARSE_PROCESSES', '0')),
+        trusted_domains_path=os.environ.get('TRUSTED_DOMAINS_PATH')
+    )
+
+# The server's FactChecker, built by get_fact_checker() on first use rather
+# than at import. Importing app (tests, benches, asgi.py, or a spawned
+# ParsePool worker re-importing the main module) opens no cache file and
+# starts no pool. Tests may assign their own.
+fact_checker = None
+_setup_lock = threading.Lock()
+
+def get_fact_checker():
+    global fact_checker
+    if fact_checker is None:
+        with _setup_lock:
+            if fact_checker is None:
+                fact_checker = create_fact_checker()
+    return fact_checker
+
+def create_job_runner():
+    """The server's background verification jobs (/api/jobs), persisted so
+    queued claims survive a restart. JOB_WORKERS=0 leaves them to other
+    processes."""
+    queue = JobQueue(
+        os.environ.get('JOB_QUEUE_PATH', DEFAULT_JOB_QUEUE_PATH),
+        max_queued=int(os.environ.get('JOB_QUEUE_SIZE', '1000'))
+    )
+    return JobRunner(
+        queue,
+        lambda claim: plain_result(get_fact_checker().check_claim_cached(claim)),
+        workers=int(os.environ.get('JOB_WORKERS', '2'))
+    )
+
+# Like fact_checker, built by get_job_runner() on first use. Its workers
+# start with the first /api/jobs request, or from the server entry points
+# so jobs queued before a restart resume. Tests may assign their own.
+job_runner = None
+
+def get_job_runner():
+    global job_runner
+    if job_runner is None:
+        with _setup_lock:
+            if job_runner is None:
+                job_runner = create_job_runner()
+    return job_runner
+
+# Per-request profiling: with PROFILING=1, a /submit or /api/verify request
+# sent with "X-Profile: 1" (or ?profile=1) skips the verdict cache, runs
+# check_claim under a Profile and returns its breakdown. Off by default.
+profiling_enabled = os.environ.get('PROFILING', '') == '1'
+profiles = ProfileStore()
+
+@app.before_request
+def start_request():
+    # Tags this request's log lines (and the work it hands to thread pools)
+    new_request_id()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -504,94 +1035,541 @@ def health_check():
 def verify_claim():
     """Main endpoint to verify a claim (original format)"""
     try:
-        data = request.get_json()
-        
-        if not data or 'claim' not in data:
-            return jsonify({'error': 'Missing claim in request body'}), 400
-        
-        claim = data['claim'].strip()
+        claim, error = validate_claim(request.get_json())
+        if error:
+            return error
         
-        if not claim:
-            return jsonify({'error': 'Claim cannot be empty'}), 400
+        fields, include_content = parse_projection(request.args.get('fields'), request.args.get('include_content'))
+        if wants_profile(request.headers.get('X-Profile'), request.args.get('profile')):
+            return respond(verify_json(profiled_check(claim), fields, include_content))
         
-        if len(claim) < 3:
-            return jsonify({'error': 'Claim too short. Please provide a meaningful statement.'}), 400
+        result = get_fact_checker().check_claim_cached(claim)
         
-        result = fact_checker.check_claim(claim)
-        
-        return jsonify(result), 200
+        return respond(verify_json(result, fields, include_content))
     
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("Error in /api/verify: %s", e)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+# Request validation and response formatting below are shared with the
+# ASGI server (asgi.py). Errors are (body, status) pairs, which Flask
+# routes can return as they are.
+
+def validate_claim(data):
+    """Return (claim, None) or (None, (error body, status)) for an /api/verify body"""
+    if not data or 'claim' not in data:
+        return None, ({'error': 'Missing claim in request body'}, 400)
+    
+    claim = data['claim'].strip()
+    
+    if not claim:
+        return None, ({'error': 'Claim cannot be empty'}, 400)
+    
+    if len(claim) < 3:
+        return None, ({'error': 'Claim too short. Please provide a meaningful statement.'}, 400)
+    
+    return claim, None
+
+def validate_message(data):
+    """Return (message, None) or (None, (error body, status)) for a /submit body"""
+    if not data:
+        return None, ({'error': 'No JSON data received'}, 400)
+        
+    if 'message' not in data:
+        return None, ({'error': 'Missing "message" field in request body'}, 400)
+    
+    message = data['message'].strip()
+    
+    if not message:
+        return None, ({'error': 'Message cannot be empty'}, 400)
+    
+    if len(message) < 3:
+        return None, ({'error': 'Message too short. Please provide at least 3 characters.'}, 400)
+    
+    return message, None
+
+def format_source(source):
+    """A source in the simplified /submit format"""
+    return {
+        'website': source.get('source', 'Unknown'),
+        'body': source.get('snippet', ''),
+        'link': source.get('url', '')
+    }
+
+def format_analysis(analysis):
+    """Verdict fields in the simplified /submit format"""
+    return {
+        'resolution': analysis['verdict'],
+        'confidence': f"{analysis['confidence']}%",
+        'supporting': analysis['stats']['supporting'],
+        'contradicting': analysis['stats']['contradicting'],
+        'neutral': analysis['stats']['neutral']
+    }
+
+def submit_summary(result):
+    """The /submit fields of a check_claim result, all but its sources"""
+    return {
+        'topic': result['claim'],
+        **format_analysis(result['analysis']),
+        'timed_out': result['timed_out_providers'],
+        'skipped': result['skipped_providers'],
+        'cache': result['cache']
+    }
+
+def format_submit_result(result):
+    """Convert a check_claim result to the simplified /submit format"""
+    return dict(submit_summary(result), sources=[format_source(source) for source in result['sources']])
+
+def with_sources_json(body, sources, encode_source, fields=None):
+    """Compact JSON text of body plus a "sources" list, each source written
+    by encode_source (a SourceRecord method) instead of copied into a dict.
+    With fields, only those top-level fields are written."""
+    if fields is not None:
+        body = {key: value for key, value in body.items() if key in fields}
+        if 'sources' not in fields:
+            return dumps(body)
+    head = dumps(body)
+    items = ','.join(encode_source(source) for source in sources)
+    return f'{head[:-1]}{"," if body else ""}"sources":[{items}]}}'
+
+def verify_json(result, fields=None, include_content=True):
+    """A check_claim result as /api/verify JSON text (projected as
+    responses.parse_projection describes)"""
+    body = {key: value for key, value in result.items() if key != 'sources'}
+    return with_sources_json(body, result['sources'], lambda source: source.to_json(dumps, include_content), fields)
+
+def submit_json(result, fields=None, **extra):
+    """format_submit_result(result), plus any extra fields, as JSON text"""
+    return with_sources_json(dict(submit_summary(result), **extra), result['sources'],
+                             lambda source: source.to_submit_json(dumps), fields)
+
+def respond(text, status=200, headers=None):
+    """A response for JSON text, compressed as the request's Accept-Encoding allows"""
+    payload, encoding_headers = encode_body(text, request.headers.get('Accept-Encoding'))
+    return Response(payload, status=status, headers={**(headers or {}), **encoding_headers},
+                    mimetype='application/json')
+
+def plain_result(result):
+    """A check_claim result with its sources as dicts, for json.dumps"""
+    return dict(result, sources=[source.as_dict() for source in result['sources']])
+
 @app.route('/submit', methods=['POST'])
 def submit_claim():
     """New endpoint to verify a claim with simplified input/output format"""
     try:
-        data = request.get_json()
+        message, error = validate_message(request.get_json())
+        if error:
+            return error
         
-        if not data:
-            return jsonify({'error': 'No JSON data received'}), 400
-            
-        if 'message' not in data:
-            return jsonify({'error': 'Missing "message" field in request body'}), 400
-        
-        message = data['message'].strip()
-        
-        if not message:
-            return jsonify({'error': 'Message cannot be empty'}), 400
-        
-        if len(message) < 3:
-            return jsonify({'error': 'Message too short. Please provide at least 3 characters.'}), 400
-        
-        result = fact_checker.check_claim(message)
-        
-        formatted_result = {
-            'topic': result['claim'],
-            'resolution': result['analysis']['verdict'],
-            'confidence': f"{result['analysis']['confidence']}%",
-            'supporting': result['analysis']['stats']['supporting'],
-            'contradicting': result['analysis']['stats']['contradicting'],
-            'neutral': result['analysis']['stats']['neutral'],
-            'sources': [
-                {
-                    'website': source.get('source', 'Unknown'),
-                    'body': source.get('snippet', ''),
-                    'link': source.get('url', '')
-                }
-                for source in result['sources']
-            ]
-        }
+        fields, _ = parse_projection(request.args.get('fields'), None)
+        if wants_profile(request.headers.get('X-Profile'), request.args.get('profile')):
+            result = profiled_check(message)
+            return respond(submit_json(result, fields, profile=result['profile']))
+        
+        result = get_fact_checker().check_claim_cached(message)
         
-        return jsonify(formatted_result), 200
+        return respond(submit_json(result, fields))
     
     except Exception as e:
-        print(f"Error in /submit: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in /submit: %s", e)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+def wants_profile(header, flag):
+    """True if profiling is enabled and the X-Profile header or ?profile= flag asks for it"""
+    return profiling_enabled and (header or flag or '').lower() in ('1', 'true', 'yes')
+
+def with_profile(result, profile):
+    """A check_claim result run under profile, with its breakdown and a link to its samples"""
+    profiles.add(profile)
+    summary = dict(profile.summary(), dump=f'/api/profiles/{profile.id}')
+    return dict(result, cache='bypass', profile=summary)
+
+def profiled_check(claim):
+    """check_claim under a Profile, skipping the verdict cache"""
+    profile = Profile()
+    with profile.running():
+        result = get_fact_checker().check_claim(claim)
+    return with_profile(result, profile)
+
+def profile_dump(profile_id):
+    """(collapsed stacks, headers) of a stored profile, or None"""
+    profile = profiles.get(profile_id) if profiling_enabled else None
+    if profile is None:
+        return None
+    return profile.collapsed(), {'Content-Disposition': f'attachment; filename="profile-{profile_id}.txt"'}
+
+# Largest /submit/batch request accepted
+MAX_BATCH_MESSAGES = 1000
+
+def validate_batch(data):
+    """Return ((messages, timeout), None) or (None, (error body, status)) for a /submit/batch body"""
+    if not data:
+        return None, ({'error': 'No JSON data received'}, 400)
+    
+    messages = data.get('messages')
+    if not isinstance(messages, list) or not messages:
+        return None, ({'error': 'Missing "messages" list in request body'}, 400)
+    
+    if len(messages) > MAX_BATCH_MESSAGES:
+        return None, ({'error': f'Too many messages. At most {MAX_BATCH_MESSAGES} per batch.'}, 400)
+    
+    if not all(isinstance(message, str) for message in messages):
+        return None, ({'error': 'Every message must be a string'}, 400)
+    
+    timeout = data.get('timeout')
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        return None, ({'error': '"timeout" must be a positive number of seconds'}, 400)
+    
+    return (messages, timeout), None
+
+class BatchReport:
+    """/submit/batch items in input order, filled in as results arrive.
+    
+    Messages that fail validate_message are answered up front with an
+    error item; the rest become `claims` for check_claims_iter, whose
+    indexes add() maps back to input positions.
+    """
+    
+    def __init__(self, messages):
+        self.items = [None] * len(messages)
+        self.claims = []
+        self.positions = []
+        for index, message in enumerate(messages):
+            claim, error = validate_message({'message': message})
+            if error:
+                self.items[index] = {'index': index, 'topic': message, 'error': error[0]['error']}
+            else:
+                self.positions.append(index)
+                self.claims.append(claim)
+        self.answered = len(messages) - len(self.claims)
+    
+    def rejected(self):
+        return [item for item in self.items if item is not None]
+    
+    def add(self, indexes, result):
+        """Record one check_claims_iter result; returns the new items"""
+        added = []
+        for index in indexes:
+            position, claim = self.positions[index], self.claims[index]
+            if 'error' in result:
+                item = {'index': position, 'topic': claim, 'error': result['error']}
+            else:
+                item = {'index': position, **format_submit_result(dict(result, claim=claim))}
+            self.items[position] = item
+            added.append(item)
+        self.answered += len(added)
+        return added
+    
+    def summary(self, memo):
+        failed = sum(1 for item in self.items if item is None or 'error' in item)
+        return {
+            'total': len(self.items),
+            'completed': len(self.items) - failed,
+            'failed': failed,
+            'partial': failed > 0,
+            'articles': memo.stats()
+        }
+    
+    def progress_line(self, item):
+        """One NDJSON line: a finished item and how much of the batch is answered"""
+        return dumps({'result': item, 'answered': self.answered, 'total': len(self.items)}) + '\n'
+
+# Longest ?wait= a job status request may long-poll for, in seconds
+MAX_JOB_WAIT = 30
+
+def validate_job(data):
+    """Return ((claim, priority), None) or (None, (error body, status)) for a POST /api/jobs body"""
+    claim, error = validate_claim(data)
+    if error:
+        return None, error
+    
+    priority = data.get('priority', DEFAULT_PRIORITY)
+    if isinstance(priority, bool) or not isinstance(priority, int) or not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+        return None, ({'error': f'"priority" must be an integer from {MIN_PRIORITY} to {MAX_PRIORITY}'}, 400)
+    
+    return (claim, priority), None
+
+def enqueue_job(claim, priority):
+    """Queue a claim; returns (body, status, headers) for POST /api/jobs"""
+    runner = get_job_runner()
+    runner.ensure_started()
+    try:
+        job_id = runner.queue.submit(claim, priority)
+    except QueueFull as e:
+        retry_after = runner.retry_after(e.queued)
+        return ({'error': 'Job queue is full, please retry later', 'retry_after': retry_after}, 429,
+                {'Retry-After': str(retry_after)})
+    
+    status_url = f'/api/jobs/{job_id}'
+    return ({'job_id': job_id, 'status': 'queued', 'priority': priority, 'status_url': status_url}, 202,
+            {'Location': status_url})
+
+def job_wait_seconds(value):
+    """The ?wait= long-poll time, clamped to [0, MAX_JOB_WAIT]"""
+    try:
+        return min(max(float(value or 0), 0), MAX_JOB_WAIT)
+    except ValueError:
+        return 0
+
+def job_payload(job):
+    """Body of GET /api/jobs/<id> for a JobQueue.get() dict"""
+    def timestamp(value):
+        return datetime.fromtimestamp(value).isoformat() if value else None
+    
+    body = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'claim': job['claim'],
+        'priority': job['priority'],
+        'attempts': job['attempts'],
+        'created_at': timestamp(job['created_at']),
+        'started_at': timestamp(job['started_at']),
+        'finished_at': timestamp(job['finished_at'])
+    }
+    if 'position' in job:
+        body['position'] = job['position']
+    if job['status'] == DONE:
+        body['result'] = job['result']
+    elif job['status'] == FAILED:
+        body['error'] = job['error']
+    return body
+
+def wants_ndjson(accept):
+    """True if an Accept header prefers newline-delimited JSON"""
+    return parse_accept_header(accept, MIMEAccept).best == 'application/x-ndjson'
+
+def sse_event(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+@app.route('/submit/stream', methods=['GET', 'POST'])
+def submit_claim_stream():
+    """Streaming /submit: Server-Sent Events with each source as it is scored.
+    
+    Events: 'source' (one source plus the provisional verdict so far),
+    'timeout' (a provider missed its deadline), 'result' (the same body
+    /submit returns) and 'error'. GET takes ?message= for EventSource.
+    """
+    if request.method == 'GET':
+        data = {'message': request.args.get('message', '')}
+    else:
+        data = request.get_json(silent=True)
+    
+    message, error = validate_message(data)
+    if error:
+        return error
+    
+    def generate():
+        try:
+            for event, payload in get_fact_checker().check_claim_stream(message):
+                if event == 'source':
+                    yield sse_event('source', {
+                        'source': format_source(payload['source']),
+                        'stance': payload['stance'],
+                        **format_analysis(payload['analysis'])
+                    })
+                elif event == 'result':
+                    yield sse_event('result', format_submit_result(payload))
+                else:
+                    yield sse_event(event, payload)
+        except Exception as e:
+            logger.exception("Error in /submit/stream: %s", e)
+            yield sse_event('error', {'error': f'Internal server error: {str(e)}'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/submit/batch', methods=['POST'])
+def submit_batch():
+    """Verify a batch of claims, sharing searches and article downloads.
+    
+    Body: {"messages": [...], "timeout": seconds (optional)}. Answers
+    {"results": [...], "total", "completed", "failed", "partial",
+    "articles"}, results in input order. Claims that fail or miss the
+    timeout get an "error" item; the rest are still returned. With
+    Accept: application/x-ndjson every result is streamed as a JSON line
+    as soon as it is ready, then a final {"summary": ...} line.
+    """
+    batch, error = validate_batch(request.get_json(silent=True))
+    if error:
+        return error
+    
+    messages, timeout = batch
+    report = BatchReport(messages)
+    checker = get_fact_checker()
+    memo = FetchMemo(checker.fetch_scheduler.submit, key=canonical_url)
+    results = checker.check_claims_iter(report.claims, timeout, memo)
+    
+    if wants_ndjson(request.headers.get('Accept')):
+        def generate():
+            for item in report.rejected():
+                yield report.progress_line(item)
+            for indexes, result in results:
+                for item in report.add(indexes, result):
+                    yield report.progress_line(item)
+            yield dumps({'summary': report.summary(memo)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    for indexes, result in results:
+        report.add(indexes, result)
+    
+    return respond(dumps({'results': report.items, **report.summary(memo)}))
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a claim for background verification.
+    
+    Body: {"claim": "...", "priority": 0-9 (higher runs first, default 5)}.
+    Answers 202 with the job id at once, or 429 with Retry-After when the
+    queue is full.
+    """
+    job, error = validate_job(request.get_json(silent=True))
+    if error:
+        return error
+    
+    body, status, headers = enqueue_job(*job)
+    return jsonify(body), status, headers
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a job, with its result once done. ?wait=N long-polls up to N seconds"""
+    wait = job_wait_seconds(request.args.get('wait'))
+    runner = get_job_runner()
+    runner.ensure_started()
+    job = runner.queue.wait(job_id, wait) if wait else runner.queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return respond(dumps(job_payload(job)))
+
+def stats_payload(checker):
+    """Cache, coalescing and connection pool counters of a (sync or async) checker"""
+    return {
+        'verdict_cache': checker.verdict_cache.stats(),
+        'article_cache': checker.article_cache.stats() if checker.article_cache else None,
+        'single_flight': {
+            'claims': checker.claim_flight.stats(),
+            'articles': checker.article_flight.stats()
+        },
+        'http': checker.http.stats(),
+        'downloads': checker.downloads.stats(),
+        'fingerprints': checker.fingerprints.stats(),
+        'content': checker.content_store.stats(),
+        'jobs': get_job_runner().queue.stats()
+    }
+
+def sources_payload(checker):
+    """Body of /api/sources: every source with its provider's live status,
+    and each provider's breaker state and latency percentiles"""
+    providers = checker.providers.stats()
+    sources = [
+        {'name': name, 'type': kind, 'status': health['status'],
+         'reliability': provider.reliability, 'provider': provider.name}
+        for provider, health in zip(checker.providers, providers)
+        for name, kind in provider.sources
+    ]
+    return {'sources': sources, 'providers': providers}
+
+def metrics_families(checker):
+    """Scrape-time metric families (see metrics.render) from a checker's counters"""
+    verdicts = checker.verdict_cache.stats()
+    families = [
+        ('factchecker_verdict_cache_lookups_total', 'counter', 'Verdict cache lookups by result',
+         [({'result': 'hit'}, verdicts['hits']), ({'result': 'stale'}, verdicts['stale_hits']),
+          ({'result': 'miss'}, verdicts['misses'])]),
+        ('factchecker_verdict_cache_hit_ratio', 'gauge', 'Share of verdict cache lookups answered from the cache',
+         [({}, verdicts['hit_rate'])]),
+        ('factchecker_verdict_cache_bytes', 'gauge', 'Estimated size of the cached verdicts',
+         [({}, verdicts['bytes'])])
+    ]
+    
+    if checker.article_cache:
+        articles = checker.article_cache.stats()
+        lookups = articles['hits'] + articles['misses']
+        families += [
+            ('factchecker_article_cache_lookups_total', 'counter', 'Article cache lookups by result',
+             [({'result': 'hit'}, articles['hits']), ({'result': 'miss'}, articles['misses']),
+              ({'result': 'revalidated'}, articles['revalidations'])]),
+            ('factchecker_article_cache_hit_ratio', 'gauge', 'Share of article lookups answered from the cache',
+             [({}, round(articles['hits'] / lookups, 4) if lookups else 0.0)])
+        ]
+    
+    flights = []
+    for kind, flight in (('claims', checker.claim_flight), ('articles', checker.article_flight)):
+        stats = flight.stats()
+        flights += [({'kind': kind, 'role': 'leader'}, stats['leaders']),
+                    ({'kind': kind, 'role': 'waiter'}, stats['coalesced_waiters'])]
+    families.append(('factchecker_single_flight_calls_total', 'counter',
+                     'Coalesced calls: leaders did the work, waiters shared it', flights))
+    
+    connections = checker.http.stats()['totals']
+    downloads = checker.downloads.stats()
+    families += [
+        ('factchecker_http_connections_total', 'counter', 'Outbound connections opened and reused',
+         [({'event': 'opened'}, connections['opened']), ({'event': 'reused'}, connections['reused'])]),
+        ('factchecker_article_downloads_total', 'counter', 'Article downloads by the reason reading stopped',
+         [({'reason': reason}, count) for reason, count in sorted(downloads['stopped'].items())]),
+        ('factchecker_article_bytes_read_total', 'counter', 'Article body bytes read',
+         [({}, downloads['bytes_read'])])
+    ]
+    
+    providers = checker.providers.stats()
+    families += [
+        ('factchecker_provider_calls_total', 'counter', 'Provider searches by outcome',
+         [({'provider': item['name'], 'outcome': outcome}, count)
+          for item in providers for outcome, count in item['calls'].items()]),
+        ('factchecker_provider_skipped_total', 'counter', 'Searches skipped because the circuit was open',
+         [({'provider': item['name']}, item['skipped']) for item in providers]),
+        ('factchecker_provider_circuit_state', 'gauge', 'Circuit breaker state: 0 closed, 1 half-open, 2 open',
+         [({'provider': item['name']}, CIRCUIT_LEVELS[item['breaker']['state']]) for item in providers])
+    ]
+    
+    families.append(('factchecker_jobs', 'gauge', 'Background jobs by status',
+                     [({'status': status}, count) for status, count in get_job_runner().queue.stats().items()]))
+    return families
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Stack samples of a profiled request, as collapsed stacks for flame graph tools"""
+    dump = profile_dump(profile_id)
+    if dump is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    text, headers = dump
+    return Response(text, content_type='text/plain; charset=utf-8', headers=headers)
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Endpoint exposing cache, coalescing and connection pool counters"""
+    return jsonify(stats_payload(get_fact_checker())), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint: stage latency histograms, cache hit rates,
+    upstream status codes and provider health"""
+    return Response(render_metrics(metrics_families(get_fact_checker())), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/sources', methods=['GET'])
 def get_sources():
-    """Endpoint to list available sources"""
-    return jsonify({
-        'sources': [
-            {'name': 'Google Scholar', 'type': 'academic', 'status': 'active', 'reliability': 9},
-            {'name': 'Reuters', 'type': 'news', 'status': 'active', 'reliability': 9},
-            {'name': 'Associated Press', 'type': 'news', 'status': 'active', 'reliability': 9},
-            {'name': 'BBC News', 'type': 'news', 'status': 'active', 'reliability': 9},
-            {'name': 'NPR', 'type': 'news', 'status': 'active', 'reliability': 9},
-            {'name': 'Wikipedia', 'type': 'encyclopedia', 'status': 'active', 'reliability': 8},
-            {'name': 'Web Search', 'type': 'search', 'status': 'active', 'reliability': 5}
-        ]
-    }), 200
+    """Endpoint listing sources with their live status"""
+    return jsonify(sources_payload(get_fact_checker())), 200
 
 if __name__ == '__main__':
     print("Fact Checker API Starting...")
     print("Available endpoints:")
     print("   - POST /submit         - Verify a claim (new format)")
+    print("   - POST /submit/stream  - Verify a claim, streaming sources (SSE)")
+    print("   - POST /submit/batch   - Verify a list of claims")
     print("   - POST /api/verify     - Verify a claim (original format)")
+    print("   - POST /api/jobs       - Queue a claim, poll GET /api/jobs/<id>")
     print("   - GET  /api/health     - Health check")
     print("   - GET  /api/sources    - List sources")
+    print("   - GET  /api/stats      - Cache and connection counters")
+    print("   - GET  /metrics        - Prometheus metrics")
+    print("   - GET  /api/profiles/<id> - Samples of a profiled request (PROFILING=1)")
+    get_fact_checker()
+    get_job_runner().ensure_started()
     app.run(debug=True, host='0.0.0.0', port=5050)
\ No newline at end of file
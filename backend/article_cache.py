@@ -0,0 +1,184 @@
+"""
+Persistent URL -> extracted article text cache, stored in SQLite.
+
+Text is stored zlib-compressed together with the ETag / Last-Modified
+validators of the response it came from. Entries younger than `fresh_ttl`
+are served without any network call. Older entries are revalidated with a
+conditional GET, and a 304 answer keeps the stored text.
+
+The database runs in WAL mode, so several gunicorn workers can share one
+file: readers never block, and writers wait on SQLite's lock (busy_timeout)
+instead of failing. Once the stored text grows past `max_bytes`, the least
+recently used entries are evicted.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at);
+"""
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'articles.sqlite3')
+
+
+class CachedArticle:
+    """One stored article plus the validators needed to revalidate it"""
+
+    __slots__ = ('url', 'content', 'etag', 'last_modified', 'fetched_at')
+
+    def __init__(self, url, content, etag, last_modified, fetched_at):
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ArticleCache:
+    """SQLite-backed article text cache shared across threads and processes"""
+
+    # Only rewrite accessed_at when it is older than this, so hot reads do
+    # not turn into a stream of writes
+    TOUCH_INTERVAL = 60
+    # Check the total size every this many writes
+    EVICT_EVERY = 50
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=256 * 1024 * 1024, fresh_ttl=24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA busy_timeout=5000')
+            self._local.connection = connection
+        return connection
+
+    def get(self, url):
+        """Return the CachedArticle for url, or None"""
+        row = self._connection().execute(
+            'SELECT content, etag, last_modified, fetched_at, accessed_at FROM articles WHERE url = ?',
+            (url,)
+        ).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        content, etag, last_modified, fetched_at, accessed_at = row
+        now = time.time()
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            self._connection().execute('UPDATE articles SET accessed_at = ? WHERE url = ?', (now, url))
+
+        text = zlib.decompress(content).decode('utf-8')
+        return CachedArticle(url, text, etag, last_modified, fetched_at)
+
+    def is_fresh(self, article):
+        return article.age() < self.fresh_ttl
+
+    def put(self, url, content, etag=None, last_modified=None):
+        compressed = zlib.compress(content.encode('utf-8'), 6)
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO articles '
+            '(url, content, size, etag, last_modified, fetched_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, compressed, len(compressed), etag, last_modified, now, now)
+        )
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def revalidated(self, url):
+        """Record a 304 Not Modified: the stored text is fresh again"""
+        now = time.time()
+        self._connection().execute(
+            'UPDATE articles SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url)
+        )
+        with self._lock:
+            self.revalidations += 1
+
+    def total_bytes(self):
+        return self._connection().execute('SELECT COALESCE(SUM(size), 0) FROM articles').fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache is 90% of max_bytes"""
+        connection = self._connection()
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        target = excess + self.max_bytes // 10
+        doomed = []
+        freed = 0
+        for url, size in connection.execute('SELECT url, size FROM articles ORDER BY accessed_at'):
+            if freed >= target:
+                break
+            doomed.append((url,))
+            freed += size
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany('DELETE FROM articles WHERE url = ?', doomed)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return len(doomed)
+
+    def stats(self):
+        entries, size = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM articles'
+        ).fetchone()
+        with self._lock:
+            return {
+                'entries': entries,
+                'bytes': size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations
+            }
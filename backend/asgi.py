@@ -0,0 +1,371 @@
+"""
+ASGI entry point: the Fact Checker API served by AsyncFactChecker.
+
+Same routes and JSON bodies as the Flask app in app.py, but every claim is
+an asyncio task on one event loop instead of a worker thread:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5050
+
+The verdict cache, article cache and per-host rate limits are those of
+app.get_fact_checker(), so both servers can be pointed at the same cache
+file. Like app's, the checker is built on first use rather than at import.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from app import (
+    get_fact_checker, get_job_runner, validate_claim, validate_message, validate_batch, validate_job, enqueue_job,
+    job_wait_seconds, job_payload, format_source, format_analysis, format_submit_result, verify_json, submit_json,
+    sse_event, wants_ndjson, stats_payload, sources_payload, metrics_families, wants_profile, with_profile,
+    profile_dump, BatchReport
+)
+from job_queue import DONE, FAILED
+from async_checker import AsyncFactChecker
+from fetch_scheduler import FetchMemo
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, new_request_id, render as render_metrics
+from profiling import Profile
+from responses import dumps, encode_body, parse_projection
+from urls import canonical_url
+
+# Built by get_checker() on first use; tests may assign their own
+checker = None
+
+
+def get_checker():
+    global checker
+    if checker is None:
+        checker = AsyncFactChecker(get_fact_checker())
+    return checker
+
+logger = logging.getLogger(__name__)
+
+# flask-cors defaults: any origin, preflight answered for every route
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+
+async def read_json(receive):
+    """Request body parsed as JSON, or None if it is missing or malformed"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+async def send_json(send, body, status=200, headers=None):
+    await send_text(send, dumps(body), 'application/json', status, headers)
+
+
+async def send_text(send, text, content_type, status=200, headers=None):
+    await send_bytes(send, text.encode('utf-8'), content_type, status, headers)
+
+
+async def respond(scope, send, text, status=200, headers=None):
+    """JSON text, compressed as the request's Accept-Encoding allows (see app.respond)"""
+    accept_encoding = dict(scope['headers']).get(b'accept-encoding', b'').decode('latin-1')
+    payload, encoding_headers = encode_body(text, accept_encoding)
+    await send_bytes(send, payload, 'application/json', status, {**(headers or {}), **encoding_headers})
+
+
+async def send_bytes(send, payload, content_type, status=200, headers=None):
+    extra = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(payload)).encode('ascii'))
+        ] + extra + CORS_HEADERS
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def query_value(scope, name):
+    """First value of a query parameter, or None"""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return query.get(name, [None])[0]
+
+
+def profile_requested(scope):
+    """The X-Profile header or ?profile= flag, checked by app.wants_profile"""
+    header = dict(scope['headers']).get(b'x-profile', b'').decode('latin-1')
+    return wants_profile(header, query_value(scope, 'profile'))
+
+
+async def profiled_check(claim):
+    """check_claim under a Profile. The event loop thread is sampled too, so
+    the samples include whatever other requests it ran meanwhile."""
+    profile = Profile()
+    with profile.running():
+        result = await get_checker().check_claim(claim)
+    return with_profile(result, profile)
+
+
+async def health_check(scope, receive, send):
+    """Health check endpoint"""
+    await send_json(send, {'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+
+
+async def verify_claim(scope, receive, send):
+    """Main endpoint to verify a claim (original format)"""
+    try:
+        claim, error = validate_claim(await read_json(receive))
+        if error:
+            return await send_json(send, *error)
+
+        fields, include_content = parse_projection(query_value(scope, 'fields'),
+                                                   query_value(scope, 'include_content'))
+        if profile_requested(scope):
+            return await respond(scope, send, verify_json(await profiled_check(claim), fields, include_content))
+
+        result = await get_checker().check_claim_cached(claim)
+
+        await respond(scope, send, verify_json(result, fields, include_content))
+
+    except Exception as e:
+        logger.exception("Error in /api/verify: %s", e)
+        await send_json(send, {'error': f'Internal server error: {str(e)}'}, 500)
+
+
+async def submit_claim(scope, receive, send):
+    """Verify a claim with the simplified /submit input/output format"""
+    try:
+        message, error = validate_message(await read_json(receive))
+        if error:
+            return await send_json(send, *error)
+
+        fields, _ = parse_projection(query_value(scope, 'fields'), None)
+        if profile_requested(scope):
+            result = await profiled_check(message)
+            return await respond(scope, send, submit_json(result, fields, profile=result['profile']))
+
+        result = await get_checker().check_claim_cached(message)
+
+        await respond(scope, send, submit_json(result, fields))
+
+    except Exception as e:
+        logger.exception("Error in /submit: %s", e)
+        await send_json(send, {'error': f'Internal server error: {str(e)}'}, 500)
+
+
+async def submit_claim_stream(scope, receive, send):
+    """Streaming /submit over Server-Sent Events (see app.submit_claim_stream)"""
+    if scope['method'] == 'GET':
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        data = {'message': query.get('message', [''])[0]}
+    else:
+        data = await read_json(receive)
+
+    message, error = validate_message(data)
+    if error:
+        return await send_json(send, *error)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no')
+        ] + CORS_HEADERS
+    })
+
+    async def emit(event, data):
+        await send({'type': 'http.response.body', 'body': sse_event(event, data).encode('utf-8'), 'more_body': True})
+
+    try:
+        async for event, payload in get_checker().check_claim_stream(message):
+            if event == 'source':
+                await emit('source', {
+                    'source': format_source(payload['source']),
+                    'stance': payload['stance'],
+                    **format_analysis(payload['analysis'])
+                })
+            elif event == 'result':
+                await emit('result', format_submit_result(payload))
+            else:
+                await emit(event, payload)
+    except Exception as e:
+        logger.exception("Error in /submit/stream: %s", e)
+        await emit('error', {'error': f'Internal server error: {str(e)}'})
+
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def submit_batch(scope, receive, send):
+    """Verify a batch of claims (see app.submit_batch)"""
+    batch, error = validate_batch(await read_json(receive))
+    if error:
+        return await send_json(send, *error)
+
+    messages, timeout = batch
+    report = BatchReport(messages)
+    engine = get_checker()
+    memo = FetchMemo(engine.submit_article, key=canonical_url)
+    results = engine.check_claims_iter(report.claims, timeout, memo)
+
+    accept = dict(scope['headers']).get(b'accept', b'').decode('latin-1')
+    if not wants_ndjson(accept):
+        async for indexes, result in results:
+            report.add(indexes, result)
+        return await respond(scope, send, dumps({'results': report.items, **report.summary(memo)}))
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson')] + CORS_HEADERS
+    })
+
+    async def emit(line):
+        await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+
+    for item in report.rejected():
+        await emit(report.progress_line(item))
+    async for indexes, result in results:
+        for item in report.add(indexes, result):
+            await emit(report.progress_line(item))
+    await emit(dumps({'summary': report.summary(memo)}) + '\n')
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def submit_job(scope, receive, send):
+    """Queue a claim for background verification (see app.submit_job)"""
+    job, error = validate_job(await read_json(receive))
+    if error:
+        return await send_json(send, *error)
+
+    await send_json(send, *(await get_checker().offload(enqueue_job, *job)))
+
+
+async def get_job(scope, receive, send):
+    """Status of a job; ?wait=N long-polls without holding a thread"""
+    job_id = scope['path'][len('/api/jobs/'):]
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    deadline = time.monotonic() + job_wait_seconds(query.get('wait', [''])[0])
+    runner = get_job_runner()
+    runner.ensure_started()
+
+    while True:
+        job = await get_checker().offload(runner.queue.get, job_id)
+        if job is None or job['status'] in (DONE, FAILED) or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(0.25, deadline - time.monotonic()))
+
+    if job is None:
+        return await send_json(send, {'error': 'Job not found'}, 404)
+    await respond(scope, send, dumps(job_payload(job)))
+
+
+async def get_profile(scope, receive, send):
+    """Stack samples of a profiled request (see app.get_profile)"""
+    dump = profile_dump(scope['path'][len('/api/profiles/'):])
+    if dump is None:
+        return await send_json(send, {'error': 'Profile not found'}, 404)
+    text, headers = dump
+    await send_text(send, text, 'text/plain; charset=utf-8', headers=headers)
+
+
+async def get_stats(scope, receive, send):
+    """Endpoint exposing cache, coalescing and connection pool counters"""
+    await send_json(send, stats_payload(get_checker()))
+
+
+async def get_metrics(scope, receive, send):
+    """Prometheus scrape endpoint (see app.get_metrics)"""
+    await send_text(send, render_metrics(metrics_families(get_checker())), METRICS_CONTENT_TYPE)
+
+
+async def get_sources(scope, receive, send):
+    """Endpoint listing sources with their live status"""
+    await send_json(send, sources_payload(get_checker()))
+
+
+ROUTES = {
+    '/api/health': (('GET',), health_check),
+    '/api/verify': (('POST',), verify_claim),
+    '/submit': (('POST',), submit_claim),
+    '/submit/stream': (('GET', 'POST'), submit_claim_stream),
+    '/submit/batch': (('POST',), submit_batch),
+    '/api/jobs': (('POST',), submit_job),
+    '/api/stats': (('GET',), get_stats),
+    '/api/sources': (('GET',), get_sources),
+    '/metrics': (('GET',), get_metrics)
+}
+
+
+# Routes ending in a path parameter, matched by prefix
+PREFIX_ROUTES = {
+    '/api/jobs/': (('GET',), get_job),
+    '/api/profiles/': (('GET',), get_profile)
+}
+
+
+def find_route(path):
+    route = ROUTES.get(path)
+    if route is None:
+        for prefix, prefix_route in PREFIX_ROUTES.items():
+            if path.startswith(prefix) and '/' not in path[len(prefix):] and len(path) > len(prefix):
+                return prefix_route
+    return route
+
+
+async def preflight(scope, send, methods):
+    """Answer a CORS preflight the way flask-cors does"""
+    requested = dict(scope['headers']).get(b'access-control-request-headers')
+    headers = CORS_HEADERS + [(b'access-control-allow-methods', ', '.join(methods + ('OPTIONS',)).encode('ascii'))]
+    if requested:
+        headers.append((b'access-control-allow-headers', requested))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_checker()
+            get_job_runner().ensure_started()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if checker is not None:
+                await checker.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    route = find_route(scope['path'])
+    if route is None:
+        return await send_json(send, {'error': 'Not found'}, 404)
+
+    methods, handler = route
+    if scope['method'] == 'OPTIONS':
+        return await preflight(scope, send, methods)
+    if scope['method'] not in methods:
+        return await send_json(send, {'error': 'Method not allowed'}, 405)
+
+    # Each request is its own task, so the id stays with this request
+    new_request_id()
+    await handler(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Fact Checker API (ASGI) Starting...")
+    uvicorn.run(application, host='0.0.0.0', port=5050)
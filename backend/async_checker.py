@@ -0,0 +1,723 @@
+"""
+Asyncio engine for the fact checker.
+
+AsyncFactChecker runs the same providers, politeness rules, caches and
+verdict logic as FactChecker, but each outbound request is awaited on one
+event loop through httpx instead of occupying a worker thread, so a single
+process keeps many more claims in flight. HTML parsing and scoring are
+CPU-bound and stay synchronous; they run on a small thread pool (or the
+core's parse process pool) so they never stall the loop.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+
+from app import NEWS_SITES
+from fetch_scheduler import FetchMemo
+from http_pool import (
+    COMPLETE, DEADLINE, ENOUGH, MAX_BYTES, NOT_HTML, RETRY_AFTER_MAX, RETRY_STATUSES, ConnectionCounters, is_html
+)
+from metrics import UPSTREAM_RESPONSES, StageClock, span, traced
+from providers import ERROR, TIMEOUT, outcome_of
+from singleflight import AsyncSingleFlight
+from streaming_extractor import ByteStreamExtractor
+from urls import canonical_url, host_of
+from verdict import VerdictTally
+
+logger = logging.getLogger(__name__)
+
+class AsyncPooledSession:
+    """httpx counterpart of PooledSession: keep-alive pool, retries, split timeouts.
+
+    Connection errors are retried by the transport; 429 and 5xx answers are
+    retried here with exponential backoff, honouring a numeric Retry-After
+    of up to max_retry_after seconds.
+    """
+
+    def __init__(self, headers=None, max_connections=100, max_keepalive=20,
+                 retries=2, backoff_factor=0.5, connect_timeout=3.05, read_timeout=10,
+                 max_retry_after=RETRY_AFTER_MAX):
+        self.headers = headers
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        self.counters = ConnectionCounters()
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use so it binds to the loop that serves requests
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=httpx.AsyncHTTPTransport(limits=self.limits, retries=self.retries)
+            )
+        return self._client
+
+    async def get(self, url, params=None, headers=None, upstream='other'):
+        async with self.stream(url, params=params, headers=headers, upstream=upstream) as response:
+            await response.aread()
+        return response
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url, params=None, headers=None, timeout=None, upstream='other'):
+        """GET with retries whose body has not been read yet (closed on exit).
+
+        The final status is counted under upstream, as PooledSession.get does.
+        """
+        host = host_of(url)
+        for attempt in range(self.retries + 1):
+            opened = []
+
+            async def trace(event, info):
+                if event == 'connection.connect_tcp.started':
+                    opened.append(True)
+
+            request = self.client.build_request('GET', url, params=params, headers=headers,
+                                                timeout=timeout or self.timeout,
+                                                extensions={'trace': trace})
+            try:
+                response = await self.client.send(request, stream=True)
+            except Exception:
+                UPSTREAM_RESPONSES.inc(upstream=upstream, status='error')
+                raise
+            self.counters.record(host, opened=False)
+            if opened:
+                self.counters.record(host, opened=True)
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                UPSTREAM_RESPONSES.inc(upstream=upstream, status=response.status_code)
+                try:
+                    yield response
+                finally:
+                    await response.aclose()
+                return
+            await response.aclose()
+            await asyncio.sleep(self._backoff(response, attempt))
+
+    def _backoff(self, response, attempt):
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(int(retry_after), self.max_retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        """Connection reuse counters, overall and per host"""
+        hosts = self.counters.snapshot()
+        totals = {'requests': 0, 'opened': 0, 'reused': 0}
+        for counts in hosts.values():
+            for key in totals:
+                totals[key] += counts[key]
+        return {'totals': totals, 'hosts': hosts}
+
+
+async def read_streamed(response, consume, max_bytes, deadline):
+    """Async http_pool.read_streamed: await consume(chunk) for each chunk of the body"""
+    received = 0
+
+    async def read():
+        nonlocal received
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:max_bytes - received]
+            received += len(chunk)
+            if await consume(chunk):
+                return ENOUGH
+            if received >= max_bytes:
+                return MAX_BYTES
+        return COMPLETE
+
+    # asyncio.wait_for rather than asyncio.timeout, which needs Python 3.11
+    try:
+        reason = await asyncio.wait_for(read(), max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        return received, DEADLINE
+    return received, reason
+
+
+class AsyncFactChecker:
+    """Async check_claim on top of a FactChecker.
+
+    core supplies the configuration (endpoints, deadlines, fan-out), the
+    verdict and article caches, the per-host rate limiter and every parsing
+    and scoring method; only the I/O is re-implemented here.
+    max_article_fetches bounds concurrent article downloads, as the fetch
+    pool's worker count does for the sync engine.
+    """
+
+    def __init__(self, core, max_connections=100, max_article_fetches=32, offload_workers=4):
+        self.core = core
+        self.verdict_cache = core.verdict_cache
+        self.article_cache = core.article_cache
+        self.limiter = core.fetch_scheduler.limiter
+        self.downloads = core.downloads
+        self.fingerprints = core.fingerprints
+        self.content_store = core.content_store
+        self.providers = core.providers
+        self.batch_wikipedia = core.batch_wikipedia
+        self.http = AsyncPooledSession(
+            headers=core.headers,
+            max_connections=max_connections,
+            connect_timeout=core.http.timeout[0],
+            read_timeout=core.http.timeout[1],
+            max_retry_after=core.http.max_retry_after
+        )
+        self.claim_flight = AsyncSingleFlight()
+        self.article_flight = AsyncSingleFlight()
+        self.offload_pool = ThreadPoolExecutor(max_workers=offload_workers, thread_name_prefix='offload')
+        self._article_slots = asyncio.Semaphore(max_article_fetches)
+        self._provider_slots = {}
+        self._refreshing = set()
+        self._background = set()
+
+    async def offload(self, fn, *args, **kwargs):
+        """Run a blocking call (parsing, scoring, SQLite) on the offload pool,
+        in a copy of the caller's context (so its log lines keep the request id)"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, traced(fn), *args, **kwargs)
+        return await loop.run_in_executor(self.offload_pool, call)
+
+    async def throttle(self, url):
+        """Wait for a politeness slot for url's host, shared with the sync engine"""
+        delay = self.limiter.reserve(host_of(url))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def submit_article(self, url):
+        """Start fetching an article as a task (the async fetch_scheduler.submit)"""
+        return asyncio.ensure_future(self.fetch_article_content(url))
+
+    async def fetch_article_content(self, url, max_chars=5000):
+        """Fetch and extract main content from an article URL"""
+        content, shared = await self.article_flight.do((url, max_chars), self._fetch_article_content, url, max_chars)
+        return content
+
+    async def _fetch_article_content(self, url, max_chars):
+        cache = self.article_cache
+        cached = None
+        try:
+            cached = await self.offload(cache.get, url) if cache else None
+            if cached and cache.is_fresh(cached):
+                return cached.content[:max_chars]
+
+            headers = cached.conditional_headers() if cached else None
+            # Waiting out the host's interval holds no slot, so other hosts' fetches proceed
+            await self.throttle(url)
+            async with self._article_slots:
+                with span('fetch'):
+                    if self.core.stream_articles:
+                        response, content, reason = await self.stream_article(url, headers, max_chars)
+                    else:
+                        response = await self.http.get(url, headers=headers, upstream='article')
+                        content = reason = None
+            if response.status_code == 304 and cached:
+                await self.offload(cache.revalidated, url)
+                return cached.content[:max_chars]
+            if response.status_code == 200:
+                if content is None:
+                    content = await self.parse_article(response.content, max_chars)
+                if cache and reason != DEADLINE:
+                    await self.offload(
+                        cache.put,
+                        url,
+                        content,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                return content
+        except Exception as e:
+            logger.warning("Article fetch failed url=%s error=%s", url, e)
+            return cached.content[:max_chars] if cached else ""
+
+        return ""
+
+    async def stream_article(self, url, headers=None, max_chars=5000):
+        """Download an article page within the byte budget and deadline (see FactChecker.stream_article)"""
+        core = self.core
+        deadline = time.monotonic() + core.article_deadline
+        timeout = httpx.Timeout(min(self.http.timeout.read, core.article_deadline),
+                                connect=self.http.timeout.connect)
+        streaming = core.parser_backend == 'streaming' and not core.parse_pool
+        async with self.http.stream(url, headers=headers, timeout=timeout, upstream='article') as response:
+            if response.status_code != 200:
+                return response, None, None
+            if not is_html(response.headers.get('Content-Type')):
+                self.downloads.record(NOT_HTML)
+                return response, "", NOT_HTML
+            if streaming:
+                # Chunks are parsed on the offload pool, off the event loop
+                extractor = ByteStreamExtractor(max_chars)
+                parsing = StageClock('parse')
+                consume = functools.partial(self.offload, parsing.call, extractor.feed)
+            else:
+                body = bytearray()
+
+                async def consume(chunk):
+                    body.extend(chunk)
+
+            received, reason = await read_streamed(response, consume, core.max_article_bytes, deadline)
+        self.downloads.record(reason, received)
+        if streaming:
+            text = await self.offload(parsing.call, extractor.close)
+            parsing.observe()
+            return response, text, reason
+        return response, await self.parse_article(bytes(body), max_chars), reason
+
+    async def parse_article(self, html, max_chars=5000):
+        """Extract article text on the core's parse process pool, or the offload pool"""
+        with span('parse'):
+            if self.core.parse_pool:
+                return await asyncio.wrap_future(self.core.parse_pool.submit(html, max_chars))
+            return await self.offload(self.core.extract_article_content, html, max_chars)
+
+    async def search_google_scholar(self, query, limit=5):
+        """Search Google Scholar for academic articles"""
+        results = []
+        try:
+            response = await self.http.get(self.core.scholar_url(query), upstream='scholar')
+
+            if response.status_code == 200:
+                results = await self.offload(self.core.parse_scholar_results, response.content, limit)
+        except Exception as e:
+            logger.warning("Google Scholar search error: %s", e)
+
+        return results
+
+    async def search_news_api(self, query, limit=8, fetch=None):
+        """Search for news articles across multiple news sites.
+
+        fetch(url) returns an awaitable article download (submit_article
+        unless a batch shares its downloads).
+        """
+        fetch = fetch or self.submit_article
+        results = []
+        pending = []
+
+        try:
+            for site_query, source_name in NEWS_SITES:
+                url = self.core.search_url(f"{query} {site_query}")
+                await self.throttle(url)
+                response = await self.http.get(url, upstream='duckduckgo')
+
+                if response.status_code == 200:
+                    hits = await self.offload(self.core.parse_search_hits, response.content, limit=2)
+                    for title, url_link, snippet in hits:
+                        logger.debug("Fetching content from %s", url_link)
+                        pending.append(fetch(url_link))
+
+                        results.append({
+                            'source': source_name,
+                            'title': title,
+                            'url': url_link,
+                            'snippet': snippet,
+                            'full_content': '',
+                            'reliability_score': 9
+                        })
+
+        except Exception as e:
+            logger.warning("News search error: %s", e)
+
+        for result, content in zip(results, await asyncio.gather(*pending)):
+            result['full_content'] = content
+
+        return results
+
+    async def search_duckduckgo(self, query, limit=5, fetch=None):
+        """Search using DuckDuckGo HTML scraping (fetch as for search_news_api)"""
+        fetch = fetch or self.submit_article
+        results = []
+        pending = []
+        try:
+            url = self.core.search_url(query)
+            await self.throttle(url)
+            response = await self.http.get(url, upstream='duckduckgo')
+
+            if response.status_code == 200:
+                hits = await self.offload(self.core.parse_search_hits, response.content, limit)
+                for title, url_link, snippet in hits:
+                    reliability = self.core.web_reliability(url_link)
+
+                    if reliability >= 8:
+                        logger.debug("Fetching content from %s", url_link)
+                        pending.append((len(results), fetch(url_link)))
+
+                    results.append({
+                        'source': 'Web Search',
+                        'title': title,
+                        'url': url_link,
+                        'snippet': snippet,
+                        'full_content': '',
+                        'reliability_score': reliability
+                    })
+        except Exception as e:
+            logger.warning("DuckDuckGo search error: %s", e)
+
+        for index, task in pending:
+            results[index]['full_content'] = await task
+
+        return results
+
+    async def search_wikipedia(self, query):
+        """Search Wikipedia API"""
+        results = []
+        try:
+            url = self.core.endpoints['wikipedia']
+            response = await self.http.get(url, params=self.core.wikipedia_search_params(query), upstream='wikipedia')
+            if response.status_code == 200:
+                searches = response.json().get('query', {}).get('search', [])
+
+                for item in searches:
+                    content_params = self.core.wikipedia_extract_params(item.get('title', ''))
+                    content_response = await self.http.get(url, params=content_params, upstream='wikipedia')
+                    full_content = ""
+
+                    if content_response.status_code == 200:
+                        full_content = self.core.parse_wikipedia_extract(content_response.json())
+
+                    results.append(self.core.wikipedia_result(item, full_content))
+
+                    await asyncio.sleep(0.3)
+
+        except Exception as e:
+            logger.warning("Wikipedia search error: %s", e)
+
+        return results
+
+    async def search_wikipedia_batched(self, query, limit=3):
+        """Search Wikipedia with intro extracts in one request (see FactChecker)"""
+        results = []
+        try:
+            url = self.core.endpoints['wikipedia']
+            response = await self.http.get(url, params=self.core.wikipedia_batch_params(query, limit), upstream='wikipedia')
+            if response.status_code == 200:
+                results = await self.offload(self.core.parse_wikipedia_batch, response.json())
+
+        except Exception as e:
+            logger.warning("Wikipedia search error: %s", e)
+
+        return results
+
+    async def run_provider(self, provider, claim, fetch=None, deadline=None):
+        """Async version of FactChecker.run_provider.
+
+        A search cancelled at its deadline is recorded as a timeout; one
+        cancelled because the caller went away is not recorded.
+        """
+        health = self.providers.health(provider.name)
+        slots = self._provider_slots.get(provider.name)
+        if slots is None:
+            slots = self._provider_slots[provider.name] = asyncio.Semaphore(provider.concurrency)
+
+        started = None
+        try:
+            async with slots:
+                started = time.monotonic()
+                if deadline is not None and started >= deadline:
+                    health.breaker.release()
+                    return []
+                results = await provider.search(self, claim, fetch)
+        except asyncio.CancelledError:
+            if started is not None and deadline is not None and time.monotonic() >= deadline:
+                health.record(time.monotonic() - started, TIMEOUT)
+            else:
+                health.breaker.release()
+            raise
+        except Exception as e:
+            health.record(time.monotonic() - started, ERROR, str(e))
+            raise
+
+        finished = time.monotonic()
+        health.record(finished - started, outcome_of(results, finished, deadline))
+        return await self.offload(self.core.source_records, results)
+
+    async def gather_sequential(self, claim, fetch=None):
+        """Query providers one after another (original behaviour)"""
+        all_results = []
+        skipped = []
+        providers = self.core.allowed_providers(skipped)
+
+        for index, provider in enumerate(providers):
+            logger.debug(provider.message)
+            try:
+                all_results.extend(await self.run_provider(provider, claim, fetch))
+            except Exception as e:
+                logger.warning("Provider %s error: %s", provider.name, e)
+            if index < len(providers) - 1:
+                await asyncio.sleep(0.5)
+
+        return await self.offload(self.core.unique_sources, all_results), [], skipped
+
+    async def iter_provider_results(self, claim, timed_out, fetch=None, skipped=None):
+        """Async version of FactChecker.iter_provider_results.
+
+        Providers past their deadline are cancelled outright, which also
+        stops their in-flight requests.
+        """
+        core = self.core
+        started = time.monotonic()
+
+        pending = {}
+        for provider in core.allowed_providers(skipped if skipped is not None else []):
+            logger.debug(provider.message)
+            deadline = started + core.provider_deadline(provider)
+            pending[asyncio.ensure_future(self.run_provider(provider, claim, fetch, deadline))] = (
+                provider.name, deadline
+            )
+
+        try:
+            while pending:
+                next_deadline = min(deadline for name, deadline in pending.values())
+                done, not_done = await asyncio.wait(pending, timeout=max(0, next_deadline - time.monotonic()),
+                                                    return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    name, deadline = pending.pop(task)
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        logger.warning("Provider %s error: %s", name, e)
+                        results = []
+                    yield name, results
+
+                now = time.monotonic()
+                for task in not_done:
+                    name, deadline = pending[task]
+                    if deadline <= now:
+                        del pending[task]
+                        task.cancel()
+                        timed_out.append(name)
+                        logger.warning("Provider %s timed out after %.1fs", name, deadline - started)
+        finally:
+            # The consumer stopped early (e.g. a stream client went away)
+            for task in pending:
+                task.cancel()
+
+    async def gather_concurrent(self, claim, fetch=None):
+        """Query all providers concurrently, keeping results in provider order"""
+        timed_out = []
+        skipped = []
+        results_by_provider = {}
+        async for name, results in self.iter_provider_results(claim, timed_out, fetch, skipped):
+            results_by_provider[name] = results
+
+        return await self.offload(self.core.in_provider_order, results_by_provider), timed_out, skipped
+
+    def claim_fetch(self):
+        """(memo, fetch) downloading each article of one claim once, whichever
+        forms of its URL the providers found.
+
+        The downloads are shielded, so a provider cancelled at its deadline
+        does not cancel one another provider waits on; memo.cancel() drops
+        what is left once the check is over.
+        """
+        memo = FetchMemo(self.submit_article, key=canonical_url)
+
+        def fetch(url):
+            return asyncio.shield(memo.submit(url))
+
+        return memo, fetch
+
+    async def check_claim(self, claim, fetch=None):
+        """Main method to check a claim"""
+        logger.debug("Checking claim: %s", claim)
+
+        memo = None
+        if fetch is None:
+            memo, fetch = self.claim_fetch()
+
+        try:
+            with span('check'):
+                if self.core.fanout:
+                    all_results, timed_out, skipped = await self.gather_concurrent(claim, fetch)
+                else:
+                    all_results, timed_out, skipped = await self.gather_sequential(claim, fetch)
+                analysis = await self.offload(self.core.analyze_results, claim, all_results)
+        finally:
+            if memo:
+                memo.cancel()
+        logger.info("Checked claim=%r sources=%d verdict=%s timed_out=%s skipped=%s", claim, len(all_results),
+                    analysis['verdict'], timed_out, skipped)
+
+        return {
+            'claim': claim,
+            'analysis': analysis,
+            'sources': all_results,
+            'timestamp': datetime.now().isoformat(),
+            'source_count': len(all_results),
+            'timed_out_providers': timed_out,
+            'skipped_providers': skipped
+        }
+
+    async def check_claim_stream(self, claim):
+        """Async version of FactChecker.check_claim_stream (same events)"""
+        core = self.core
+        key = core.normalize_claim(claim)
+        cached, state = self.verdict_cache.get(key)
+        if state != 'miss':
+            if state == 'stale':
+                self._schedule_refresh(key, claim)
+            yield 'result', dict(cached, claim=claim, cache=state)
+            return
+
+        logger.debug("Streaming claim: %s", claim)
+
+        claim_keywords = core.extract_claim_keywords(claim)
+        tally = VerdictTally()
+        timed_out = []
+        skipped = []
+        all_results = []
+        dedupe = core.source_deduper()
+        reported = 0
+        memo, fetch = self.claim_fetch()
+
+        try:
+            async for name, results in self.iter_provider_results(claim, timed_out, fetch, skipped):
+                for result in results:
+                    if await self.offload(dedupe.is_repeat, result):
+                        continue
+                    all_results.append(result)
+                    stance = await self.offload(core.score_source, result, claim_keywords, tally)
+                    yield 'source', {
+                        'provider': name,
+                        'source': result,
+                        'stance': stance,
+                        'analysis': tally.result()
+                    }
+                for provider in timed_out[reported:]:
+                    yield 'timeout', {'provider': provider}
+                reported = len(timed_out)
+        finally:
+            # Also on an error or a client that disconnected mid-stream
+            memo.cancel()
+
+        for provider in timed_out[reported:]:
+            yield 'timeout', {'provider': provider}
+
+        result = {
+            'claim': claim,
+            'analysis': await self.offload(core.analyze_results, claim, all_results),
+            'sources': all_results,
+            'timestamp': datetime.now().isoformat(),
+            'source_count': len(all_results),
+            'timed_out_providers': timed_out,
+            'skipped_providers': skipped
+        }
+        self.verdict_cache.set(key, result)
+        yield 'result', dict(result, cache='miss')
+
+    async def check_claim_cached(self, claim, fetch=None):
+        """check_claim behind the verdict cache shared with the sync engine"""
+        key = self.core.normalize_claim(claim)
+        cached, state = self.verdict_cache.get(key)
+
+        if state == 'miss':
+            result, shared = await self.claim_flight.do(key, self._check_and_cache, key, claim, fetch)
+            return dict(result, claim=claim, cache='miss')
+
+        if state == 'stale':
+            self._schedule_refresh(key, claim)
+
+        return dict(cached, claim=claim, cache=state)
+
+    async def _check_and_cache(self, key, claim, fetch=None):
+        result = await self.check_claim(claim, fetch)
+        self.verdict_cache.set(key, result)
+        return result
+
+    def _schedule_refresh(self, key, claim):
+        """Recompute a stale entry in a background task, once per key"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self.claim_flight.do(key, self._check_and_cache, key, claim)
+            except Exception as e:
+                logger.warning("Cache refresh error for %r: %s", claim, e)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        # Keep a reference so the task is not garbage-collected mid-run
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def check_claims_iter(self, claims, timeout=None, memo=None):
+        """Async version of FactChecker.check_claims_iter (same dedupe, results
+        and timeout behaviour).
+
+        At most core.batch_concurrency claims are checked at once.
+        """
+        memo = memo or FetchMemo(self.submit_article, key=canonical_url)
+        slots = asyncio.Semaphore(self.core.batch_concurrency)
+        running = set()
+
+        def fetch(url):
+            # A provider past its deadline must not cancel a download that
+            # other claims in the batch are waiting for
+            return asyncio.shield(memo.submit(url))
+
+        async def check(claim):
+            async with slots:
+                running.add(asyncio.current_task())
+                return await self.check_claim_cached(claim, fetch)
+
+        def abandon(task):
+            # Drop a check still waiting for a slot; let a running one finish
+            # in the background and fill the verdict cache for a retry
+            if task not in running:
+                task.cancel()
+                return
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+        indexes_by_key = {}
+        for index, claim in enumerate(claims):
+            indexes_by_key.setdefault(self.core.normalize_claim(claim), []).append(index)
+        pending = {asyncio.ensure_future(check(claims[indexes[0]])): indexes for indexes in indexes_by_key.values()}
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        try:
+            while pending:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                done, not_done = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    indexes = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning("Batch check error for %r: %s", claims[indexes[0]], e)
+                        result = {'claim': claims[indexes[0]], 'error': f'Internal server error: {str(e)}'}
+                    yield indexes, result
+
+            while pending:
+                task, indexes = pending.popitem()
+                abandon(task)
+                yield indexes, {'claim': claims[indexes[0]], 'error': f'Timed out after {timeout}s'}
+        finally:
+            for task in pending:
+                abandon(task)
@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the Fact Checker backend.
+Run from the backend directory, e.g. python -m bench.bench_fanout
+"""
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Wall-clock benchmark: sequential providers vs concurrent fan-out.
+
+Runs FactChecker.check_claim against local stub upstreams and prints the
+p50/p99 latency of each mode.
+
+    python -m bench.bench_fanout --runs 10 --latency 0.05 --tail-ratio 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import time
+
+from app import FactChecker
+from bench.stub_upstreams import StubUpstreams
+
+CLAIMS = [
+    "The Earth is flat",
+    "The Eiffel Tower was completed in 1889",
+    "Water boils at 100 degrees Celsius at sea level"
+]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run_mode(checker, runs):
+    """Time check_claim over `runs` claims, returning latencies and timeout count"""
+    latencies = []
+    timeouts = 0
+    for index in range(runs):
+        claim = CLAIMS[index % len(CLAIMS)]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = checker.check_claim(claim)
+        latencies.append(time.perf_counter() - started)
+        timeouts += len(result['timed_out_providers'])
+    return latencies, timeouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='search upstream latency (s)')
+    parser.add_argument('--article-latency', type=float, default=0.15, help='article page latency (s)')
+    parser.add_argument('--tail-ratio', type=float, default=0.05, help='share of requests slowed down')
+    parser.add_argument('--tail-factor', type=float, default=10)
+    parser.add_argument('--provider-timeout', type=float, default=8)
+    parser.add_argument('--budget', type=float, default=10)
+    args = parser.parse_args()
+
+    with StubUpstreams(args.latency, args.article_latency, args.tail_ratio, args.tail_factor) as stub:
+        modes = [
+            ('sequential', FactChecker(fanout=False, endpoints=stub.endpoints())),
+            ('fan-out', FactChecker(fanout=True, endpoints=stub.endpoints(),
+                                    provider_timeout=args.provider_timeout,
+                                    request_budget=args.budget))
+        ]
+        # Every stub page is served from one loopback host; space them like
+        # distinct news hosts would be rather than one request a second
+        modes[1][1].fetch_scheduler.limiter.host_intervals[stub.host] = 0.1
+
+        print(f"{'mode':<12} {'runs':>5} {'p50 (s)':>9} {'p99 (s)':>9} {'timeouts':>9}")
+        for name, checker in modes:
+            latencies, timeouts = run_mode(checker, args.runs)
+            print(f"{name:<12} {len(latencies):>5} {percentile(latencies, 50):>9.2f} "
+                  f"{percentile(latencies, 99):>9.2f} {timeouts:>9}")
+
+
+if __name__ == '__main__':
+    main()
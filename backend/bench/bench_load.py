@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent claims one process sustains, Flask/threads vs ASGI/asyncio.
+
+Serves the same API twice against local stub upstreams, from the threaded
+Flask server (app.py) and from uvicorn (asgi.py), each in its own process
+with the default pool sizes. Each server is then hit with increasing
+numbers of concurrent POST /submit calls. Every claim is
+distinct, so the verdict cache never answers. A level passes when every
+response is a 200 with no provider timeouts and p99 stays within --slo.
+
+    python -m bench.bench_load --levels 1,8,32,64,128 --slo 5
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import logging
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from werkzeug.serving import make_server
+
+import app as flask_app
+import asgi
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from bench.bench_fanout import percentile
+from bench.stub_upstreams import StubUpstreams, origin_url
+
+CLAIMS = [
+    "The Earth is flat",
+    "The Eiffel Tower was completed in 1889",
+    "Water boils at 100 degrees Celsius at sea level"
+]
+
+
+def stub_checker(endpoints, stub_host, args):
+    checker = FactChecker(endpoints=endpoints, provider_timeout=args.provider_timeout,
+                          request_budget=args.budget)
+    # Every stub page is served from one loopback host; space them like
+    # distinct news hosts would be rather than one request a second
+    checker.fetch_scheduler.limiter.host_intervals[stub_host] = 0
+    # Web results are trusted by the host of the article they stand for
+    web_reliability = checker.web_reliability
+    checker.web_reliability = lambda url: web_reliability(origin_url(url))
+    return checker
+
+
+def serve_stub(args, ready):
+    stub = StubUpstreams(args.latency, args.article_latency, args.tail_ratio).start()
+    ready.put((stub.endpoints(), stub.host))
+    threading.Event().wait()
+
+
+def serve_flask(endpoints, stub_host, args, ready):
+    sys.stdout = io.StringIO()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    flask_app.fact_checker = stub_checker(endpoints, stub_host, args)
+    server = make_server('127.0.0.1', 0, flask_app.app, threaded=True)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def serve_asgi(endpoints, stub_host, args, ready):
+    sys.stdout = io.StringIO()
+    logging.getLogger().setLevel(logging.WARNING)
+    asgi.checker = AsyncFactChecker(stub_checker(endpoints, stub_host, args))
+    with socket.socket() as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    ready.put(port)
+    uvicorn.run(asgi.application, host='127.0.0.1', port=port, log_level='warning', backlog=2048)
+
+
+def start_process(context, target, *args):
+    """Run target in its own process and return (process, what it put on its queue)"""
+    ready = context.Queue()
+    process = context.Process(target=target, args=args + (ready,), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def wait_healthy(base_url):
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/api/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+def thread_count(pid):
+    """Threads of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('Threads:'):
+                    return line.split()[1]
+    except OSError:
+        pass
+    return '-'
+
+
+async def run_level(base_url, concurrency, per_worker, counter, timeout):
+    """Keep `concurrency` claims in flight; returns latencies, failures and wall time"""
+    latencies = []
+    failures = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal failures
+            for _ in range(per_worker):
+                index = next(counter)
+                claim = f"{CLAIMS[index % len(CLAIMS)]} {index}"
+                started = time.perf_counter()
+                try:
+                    response = await client.post('/submit', json={'message': claim})
+                    ok = response.status_code == 200 and not response.json()['timed_out']
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                failures += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, failures, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', default='1,8,32,64,128', help='comma-separated concurrency levels')
+    parser.add_argument('--per-worker', type=int, default=2, help='claims each concurrent client sends')
+    parser.add_argument('--slo', type=float, default=5.0, help='p99 latency a level must stay within (s)')
+    parser.add_argument('--latency', type=float, default=0.05, help='search upstream latency (s)')
+    parser.add_argument('--article-latency', type=float, default=0.15, help='article page latency (s)')
+    parser.add_argument('--tail-ratio', type=float, default=0.0, help='share of requests slowed down')
+    parser.add_argument('--provider-timeout', type=float, default=15)
+    parser.add_argument('--budget', type=float, default=25)
+    parser.add_argument('--timeout', type=float, default=60, help='client timeout per claim (s)')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+
+    # The stub upstreams and each server run in their own processes, so the
+    # server under test has a core to itself and the load generator's CPU
+    # does not count against it
+    context = multiprocessing.get_context('spawn')
+    stub_process, (endpoints, stub_host) = start_process(context, serve_stub, args)
+    capacity = {}
+
+    print(f"{'server':<8} {'conc':>5} {'claims/s':>9} {'p50 (s)':>9} {'p99 (s)':>9} "
+          f"{'failed':>7} {'threads':>8}")
+    for name, target in (('flask', serve_flask), ('asgi', serve_asgi)):
+        process, port = start_process(context, target, endpoints, stub_host, args)
+        base_url = f"http://127.0.0.1:{port}"
+        wait_healthy(base_url)
+        capacity[name] = 0
+        counter = itertools.count()
+        for concurrency in levels:
+            latencies, failures, wall = asyncio.run(
+                run_level(base_url, concurrency, args.per_worker, counter, args.timeout)
+            )
+            p99 = percentile(latencies, 99)
+            print(f"{name:<8} {concurrency:>5} {len(latencies) / wall:>9.1f} "
+                  f"{percentile(latencies, 50):>9.2f} {p99:>9.2f} {failures:>7} "
+                  f"{thread_count(process.pid):>8}")
+            if failures or p99 > args.slo:
+                break
+            capacity[name] = concurrency
+        process.terminate()
+    stub_process.terminate()
+
+    print(f"\nHighest level within the {args.slo:.0f}s p99 SLO with no failures: "
+          f"flask {capacity['flask']}, asgi {capacity['asgi']}")
+
+
+if __name__ == '__main__':
+    main()
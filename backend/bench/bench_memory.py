@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: what a burst of concurrent claims costs and what their
+results keep once answered.
+
+Checks --claims distinct claims from --concurrency threads against the
+recorded upstreams in fixtures/upstreams/ (see bench_suite), with the
+verdict cache keeping every result as it would in a server. Python
+allocations are traced over the burst: "peak" is the high-water mark while
+the claims ran, "retained" what is still allocated afterwards, both net of
+the state from one warm-up claim. RSS is the process's resident size
+before and after.
+
+    python -m bench.bench_memory --claims 100 --concurrency 100
+"""
+
+import argparse
+import gc
+import logging
+import os
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.bench_load import CLAIMS, stub_checker
+from bench.fixture_upstreams import UPSTREAMS_DIR, FixtureUpstreams
+
+
+def rss_mb():
+    """Resident set size of this process in MB, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{os.getpid()}/status") as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--claims', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=100, help='claims kept in flight')
+    parser.add_argument('--latency', type=float, default=0.05, help='search upstream latency (s)')
+    parser.add_argument('--article-latency', type=float, default=0.15, help='article page latency (s)')
+    parser.add_argument('--provider-timeout', type=float, default=60)
+    parser.add_argument('--budget', type=float, default=90)
+    parser.add_argument('--fixtures', default=UPSTREAMS_DIR, help='recorded upstreams (index.json directory)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    upstreams = FixtureUpstreams(args.latency, args.article_latency, 0, directory=args.fixtures).start()
+    try:
+        checker = stub_checker(upstreams.endpoints(), upstreams.host, args)
+        checker.check_claim_cached(f"{CLAIMS[0]} warm-up")
+
+        def check(index):
+            return checker.check_claim_cached(f"{CLAIMS[index % len(CLAIMS)]} {index}")
+
+        gc.collect()
+        rss_before = rss_mb()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(check, range(args.claims)))
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = rss_mb()
+    finally:
+        upstreams.stop()
+
+    sources = sum(len(result['sources']) for result in results)
+    print(f"{'claims':>6} {'sources':>8} {'peak (MB)':>10} {'retained (MB)':>14} {'RSS before':>11} {'RSS after':>10}")
+    print(f"{len(results):>6} {sources:>8} {(peak - baseline) / 1e6:>10.2f} {(current - baseline) / 1e6:>14.2f} "
+          f"{rss_before if rss_before is not None else '-':>11} {rss_after if rss_after is not None else '-':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Article extraction throughput per parser backend, on the saved pages in
+fixtures/pages/ (regenerate them with python -m bench.page_fixtures).
+
+For every installed backend it prints:
+
+- pages/s and MB/s on one core;
+- how many pages come out exactly as with 'html.parser';
+- pages/s when the corpus is spread over --workers threads and over a
+  ParsePool of --workers processes. Threads share the GIL, processes do not.
+
+    python -m bench.bench_parse --rounds 5 --workers 4
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from parsing import ParsePool, available_backends, extract_article_text
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'pages')
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'rb') as handle:
+            pages[os.path.basename(path)] = handle.read()
+    return pages
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5, help='passes over the corpus per measurement')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    pages = load_pages()
+    if not pages:
+        raise SystemExit(f"No pages in {PAGES_DIR}; run python -m bench.page_fixtures first")
+    corpus = list(pages.values()) * args.rounds
+    megabytes = sum(len(page) for page in corpus) / 1e6
+    reference = {name: extract_article_text(html) for name, html in pages.items()}
+
+    print(f"{len(pages)} pages, {sum(map(len, pages.values())) / 1e6:.2f} MB, "
+          f"{args.rounds} rounds, {args.workers} workers, {os.cpu_count()} cores\n")
+    print(f"{'backend':<12} {'pages/s':>8} {'MB/s':>7} {'exact':>6} {'threads':>8} {'processes':>10}")
+
+    for backend in available_backends()[::-1]:
+        exact = sum(extract_article_text(html, backend=backend) == reference[name] for name, html in pages.items())
+
+        single = timed(lambda: [extract_article_text(html, backend=backend) for html in corpus])
+
+        with ThreadPoolExecutor(args.workers) as threads:
+            threaded = timed(lambda: list(threads.map(lambda html: extract_article_text(html, backend=backend), corpus)))
+
+        pool = ParsePool(args.workers, backend)
+        # Start every worker process before timing
+        [future.result() for future in [pool.submit(b'<p>warm up</p>') for _ in range(args.workers * 4)]]
+        processes = timed(lambda: [future.result() for future in [pool.submit(html) for html in corpus]])
+        pool.shutdown()
+
+        print(f"{backend:<12} {len(corpus) / single:>8.1f} {megabytes / single:>7.2f} "
+              f"{exact:>3}/{len(pages):<2} {len(corpus) / threaded:>8.1f} {len(corpus) / processes:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyword x sentence substring scan vs the SentenceIndex stage.
+
+    python -m bench.bench_relevance --chars 5000 --keywords 5 15 30
+"""
+
+import argparse
+import random
+import re
+import time
+
+from bench.stub_upstreams import ARTICLE_PARAGRAPHS
+from relevance import SentenceIndex
+
+SYLLABLES = ['ka', 'lo', 'mer', 'ti', 'san', 'dra', 'vel', 'on', 'is', 'ar', 'ben', 'cor', 'ul', 'fen', 'gri']
+
+
+def build_vocabulary(size, rng):
+    """Pseudo-words for filler text, so the document has a realistic vocabulary size"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def legacy_relevant_sentences(claim_keywords, content):
+    """The original find_claim_context_sentences loop"""
+    sentences = re.split(r'[.!?]+', content.lower())
+    relevant_sentences = []
+    for sentence in sentences:
+        keyword_count = sum(1 for keyword in claim_keywords if keyword in sentence)
+        if keyword_count >= min(2, len(claim_keywords)):
+            relevant_sentences.append(sentence.strip())
+    return relevant_sentences
+
+
+def build_document(chars, vocabulary, rng):
+    """News-like text: the stub paragraphs mixed with Zipf-distributed filler sentences"""
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    parts = []
+    length = 0
+    while length < chars:
+        if rng.random() < 0.2:
+            part = rng.choice(ARTICLE_PARAGRAPHS)
+        else:
+            words = rng.choices(vocabulary, weights, k=rng.randint(8, 25))
+            part = ' '.join(words).capitalize() + '.'
+        parts.append(part)
+        length += len(part) + 1
+    return ' '.join(parts)[:chars]
+
+
+def build_keywords(count, vocabulary, rng):
+    """A long claim's keywords: a few article words, the rest drawn from the vocabulary"""
+    article_words = sorted({w for p in ARTICLE_PARAGRAPHS for w in re.findall(r'\w+', p.lower()) if len(w) > 3})
+    keywords = rng.sample(article_words, 3)
+    keywords += [rng.choice(vocabulary) for _ in range(count - len(keywords))]
+    return keywords
+
+
+def time_per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, default=5000)
+    parser.add_argument('--keywords', type=int, nargs='+', default=[5, 15, 30])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = build_vocabulary(2000, rng)
+    document = build_document(args.chars, vocabulary, rng)
+    print(f"{'keywords':>8} {'nested (us)':>12} {'index (us)':>11} {'whole-word (us)':>16} {'speedup':>8}")
+    for count in args.keywords:
+        keywords = build_keywords(count, vocabulary, rng)
+        expected = legacy_relevant_sentences(keywords, document)
+        assert SentenceIndex(document).relevant_sentences(keywords) == expected
+
+        legacy = time_per_call(lambda: legacy_relevant_sentences(keywords, document), args.repeat)
+        indexed = time_per_call(lambda: SentenceIndex(document).relevant_sentences(keywords), args.repeat)
+        whole = time_per_call(lambda: SentenceIndex(document).relevant_sentences(keywords, whole_words=True), args.repeat)
+        print(f"{count:>8} {legacy * 1e6:>12.1f} {indexed * 1e6:>11.1f} {whole * 1e6:>16.1f} {legacy / indexed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
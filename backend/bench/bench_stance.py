@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-pattern re.findall loops vs the single-pass matcher.
+
+    python -m bench.bench_stance --sizes 5000 50000 500000
+"""
+
+import argparse
+import random
+import time
+
+from bench.stub_upstreams import ARTICLE_PARAGRAPHS
+from stance import STANCE_MATCHER, count_with_findall
+
+
+def build_text(size, rng):
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = rng.choice(ARTICLE_PARAGRAPHS)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 1
+    return ' '.join(paragraphs)[:size]
+
+
+def time_per_call(fn, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000, 500000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'chars':>8} {'findall (ms)':>13} {'single-pass (ms)':>17} {'speedup':>8}")
+    for size in args.sizes:
+        text = build_text(size, rng)
+        assert STANCE_MATCHER.count(text) == count_with_findall(text)
+        repeat = max(1, args.repeat * 5000 // size)
+        legacy = time_per_call(count_with_findall, text, repeat)
+        single = time_per_call(STANCE_MATCHER.count, text, repeat)
+        print(f"{size:>8} {legacy * 1000:>13.2f} {single * 1000:>17.2f} {legacy / single:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: throughput, latency percentiles and peak memory of
+claim checks against recorded upstream responses.
+
+The Wikipedia, DuckDuckGo, Google Scholar and article responses recorded in
+fixtures/upstreams/ are replayed by FixtureUpstreams with the latency given
+on the command line, so a run needs no network and repeated runs do the
+same work. Each target runs in its own process with a fixed number of
+claims in flight:
+
+    check_claim   FactChecker.check_claim called from --concurrency threads
+    flask         POST /submit against app.py's threaded server
+    asgi          POST /submit against asgi.py under uvicorn
+
+Every claim is a numbered variant of a recorded one, so the verdict cache
+never answers. Peak RSS is the high-water mark of the process under test.
+--save writes the results as JSON; --baseline compares a run with them:
+
+    python -m bench.bench_suite --save baseline.json
+    python -m bench.bench_suite --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.bench_fanout import percentile
+from bench.bench_load import CLAIMS, run_level, serve_asgi, serve_flask, start_process, stub_checker, wait_healthy
+from bench.fixture_upstreams import UPSTREAMS_DIR, FixtureUpstreams
+
+TARGETS = ('check_claim', 'flask', 'asgi')
+
+# Reported per target, with whether a larger value is better
+METRICS = [('claims_per_s', True), ('p50', False), ('p90', False), ('p99', False), ('peak_rss_mb', False)]
+
+
+def peak_rss_mb(pid):
+    """Peak resident set size of a process in MB, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def serve_fixtures(args, ready):
+    upstreams = FixtureUpstreams(args.latency, args.article_latency, args.tail_ratio,
+                                 directory=args.fixtures).start()
+    ready.put((upstreams.endpoints(), upstreams.host))
+    threading.Event().wait()
+
+
+def run_checker(endpoints, stub_host, args, ready):
+    """check_claim from `concurrency` threads, in this process; puts the measurements"""
+    logging.getLogger().setLevel(logging.WARNING)
+    checker = stub_checker(endpoints, stub_host, args)
+    counter = itertools.count()
+
+    def worker(count):
+        latencies, failures = [], 0
+        for _ in range(count):
+            index = next(counter)
+            started = time.perf_counter()
+            try:
+                ok = not checker.check_claim(f"{CLAIMS[index % len(CLAIMS)]} {index}")['timed_out_providers']
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+        return latencies, failures
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, [1] * args.concurrency))
+        started = time.perf_counter()
+        measured = list(pool.map(worker, [args.per_worker] * args.concurrency))
+        wall = time.perf_counter() - started
+    ready.put(([latency for latencies, _ in measured for latency in latencies],
+               sum(failures for _, failures in measured), wall, peak_rss_mb(os.getpid())))
+
+
+def run_target(context, target, endpoints, stub_host, args):
+    """(latencies, failures, wall time, peak RSS) of one target"""
+    if target == 'check_claim':
+        # The measurements only come back once the whole run is over
+        ready = context.Queue()
+        process = context.Process(target=run_checker, args=(endpoints, stub_host, args, ready), daemon=True)
+        process.start()
+        measured = ready.get(timeout=args.timeout * (args.per_worker + 1) + 30)
+        process.join()
+        return measured
+
+    serve = serve_flask if target == 'flask' else serve_asgi
+    process, port = start_process(context, serve, endpoints, stub_host, args)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_healthy(base_url)
+        counter = itertools.count()
+        # One claim per client first, so connection pools are warm
+        asyncio.run(run_level(base_url, args.concurrency, 1, counter, args.timeout))
+        latencies, failures, wall = asyncio.run(
+            run_level(base_url, args.concurrency, args.per_worker, counter, args.timeout)
+        )
+        return latencies, failures, wall, peak_rss_mb(process.pid)
+    finally:
+        process.terminate()
+
+
+def summarize(latencies, failures, wall, peak_rss):
+    return {
+        'claims': len(latencies),
+        'failures': failures,
+        'seconds': round(wall, 3),
+        'claims_per_s': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50': round(percentile(latencies, 50), 3),
+        'p90': round(percentile(latencies, 90), 3),
+        'p99': round(percentile(latencies, 99), 3),
+        'peak_rss_mb': peak_rss
+    }
+
+
+def compare(results, baseline):
+    """Lines giving each metric's change against a saved run"""
+    lines = []
+    for target, result in results.items():
+        before = baseline['results'].get(target)
+        if not before:
+            continue
+        changes = []
+        for metric, higher_is_better in METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            changes.append(f"{metric} {old:g} -> {new:g} ({change:+.1f}%{', better' if better and change else ''})")
+        lines.append(f"{target:<12} " + '; '.join(changes))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', default='check_claim,flask', help=f"comma-separated, of {', '.join(TARGETS)}")
+    parser.add_argument('--concurrency', type=int, default=8, help='claims kept in flight')
+    parser.add_argument('--per-worker', type=int, default=6, help='claims each concurrent client sends')
+    parser.add_argument('--latency', type=float, default=0.05, help='search upstream latency (s)')
+    parser.add_argument('--article-latency', type=float, default=0.15, help='article page latency (s)')
+    parser.add_argument('--tail-ratio', type=float, default=0.0, help='share of requests slowed down')
+    parser.add_argument('--provider-timeout', type=float, default=15)
+    parser.add_argument('--budget', type=float, default=25)
+    parser.add_argument('--timeout', type=float, default=60, help='client timeout per claim (s)')
+    parser.add_argument('--fixtures', default=UPSTREAMS_DIR, help='recorded upstreams (index.json directory)')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with results saved by an earlier --save')
+    args = parser.parse_args()
+    targets = args.targets.split(',')
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # The fixture server runs in its own process, so its CPU and memory do
+    # not count against the target
+    context = multiprocessing.get_context('spawn')
+    fixture_process, (endpoints, stub_host) = start_process(context, serve_fixtures, args)
+
+    results = {}
+    print(f"{'target':<12} {'claims':>6} {'claims/s':>9} {'p50 (s)':>8} {'p90 (s)':>8} {'p99 (s)':>8} "
+          f"{'failed':>7} {'peak RSS (MB)':>14}")
+    try:
+        for target in targets:
+            result = results[target] = summarize(*run_target(context, target, endpoints, stub_host, args))
+            print(f"{target:<12} {result['claims']:>6} {result['claims_per_s']:>9.1f} {result['p50']:>8.2f} "
+                  f"{result['p90']:>8.2f} {result['p99']:>8.2f} {result['failures']:>7} "
+                  f"{result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-':>14}")
+    finally:
+        fixture_process.terminate()
+
+    settings = {name: getattr(args, name) for name in (
+        'concurrency', 'per_worker', 'latency', 'article_latency', 'tail_ratio', 'provider_timeout', 'budget'
+    )}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"\nAgainst {args.baseline}:")
+        if baseline.get('settings') != settings:
+            print("  (settings differ from the baseline run; numbers may not be comparable)")
+        for line in compare(results, baseline):
+            print(line)
+    if args.save:
+        with open(args.save, 'w') as save_file:
+            json.dump({
+                'settings': settings,
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'results': results
+            }, save_file, indent=2)
+            save_file.write('\n')
+
+
+if __name__ == '__main__':
+    main()
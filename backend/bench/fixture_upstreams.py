@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Replays recorded Wikipedia, DuckDuckGo, Google Scholar and article responses,
+so benchmarks see real upstream markup without touching the live internet.
+
+fixtures/upstreams/index.json maps the queries each search upstream was
+recorded for, and the article URLs, to response bodies saved next to it
+(the shipped article pages are written by bench.page_fixtures). A query that
+was not recorded is answered with the recording sharing the most words with
+it, so "The Earth is flat 17 site:bbc.com" replays the recording of
+"The Earth is flat site:bbc.com". Links in the recorded result pages are
+rewritten to /article/<host>/<path> on this server, which replays the
+recorded page for that URL.
+
+Latency and tail stalls are injected as in StubUpstreams. New recordings
+are made with bench.record_upstreams.
+
+    python -m bench.fixture_upstreams --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from urllib.parse import quote, unquote, urlparse
+
+from bench.stub_upstreams import StubUpstreams
+
+UPSTREAMS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'upstreams')
+
+SEARCH_UPSTREAMS = ('wikipedia', 'duckduckgo', 'scholar')
+
+# DuckDuckGo wraps result links as //duckduckgo.com/l/?uddg=<quoted url>
+REDIRECT_TARGET = re.compile(r'(uddg=)([^&"]+)')
+LINK = re.compile(r'(href=")(https?://[^"]+)')
+
+
+def query_key(query):
+    return ' '.join(query.casefold().split())
+
+
+def article_key(url):
+    """host/path of an article URL, as served under /article/"""
+    parsed = urlparse(url)
+    return parsed.netloc + (parsed.path or '/')
+
+
+class Recordings:
+    """Recorded response bodies by upstream and query, from an index.json"""
+
+    def __init__(self, directory=UPSTREAMS_DIR):
+        with open(os.path.join(directory, 'index.json'), encoding='utf-8') as index_file:
+            index = json.load(index_file)
+
+        def read(path):
+            with open(os.path.join(directory, path), encoding='utf-8') as body:
+                return body.read()
+
+        self.queries = {
+            upstream: {query_key(query): read(path) for query, path in index.get(upstream, {}).items()}
+            for upstream in SEARCH_UPSTREAMS
+        }
+        self.queries['wikipedia'] = {key: json.loads(body) for key, body in self.queries['wikipedia'].items()}
+        self.articles = {article_key(url): read(path) for url, path in index.get('article', {}).items()}
+
+        # Pages by title, for prop=extracts requests that name titles
+        self.pages = {}
+        for data in self.queries['wikipedia'].values():
+            for page in data.get('query', {}).get('pages', {}).values():
+                self.pages[page.get('title', '')] = page
+
+    def search(self, upstream, query):
+        """The recording for query, or the closest one; None when nothing was recorded"""
+        recorded = self.queries[upstream]
+        key = query_key(query)
+        if key in recorded or not recorded:
+            return recorded.get(key)
+        words = set(key.split())
+
+        def overlap(candidate):
+            candidate_words = set(candidate.split())
+            return len(words & candidate_words), -len(words ^ candidate_words)
+
+        return recorded[max(sorted(recorded), key=overlap)]
+
+    def article(self, key):
+        """The recorded page for host/path; unrecorded URLs get a page picked by hash"""
+        if key in self.articles:
+            return self.articles[key]
+        keys = sorted(self.articles)
+        return self.articles[keys[zlib.crc32(key.encode('utf-8')) % len(keys)]] if keys else ''
+
+    def localize(self, base_url):
+        """Point every link in the recorded result pages at base_url/article/"""
+        def local(url):
+            return f"{base_url}/article/{article_key(url)}"
+
+        def redirect(match):
+            return match.group(1) + quote(local(unquote(match.group(2))), safe='')
+
+        def link(match):
+            return match.group(1) + local(match.group(2))
+
+        for upstream in ('duckduckgo', 'scholar'):
+            for key, body in self.queries[upstream].items():
+                self.queries[upstream][key] = LINK.sub(link, REDIRECT_TARGET.sub(redirect, body))
+
+
+class FixtureUpstreams(StubUpstreams):
+    """StubUpstreams answering from recorded responses"""
+
+    def __init__(self, latency=0.05, article_latency=0.15, tail_ratio=0.0, tail_factor=10, host='127.0.0.1',
+                 directory=UPSTREAMS_DIR):
+        super().__init__(latency, article_latency, tail_ratio, tail_factor, host)
+        self.recordings = Recordings(directory)
+
+    def start(self):
+        super().start()
+        self.recordings.localize(self.base_url)
+        return self
+
+    def wikipedia(self, params):
+        query = params.get('srsearch') or params.get('gsrsearch')
+        if query:
+            return self.recordings.search('wikipedia', query) or {'batchcomplete': '', 'query': {}}
+        titles = params.get('titles', '').split('|')
+        pages = {str(page['pageid']): page for page in map(self.recordings.pages.get, titles) if page}
+        return {'batchcomplete': '', 'query': {'pages': pages}}
+
+    def duckduckgo(self, query):
+        return self.recordings.search('duckduckgo', query) or '<html><body></body></html>'
+
+    def scholar(self, query):
+        if self.scholar_captcha:
+            return super().scholar(query)
+        return self.recordings.search('scholar', query) or '<html><body></body></html>'
+
+    def article(self, path):
+        return self.recordings.article(path[len('/article/'):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.05, help='search upstream latency (s)')
+    parser.add_argument('--article-latency', type=float, default=0.15, help='article page latency (s)')
+    parser.add_argument('--tail-ratio', type=float, default=0.0, help='share of requests slowed down')
+    parser.add_argument('--fixtures', default=UPSTREAMS_DIR, help='directory holding index.json')
+    args = parser.parse_args()
+
+    upstreams = FixtureUpstreams(args.latency, args.article_latency, args.tail_ratio,
+                                 directory=args.fixtures).start()
+    print("Replaying recorded upstreams; point FactChecker(endpoints=...) at:")
+    print(json.dumps(upstreams.endpoints(), indent=2))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        upstreams.stop()
+
+
+if __name__ == '__main__':
+    main()
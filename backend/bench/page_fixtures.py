@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Writes the saved article pages in fixtures/pages/, and the article pages
+FixtureUpstreams replays in fixtures/upstreams/articles/.
+
+The pages copy the markup of the sites FactChecker reads (Reuters, AP, BBC,
+NPR, a WordPress blog, a .gov page and so on): long inline scripts and
+styles, navigation, promo cards, asides inside the story, captions,
+entities, and a few of the malformed constructs real pages contain. The
+text is generated, so the fixtures can be shipped with the repo.
+
+Each article URL in fixtures/upstreams/index.json gets a page of its own:
+the layout of its site, filled from sentences on its claim's topic and a
+few written for that URL alone, so no two URLs replay the same text.
+
+    python -m bench.page_fixtures
+"""
+
+import json
+import os
+import random
+
+from bench.fixture_upstreams import UPSTREAMS_DIR
+from bench.record_upstreams import slug
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'pages')
+
+SENTENCES = [
+    "Scientists have confirmed that the Earth is an oblate spheroid, slightly flattened at the poles.",
+    "The claim that the Earth is flat has been debunked repeatedly by satellite imagery and circumnavigation.",
+    "Researchers said the data indicates the shape of the planet was established by navigators centuries ago.",
+    "Officials did not immediately respond to a request for comment on Tuesday.",
+    "“We’ve seen nothing that would support that claim,” a spokesperson told reporters.",
+    "The tower, completed in 1889, was initially criticised by some of France’s leading artists.",
+    "According to the agency, water boils at 100 degrees Celsius at sea level under standard pressure.",
+    "Experts say the study, published in the journal Nature, has not been independently replicated.",
+    "It is unclear whether the new measurements will change the official estimate.",
+    "The report found no evidence that the vaccine causes the condition, contrary to posts shared online.",
+    "Critics argue the figures are misleading because they exclude data from 2019 & 2020.",
+    "The findings are consistent with earlier surveys conducted by the same team.",
+    "Some believe the moon landing was staged, however the overwhelming evidence does not support that claim.",
+    "Photographs taken from orbit show the curvature of the horizon clearly.",
+    "The ministry said in a statement that the numbers would be revised next month.",
+    "Analysts at the bank expect growth of 2.5% this year, down from a forecast of 3%.",
+]
+
+# Filler that fits any story
+GENERIC = [SENTENCES[index] for index in (3, 4, 7, 8, 11, 14)]
+
+TOPICS = {
+    'earth': [
+        "Scientists have confirmed that the Earth is an oblate spheroid, slightly flattened at the poles.",
+        "The claim that the Earth is flat has been debunked repeatedly by satellite imagery and circumnavigation.",
+        "Photographs taken from orbit show the curvature of the horizon clearly.",
+        "Ships disappear hull first over the horizon, which a flat surface cannot explain.",
+        "Eratosthenes estimated the circumference of the Earth around 240 BC using shadows in two cities.",
+        "During a lunar eclipse the Earth casts a round shadow on the moon, whatever its orientation.",
+        "There is no evidence for the flat Earth model; the posts rely on misleading photographs.",
+        "Pilots on long-haul routes plan great-circle paths that only make sense on a globe.",
+    ],
+    'eiffel': [
+        "The tower, completed in 1889, was initially criticised by some of France’s leading artists.",
+        "Gustave Eiffel’s company designed and built the tower for the 1889 World’s Fair in Paris.",
+        "Construction took two years, two months and five days, finishing in March 1889.",
+        "At 330 metres including antennas, it was the tallest man-made structure until 1930.",
+        "The wrought-iron lattice is held together by roughly 2.5 million rivets.",
+        "The tower was meant to stand for 20 years but was kept as a radio transmission site.",
+        "Nearly seven million people visit the tower each year, most of them from abroad.",
+        "Records confirm the tower opened to the public on May 15, 1889, according to the city.",
+    ],
+    'boiling': [
+        "According to the agency, water boils at 100 degrees Celsius at sea level under standard pressure.",
+        "The boiling point falls by about one degree for every 300 metres of altitude.",
+        "On the summit of Everest water boils at roughly 70 degrees Celsius.",
+        "Pressure cookers raise the boiling point to around 120 degrees, cooking food faster.",
+        "Dissolved salt raises the boiling point only slightly, by well under one degree in a kitchen pot.",
+        "Anders Celsius defined his scale in 1742 using the freezing and boiling points of water.",
+        "The claim that boiling water removes all contaminants is misleading, experts said.",
+        "Scientists confirmed the figure holds only at an atmospheric pressure of 101.325 kilopascals.",
+    ],
+}
+
+# Article URLs FixtureUpstreams replays: site layout, topic, and sentences
+# only that URL's page contains
+ARTICLES = {
+    'https://apnews.com/article/eiffel-tower-anniversary-paris-1889-3c9d1e': ('apnews', 'eiffel', [
+        "Paris marked the anniversary with a light show that ran past midnight.",
+        "Descendants of the original riveters were invited to the first platform.",
+    ]),
+    'https://apnews.com/article/eiffel-tower-strike-closed-7e21aa': ('apnews', 'eiffel', [
+        "Staff walked out over the management of the monument, closing it for a fourth day.",
+        "Tourists with prepaid tickets were told they would be refunded.",
+    ]),
+    'https://apnews.com/article/fact-check-boiling-water-microplastics-91fe02': ('apnews', 'boiling', [
+        "A viral video claimed boiling tap water strips out every microplastic particle.",
+        "The study behind it found boiling removed a large share of particles in hard water, not all of them.",
+    ]),
+    'https://apnews.com/article/fact-check-flat-earth-horizon-8a1f2c': ('apnews', 'earth', [
+        "The clip shared online used a wide-angle lens that bends the horizon either way.",
+        "A camera held level at altitude shows a slight but consistent curve.",
+    ]),
+    'https://apnews.com/article/science-boiling-water-altitude-2b8c41': ('apnews', 'boiling', [
+        "Bakers in Denver adjust recipes because water boils near 95 degrees there.",
+        "Packaged foods often print separate high-altitude instructions.",
+    ]),
+    'https://apnews.com/article/science-earth-shape-navigation-5d77b0': ('apnews', 'earth', [
+        "Polynesian navigators read swells and stars to cross thousands of kilometres of ocean.",
+        "Modern GPS satellites assume an ellipsoid Earth to place a receiver within metres.",
+    ]),
+    'https://en.wikipedia.org/wiki/Boiling_point': ('nested_ignored', 'boiling', [
+        "The normal boiling point is the temperature at which vapour pressure equals one atmosphere.",
+        "Liquids with stronger intermolecular forces have higher boiling points.",
+    ]),
+    'https://en.wikipedia.org/wiki/Eiffel_Tower': ('teaser_first', 'eiffel', [
+        "The tower has three levels for visitors, with restaurants on the first and second.",
+        "It is repainted every seven years, using about 60 tonnes of paint.",
+    ]),
+    'https://en.wikipedia.org/wiki/Flat_Earth': ('no_container', 'earth', [
+        "Flat Earth is an archaic and scientifically disproven conception of the Earth's shape.",
+        "Greek philosophers had established a spherical Earth by the 3rd century BC.",
+    ]),
+    'https://www.bbc.com/culture/article/20190329-eiffel-tower-history': ('bbc', 'eiffel', [
+        "A petition signed by 300 artists called the design a useless and monstrous tower.",
+        "Guy de Maupassant reportedly lunched in its restaurant because it was the one place he could not see it.",
+    ]),
+    'https://www.bbc.com/future/article/20190109-the-flat-earth-theory': ('bbc', 'earth', [
+        "Psychologists say distrust of institutions, not evidence, drives most flat-Earth belief.",
+        "Online video recommendations helped the idea spread after 2015.",
+    ]),
+    'https://www.bbc.com/future/article/20230317-boiling-point-of-water': ('bbc', 'boiling', [
+        "Superheated water in a smooth microwaved cup can pass 100 degrees without bubbling.",
+        "A spoon or a scratch in the cup gives bubbles somewhere to form.",
+    ]),
+    'https://www.bbc.com/news/science-environment-47251302': ('bbc', 'earth', [
+        "The probe's camera captured the whole planet in a single frame from a million kilometres away.",
+        "Mission scientists released the images without colour correction.",
+    ]),
+    'https://www.bbc.com/news/science-environment-boiling-everest': ('bbc', 'boiling', [
+        "Climbers at base camp melt snow for hours because tea never gets properly hot.",
+        "Expedition cooks rely on pressure cookers for rice and lentils.",
+    ]),
+    'https://www.bbc.com/news/world-europe-47764233': ('bbc', 'eiffel', [
+        "Bulletproof glass walls now surround the base of the monument.",
+        "City officials said the barrier replaced temporary fencing installed in 2016.",
+    ]),
+    'https://www.britannica.com/story/is-the-earth-flat': ('wordpress', 'earth', [
+        "Aristotle pointed out that travellers going south see new constellations rise.",
+        "The idea that medieval scholars believed in a flat Earth is itself a 19th-century myth.",
+    ]),
+    'https://www.britannica.com/topic/Eiffel-Tower-Paris-France': ('short_story', 'eiffel', [
+        "The design is credited to engineers Maurice Koechlin and Émile Nouguier.",
+        "Its lift system was upgraded for the 1900 Exposition.",
+    ]),
+    'https://www.nasa.gov/image-article/earth-from-space/': ('gov', 'earth', [
+        "Astronauts aboard the station photograph the Earth's limb at sunrise.",
+        "The thin blue band at the edge is the atmosphere seen edge-on.",
+    ]),
+    'https://www.npr.org/2019/03/31/eiffel-tower-130': ('npr', 'eiffel', [
+        "For its 130th birthday the tower hosted a laser show retracing its history.",
+        "Historians note it was almost dismantled in 1909.",
+    ]),
+    'https://www.npr.org/2019/11/18/flat-earth-documentary': ('npr', 'earth', [
+        "The documentary follows believers who design their own experiments, and the results surprise them.",
+        "One test with a laser and a gyroscope ended up matching the Earth's rotation.",
+    ]),
+    'https://www.npr.org/2021/02/15/celsius-scale-history': ('npr', 'boiling', [
+        "Celsius originally set 100 as the freezing point and zero as boiling.",
+        "The scale was flipped after his death, possibly by Carl Linnaeus.",
+    ]),
+    'https://www.npr.org/sections/13.7/2018/02/15/flat-earth-science': ('npr', 'earth', [
+        "A physicist argues that asking people to test the claim themselves works better than ridicule.",
+        "Watching a ship through binoculars at the beach is enough to see the curve.",
+    ]),
+    'https://www.npr.org/sections/parallels/2014/eiffel-tower-glass-floor': ('npr', 'eiffel', [
+        "A new glass floor on the first level lets visitors look 57 metres straight down.",
+        "The renovation also added wind turbines and solar panels.",
+    ]),
+    'https://www.npr.org/sections/thesalt/2016/boiling-point-altitude': ('npr', 'boiling', [
+        "Pasta takes noticeably longer in mountain towns because the water is cooler.",
+        "Candy makers lower their target temperatures by a degree per thousand feet.",
+    ]),
+    'https://www.reuters.com/article/factcheck-boiling-point-altitude-idUSL2N2T0': ('reuters', 'boiling', [
+        "Posts claiming water boils at the same temperature everywhere are false.",
+        "Reuters measured 93 degrees at a mountain pass with a calibrated thermometer.",
+    ]),
+    'https://www.reuters.com/article/factcheck-flat-earth-idUSL1N2M01': ('reuters', 'earth', [
+        "Satellite images shared as proof of a flat Earth were cropped from a weather map.",
+        "The original frames show the full disc of the planet.",
+    ]),
+    'https://www.reuters.com/lifestyle/eiffel-tower-135th-anniversary-2024-03-31/': ('reuters', 'eiffel', [
+        "For the 135th anniversary the operator unveiled the Olympic rings on the tower.",
+        "Ticket prices rose by a fifth ahead of the Games.",
+    ]),
+    'https://www.reuters.com/science/flat-earth-conference-2023-11-02/': ('reuters', 'earth', [
+        "Attendance at the annual conference has fallen since its peak in 2018.",
+        "Organisers blamed video platforms for demoting their content.",
+    ]),
+    'https://www.reuters.com/science/kettle-energy-boiling-2023-01-10/': ('reuters', 'boiling', [
+        "Boiling only the water needed could save households a measurable share of kettle energy.",
+        "Energy regulators suggested descaling kettles regularly.",
+    ]),
+    'https://www.reuters.com/world/europe/eiffel-tower-repainting-2022-06-15/': ('reuters', 'eiffel', [
+        "The current repaint strips lead-based coats applied over the past century.",
+        "Workers restore the original yellow-brown shade chosen in 1907.",
+    ]),
+    'https://www.usgs.gov/special-topics/water-science-school/science/boiling-point-water': ('gov', 'boiling', [
+        "The survey's water science school explains boiling with a simple atmospheric pressure chart.",
+        "Lake water boils at lower temperatures in the Rocky Mountains than on the coast.",
+    ]),
+}
+
+NAV_SECTIONS = ['World', 'US', 'Politics', 'Business', 'Science', 'Health', 'Climate', 'Tech',
+                'Sports', 'Entertainment', 'Lifestyle', 'Opinion', 'Video', 'Podcasts', 'Fact Check']
+
+
+class PageRandom(random.Random):
+    """Seeded choices for one page, whose text is drawn from pool"""
+
+    def __init__(self, seed, pool=SENTENCES):
+        super().__init__(seed)
+        self.pool = pool
+
+
+def sentences(rng, count):
+    return ' '.join(rng.choice(rng.pool) for _ in range(count))
+
+
+def script_blob(rng, kilobytes):
+    """Minified-looking inline JavaScript of roughly the given size"""
+    parts = []
+    size = 0
+    while size < kilobytes * 1024:
+        name = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(1, 3)))
+        part = (f"function {name}(e,t){{var n=e&&e.{name}||{{}};if(t<{rng.randint(0, 999)})"
+                f"{{return n['<p>'+t+'</p>']}}for(var r=0;r<n.length;r++){{n[r]=t*{rng.random():.6f}}}return n}}")
+        parts.append(part)
+        size += len(part)
+    return ';'.join(parts)
+
+
+def style_blob(rng, kilobytes):
+    parts = []
+    size = 0
+    while size < kilobytes * 1024:
+        cls = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz-') for _ in range(rng.randint(4, 14)))
+        part = f".{cls}{{margin:{rng.randint(0, 32)}px;color:#{rng.randint(0, 0xffffff):06x};font-size:{rng.randint(10, 30)}px}}"
+        parts.append(part)
+        size += len(part)
+    return ''.join(parts)
+
+
+def head(rng, title, script_kb=40, style_kb=12, charset='utf-8'):
+    ld_json = json.dumps({'@context': 'https://schema.org', '@type': 'NewsArticle', 'headline': title,
+                          'description': sentences(rng, 2)})
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="{charset}">'
+        f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>{title}</title><meta property="og:title" content="{title}">'
+        f'<style>{style_blob(rng, style_kb)}</style>'
+        f'<script type="application/ld+json">{ld_json}</script>'
+        f'<script>{script_blob(rng, script_kb // 2)}</script>'
+        f'<script async src="https://cdn.example.com/ads.js"></script>'
+        f'<script>{script_blob(rng, script_kb - script_kb // 2)}</script></head>'
+    )
+
+
+def site_header(rng, name):
+    links = ''.join(f'<li><a href="/{section.lower()}">{section}</a></li>' for section in NAV_SECTIONS)
+    return (
+        f'<header class="site-header"><a class="logo" href="/">{name}</a>'
+        f'<nav aria-label="Main"><ul>{links}</ul><p>Menu</p></nav>'
+        f'<div class="alert-banner"><p>Breaking: {sentences(rng, 1)}</p></div></header>'
+    )
+
+
+def site_footer(rng, name):
+    links = ''.join(f'<a href="/{section.lower()}">{section}</a> ' for section in NAV_SECTIONS)
+    return (
+        f'<footer><nav>{links}</nav><p>&copy; 2024 {name}. All rights reserved.</p>'
+        f'<p>{sentences(rng, 2)}</p></footer>'
+        f'<script>{script_blob(rng, 8)}</script></body></html>'
+    )
+
+
+def paragraphs(rng, count, tag='p', attrs=''):
+    return ''.join(f'<{tag}{attrs}>{sentences(rng, rng.randint(1, 4))}</{tag}>' for _ in range(count))
+
+
+def promo_cards(rng, count):
+    return ''.join(
+        f'<article class="promo-card"><a href="/story/{index}"><h3>{sentences(rng, 1)[:60]}</h3></a>'
+        f'<p>{sentences(rng, 1)[:80]}</p></article>'
+        for index in range(count)
+    )
+
+
+def reuters(rng):
+    body = ''.join(
+        f'<div data-testid="paragraph-{index}" class="article-body__paragraph">{sentences(rng, rng.randint(1, 3))}</div>'
+        if index % 4 == 3 else
+        f'<p data-testid="paragraph-{index}" class="text__text">{sentences(rng, rng.randint(1, 3))}</p>'
+        for index in range(24)
+    )
+    return (
+        head(rng, 'Fact check: Earth shape claims', script_kb=90, style_kb=30) + '<body>'
+        + site_header(rng, 'Reuters')
+        + '<main id="main-content" role="main"><div class="article-header">'
+        '<h1>Fact Check: Viral post misrepresents satellite imagery</h1>'
+        '<p class="byline">By Staff Reporter</p></div>'
+        f'<div class="article-body__content">{body}</div>'
+        '<div class="trust-principles"><p>Our Standards: The Thomson Reuters Trust Principles.</p></div>'
+        '</main>' + site_footer(rng, 'Reuters')
+    )
+
+
+def apnews(rng):
+    return (
+        head(rng, 'AP News story', script_kb=70, style_kb=20) + '<body>'
+        + site_header(rng, 'AP News')
+        + '<div class="Page-content"><div class="Page-lead"><h1 class="Page-headline">Officials respond</h1></div>'
+        '<main class="Page-main"><div class="RichTextStoryBody RichTextBody">'
+        + paragraphs(rng, 18)
+        + '<div class="Enhancement"><figure><img src="a.jpg"><figcaption><p>A caption.</p></figcaption></figure></div>'
+        + paragraphs(rng, 6)
+        + '</div></main><aside class="Page-aside"><p>Most read</p>' + paragraphs(rng, 5) + '</aside></div>'
+        + site_footer(rng, 'AP News')
+    )
+
+
+def bbc(rng):
+    blocks = ''.join(
+        f'<div data-component="text-block"><p>{sentences(rng, rng.randint(1, 3))}</p></div>'
+        for _ in range(20)
+    )
+    return (
+        head(rng, 'BBC News', script_kb=110, style_kb=25) + '<body>'
+        + site_header(rng, 'BBC')
+        + '<div id="main-wrapper"><article><header><h1>Scientists respond to claims</h1>'
+        '<p>Published 3 hours ago</p></header>'
+        + blocks
+        + '<aside><p>Related topics</p></aside>'
+        + '<div data-component="links-block"><ul><li><a href="/x">More on this story</a></li></ul></div>'
+        + '</article></div>' + site_footer(rng, 'BBC')
+    )
+
+
+def npr(rng):
+    story = ''.join(
+        (f'<div class="bucketwrap image"><div class="credit-caption"><p>{sentences(rng, 1)}</p></div></div>'
+         if index % 5 == 2 else '')
+        + f'<p>{sentences(rng, rng.randint(1, 4))}</p>'
+        for index in range(16)
+    )
+    return (
+        head(rng, 'NPR', script_kb=60, style_kb=18) + '<body>'
+        + site_header(rng, 'NPR')
+        + '<section id="main-section"><article class="story"><div class="storytitle"><h1>What the data says</h1></div>'
+        + f'<div id="storytext" class="storytext">{story}'
+        + '<aside class="ad-wrap"><p>Sponsor Message</p></aside></div></article></section>'
+        + site_footer(rng, 'NPR')
+    )
+
+
+def wordpress(rng):
+    comments = ''.join(
+        f'<li class="comment"><div class="comment-content"><p>{sentences(rng, 1)}</p></div></li>'
+        for _ in range(30)
+    )
+    return (
+        head(rng, 'Blog post', script_kb=30, style_kb=40) + '<body class="single-post">'
+        + site_header(rng, 'A Science Blog')
+        + '<div id="page" class="site"><div id="content"><div class="post type-post">'
+        '<h1 class="entry-title">Is the Earth flat? A look at the evidence</h1>'
+        + f'<div class="entry-content">{paragraphs(rng, 14)}'
+        '<p><img src="chart.png" alt=""></p><p>&nbsp;</p></div>'
+        + f'<ol class="comment-list">{comments}</ol></div></div></div>'
+        + site_footer(rng, 'A Science Blog')
+    )
+
+
+def gov(rng):
+    return (
+        head(rng, 'Agency page', script_kb=25, style_kb=35) + '<body>'
+        + '<div class="usa-banner"><p>An official website of the United States government</p></div>'
+        + site_header(rng, 'Agency')
+        + '<main id="main" class="usa-layout-docs"><div class="syndicate">'
+        '<h1>Key facts</h1>' + paragraphs(rng, 10)
+        + '<ul><li>' + '</li><li>'.join(sentences(rng, 1) for _ in range(8)) + '</li></ul>'
+        + paragraphs(rng, 6)
+        + '</div><div class="last-reviewed"><p>Last Reviewed: March 1, 2024</p></div></main>'
+        + site_footer(rng, 'Agency')
+    )
+
+
+def teaser_first(rng):
+    # A short promo <article> precedes the story, so 'article' matches with
+    # under 200 characters and a later selector has to win
+    return (
+        head(rng, 'Teaser first', script_kb=40) + '<body>'
+        + site_header(rng, 'Daily News')
+        + '<div class="top-stories">' + promo_cards(rng, 1) + '</div>'
+        + '<div class="story-body"><h1>Headline</h1>' + paragraphs(rng, 12) + '</div>'
+        + '<div class="more-stories">' + promo_cards(rng, 6) + '</div>'
+        + site_footer(rng, 'Daily News')
+    )
+
+
+def no_container(rng):
+    return (
+        head(rng, 'Legacy layout', script_kb=20) + '<body>'
+        + site_header(rng, 'Old Site')
+        + '<table width="100%"><tr><td class="content">' + paragraphs(rng, 12) + '</td>'
+        + '<td class="sidebar"><p>Archive</p><p>Links</p></td></tr></table>'
+        + site_footer(rng, 'Old Site')
+    )
+
+
+def short_story(rng):
+    # Every container holds less than 200 characters: the fallback reads all <p>
+    return (
+        head(rng, 'Brief', script_kb=20) + '<body>'
+        + site_header(rng, 'Wire')
+        + '<article><p>Developing story.</p></article>'
+        + '<main><p>More details to follow.</p></main>'
+        + '<div class="related">' + paragraphs(rng, 6) + '</div>'
+        + site_footer(rng, 'Wire')
+    )
+
+
+def messy(rng):
+    # Markup real pages contain: unclosed <p>, block elements inside <p>, stray
+    # end tags, comments, entities, <br>, noscript and template contents
+    return (
+        head(rng, 'Messy &amp; old', script_kb=30) + '<body>'
+        + site_header(rng, 'Local Paper')
+        + '<div class="article-content">'
+        + f'<p>{sentences(rng, 2)}<br>{sentences(rng, 1)}'
+        + f'<p>{sentences(rng, 2)} <!-- ad slot --> <b>Update:</b> {sentences(rng, 1)}</p>'
+        + f'<p>Caf&eacute; owners said &ldquo;no&rdquo; &amp; left &#8212; {sentences(rng, 1)}</p>'
+        + f'<p>{sentences(rng, 1)}<div class="inline-ad">Advertisement</div>{sentences(rng, 1)}</p>'
+        + f'</p><p>{sentences(rng, 2)}</p></span>'
+        + f'<noscript><p>Please enable JavaScript.</p></noscript>'
+        + f'<template><p>{sentences(rng, 1)}</p></template>'
+        + f'<p>  {sentences(rng, 2)}  </p><p></p>'
+        + f'<div><p>{sentences(rng, 3)}</div><p>{sentences(rng, 2)}'
+        + '</div>' + site_footer(rng, 'Local Paper')
+    )
+
+
+def nested_ignored(rng):
+    # Headers, footers and asides inside the article hold <p>s that must be skipped
+    return (
+        head(rng, 'Nested', script_kb=35) + '<body>'
+        + '<div role="main"><article><header><p>Analysis | 6 min read</p></header>'
+        + paragraphs(rng, 10)
+        + '<aside class="pull-quote"><p>"A quote pulled from the story"</p></aside>'
+        + paragraphs(rng, 5)
+        + '<footer><p>This story has been updated.</p></footer></article>'
+        + '<section class="comments"><style>.c{}</style>' + paragraphs(rng, 4) + '</section></div>'
+        + site_footer(rng, 'Magazine')
+    )
+
+
+def big_page(rng):
+    # A multi-hundred-kilobyte live blog: the text needed is in the first screen
+    posts = ''.join(
+        f'<div class="live-post"><h2>{sentences(rng, 1)[:50]}</h2>{paragraphs(rng, 3)}'
+        f'<script>{script_blob(rng, 1)}</script></div>'
+        for _ in range(200)
+    )
+    return (
+        head(rng, 'Live updates', script_kb=120, style_kb=40) + '<body>'
+        + site_header(rng, 'Live')
+        + f'<main><div class="entry-content">{posts}</div></main>'
+        + site_footer(rng, 'Live')
+    )
+
+
+def windows_1252(rng):
+    page = (
+        head(rng, 'Legacy encoding', script_kb=10, charset='windows-1252') + '<body>'
+        + '<div class="article-body">' + paragraphs(rng, 10) + '</div>'
+        + site_footer(rng, 'Legacy')
+    )
+    return page.encode('windows-1252')
+
+
+PAGES = {
+    'reuters': reuters,
+    'apnews': apnews,
+    'bbc': bbc,
+    'npr': npr,
+    'wordpress': wordpress,
+    'gov': gov,
+    'teaser_first': teaser_first,
+    'no_container': no_container,
+    'short_story': short_story,
+    'messy': messy,
+    'nested_ignored': nested_ignored,
+    'big_page': big_page,
+    'windows_1252': windows_1252,
+}
+
+
+def article_page(url):
+    """The page FixtureUpstreams replays for one of ARTICLES"""
+    layout, topic, own = ARTICLES[url]
+    # Its own sentences weigh most, so they appear in every page
+    return PAGES[layout](PageRandom(url, own * 4 + TOPICS[topic] + GENERIC))
+
+
+def write_articles(directory=UPSTREAMS_DIR):
+    """Write a page per article URL and point index.json at them"""
+    index_path = os.path.join(directory, 'index.json')
+    with open(index_path, encoding='utf-8') as index_file:
+        index = json.load(index_file)
+    os.makedirs(os.path.join(directory, 'articles'), exist_ok=True)
+
+    index['article'] = {}
+    for url in ARTICLES:
+        path = f"articles/{slug(url)}.html"
+        with open(os.path.join(directory, path), 'w', encoding='utf-8') as handle:
+            handle.write(article_page(url))
+        index['article'][url] = path
+
+    with open(index_path, 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, indent=2, sort_keys=True)
+        index_file.write('\n')
+    print(f"{len(ARTICLES)} article pages in {os.path.join(directory, 'articles')}")
+
+
+def main():
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    for name, build in PAGES.items():
+        page = build(PageRandom(name))
+        if isinstance(page, str):
+            page = page.encode('utf-8')
+        with open(os.path.join(PAGES_DIR, f'{name}.html'), 'wb') as handle:
+            handle.write(page)
+        print(f"{name:<16} {len(page) / 1024:>8.1f} KB")
+    write_articles()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Records what Wikipedia, DuckDuckGo, Google Scholar and the article pages
+answer for a set of claims, into fixtures/upstreams/ for FixtureUpstreams.
+
+Runs FactChecker.check_claim for each claim against the live services and
+saves every 200 response it gets, keyed the way FixtureUpstreams looks
+them up: Wikipedia by search query, DuckDuckGo and Scholar by q, article
+pages by URL. Recordings already in the index are kept unless the same
+query is recorded again. Needs network access.
+
+    python -m bench.record_upstreams "The Earth is flat" "Water boils at 100 degrees Celsius at sea level"
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+from app import FactChecker
+from bench.fixture_upstreams import SEARCH_UPSTREAMS, UPSTREAMS_DIR
+
+
+def slug(text):
+    """File name for a recording: readable, with a checksum against collisions"""
+    words = re.sub(r'[^a-z0-9]+', '-', text.casefold()).strip('-')[:60]
+    return f"{words}-{zlib.crc32(text.encode('utf-8')):08x}"
+
+
+class Recorder:
+    """Saves the responses FactChecker.http.get returns, and the index to find them"""
+
+    def __init__(self, directory=UPSTREAMS_DIR):
+        self.directory = directory
+        self.index = {upstream: {} for upstream in SEARCH_UPSTREAMS + ('article',)}
+        path = os.path.join(directory, 'index.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as index_file:
+                for upstream, recordings in json.load(index_file).items():
+                    self.index.setdefault(upstream, {}).update(recordings)
+        self._lock = threading.Lock()
+
+    def wrap(self, get):
+        def recording_get(url, upstream='other', **kwargs):
+            response = get(url, upstream=upstream, **kwargs)
+            if response.status_code == 200:
+                self.add(upstream, url, kwargs.get('params') or {}, response.text)
+            return response
+        return recording_get
+
+    def add(self, upstream, url, params, text):
+        if upstream == 'wikipedia':
+            # Extract calls naming titles are served from the recorded searches
+            key, extension = params.get('srsearch'), 'json'
+        elif upstream in ('duckduckgo', 'scholar'):
+            key, extension = parse_qs(urlparse(url).query).get('q', [None])[0], 'html'
+        elif upstream == 'article':
+            key, extension = url, 'html'
+        else:
+            key = None
+        if not key:
+            return
+
+        folder = 'articles' if upstream == 'article' else upstream
+        path = f"{folder}/{slug(key)}.{extension}"
+        os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+        with open(os.path.join(self.directory, path), 'w', encoding='utf-8') as body:
+            body.write(text)
+        with self._lock:
+            self.index[upstream][key] = path
+
+    def save(self):
+        with open(os.path.join(self.directory, 'index.json'), 'w', encoding='utf-8') as index_file:
+            json.dump(self.index, index_file, indent=2, sort_keys=True)
+            index_file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('claims', nargs='+')
+    parser.add_argument('--fixtures', default=UPSTREAMS_DIR, help='directory to record into')
+    args = parser.parse_args()
+
+    recorder = Recorder(args.fixtures)
+    # Whole (not streamed) article downloads, so each body can be saved as is
+    checker = FactChecker(stream_articles=False, batch_wikipedia=True)
+    checker.http.get = recorder.wrap(checker.http.get)
+    for claim in args.claims:
+        result = checker.check_claim(claim)
+        print(f"{claim!r}: {result['source_count']} sources, timed out: {result['timed_out_providers']}")
+    recorder.save()
+    print(', '.join(f"{len(recorded)} {upstream}" for upstream, recorded in recorder.index.items()), 'recordings')
+
+
+if __name__ == '__main__':
+    main()
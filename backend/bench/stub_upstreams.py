@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for Wikipedia, DuckDuckGo, Google Scholar and news article
+pages, so benchmarks never touch the live internet.
+
+Every route sleeps for an injected latency before answering. A small share of
+requests is made much slower (the "tail") to mimic upstreams that stall.
+With article_pool=N, search results link to N shared article pages rather
+than pages unique to the query, the way claims about one story keep finding
+the same coverage. Setting scholar_captcha makes Google Scholar answer
+with a CAPTCHA page instead of results, as it does when it blocks a client.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+ARTICLE_HOSTS = ['reuters.com', 'apnews.com', 'bbc.com', 'npr.org', 'nasa.gov']
+
+
+def origin_url(url):
+    """The live URL a stub article link (.../article/<host>/<path>) stands for"""
+    parsed = urlparse(url)
+    if not parsed.path.startswith('/article/'):
+        return url
+    return 'https://' + parsed.path[len('/article/'):]
+
+ARTICLE_PARAGRAPHS = [
+    "Scientists have confirmed that the Earth is an oblate spheroid, and evidence shows that the planet is round.",
+    "The claim that the Earth is flat is a myth that has been debunked repeatedly by satellite imagery.",
+    "Researchers say the data indicates the shape of the Earth was established long ago by navigators.",
+    "Some believe the Earth is flat, however the overwhelming evidence does not support that claim.",
+    "Photographs taken from orbit show the curvature of the Earth clearly and the horizon is not flat."
+]
+
+
+def _seed(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class StubUpstreams:
+    """Threaded HTTP server that imitates every upstream FactChecker talks to"""
+
+    def __init__(self, latency=0.05, article_latency=0.15, tail_ratio=0.05, tail_factor=10, host='127.0.0.1',
+                 article_pool=0):
+        self.latency = latency
+        self.article_pool = article_pool
+        self.article_latency = article_latency
+        self.tail_ratio = tail_ratio
+        self.tail_factor = tail_factor
+        self.host = host
+        self.request_count = 0
+        self.article_requests = 0
+        self.scholar_requests = 0
+        self.scholar_captcha = False
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def endpoints(self):
+        """Endpoint overrides for FactChecker(endpoints=...)"""
+        return {
+            'wikipedia': f"{self.base_url}/w/api.php",
+            'duckduckgo': f"{self.base_url}/html/",
+            'scholar': f"{self.base_url}/scholar"
+        }
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 256
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sleep(self, base):
+        delay = base * random.uniform(0.5, 1.5)
+        if random.random() < self.tail_ratio:
+            delay *= self.tail_factor
+        time.sleep(delay)
+
+    def _handle(self, handler):
+        with self._lock:
+            self.request_count += 1
+
+        parsed = urlparse(handler.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        if parsed.path == '/w/api.php':
+            self._sleep(self.latency)
+            body, content_type = json.dumps(self.wikipedia(params)), 'application/json'
+        elif parsed.path == '/html/':
+            self._sleep(self.latency)
+            body, content_type = self.duckduckgo(params.get('q', '')), 'text/html'
+        elif parsed.path == '/scholar':
+            with self._lock:
+                self.scholar_requests += 1
+            self._sleep(self.latency)
+            body, content_type = self.scholar(params.get('q', '')), 'text/html'
+        elif parsed.path.startswith('/article/'):
+            with self._lock:
+                self.article_requests += 1
+            self._sleep(self.article_latency)
+            body, content_type = self.article(parsed.path), 'text/html'
+        else:
+            body, content_type = 'not found', 'text/plain'
+
+        payload = body.encode('utf-8')
+        etag = f'"{zlib.crc32(payload):08x}"'
+        if handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        handler.send_response(200 if content_type != 'text/plain' else 404)
+        handler.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        handler.send_header('ETag', etag)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def wikipedia(self, params):
+        data = {}
+        if params.get('list') == 'search':
+            query = params.get('srsearch', '')
+            limit = int(params.get('srlimit', 3))
+            data['search'] = [
+                {'title': f"{query.title()} {index}", 'snippet': f"<span>{query}</span> article {index}"}
+                for index in range(limit)
+            ]
+
+        if params.get('generator') == 'search':
+            query = params.get('gsrsearch', '')
+            titles = [f"{query.title()} {index}" for index in range(int(params.get('gsrlimit', 3)))]
+        elif 'titles' in params:
+            titles = params['titles'].split('|')
+        else:
+            titles = []
+
+        if titles:
+            data['pages'] = {
+                str(_seed(title)): {'title': title, 'index': index + 1, 'extract': ' '.join(ARTICLE_PARAGRAPHS)}
+                for index, title in enumerate(titles)
+            }
+        return {'query': data}
+
+    def duckduckgo(self, query):
+        rng = random.Random(_seed(query))
+        results = []
+        for index in range(5):
+            host = rng.choice(ARTICLE_HOSTS)
+            if self.article_pool:
+                target = f"{self.base_url}/article/{host}/shared-{rng.randrange(self.article_pool)}"
+            else:
+                target = f"{self.base_url}/article/{host}/{_seed(query)}-{index}"
+            href = f"//duckduckgo.com/l/?uddg={quote(target, safe='')}&rut=stub"
+            results.append(
+                f'<div class="result"><a class="result__a" href="{href}">{query} result {index}</a>'
+                f'<a class="result__snippet" href="{href}">Snippet about {query}</a></div>'
+            )
+        return f"<html><body>{''.join(results)}</body></html>"
+
+    def scholar(self, query):
+        if self.scholar_captcha:
+            return ("<html><body><form id='gs_captcha_f'><h1>Please show you're not a robot</h1>"
+                    "<div id='recaptcha'></div></form></body></html>")
+        results = ''.join(
+            f'<div class="gs_ri"><h3 class="gs_rt"><a href="{self.base_url}/article/nature.com/{index}">'
+            f'Study {index} on {query}</a></h3><div class="gs_rs">Research shows that {query}.</div></div>'
+            for index in range(5)
+        )
+        return f"<html><body>{results}</body></html>"
+
+    def article(self, path):
+        rng = random.Random(_seed(path))
+        paragraphs = [rng.choice(ARTICLE_PARAGRAPHS) for _ in range(12)]
+        body = ''.join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+        return (
+            "<html><head><script>var tracking = 1;</script></head><body>"
+            "<nav><p>Home | World | Science</p></nav>"
+            f"<article><h1>{path}</h1>{body}</article>"
+            "<footer><p>Copyright</p></footer></body></html>"
+        )
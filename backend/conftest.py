@@ -0,0 +1,36 @@
+"""
+Fixtures and helpers shared by the test modules.
+"""
+
+import pytest
+
+from app import FactChecker
+from bench.stub_upstreams import StubUpstreams
+from providers import ProviderRegistry
+
+
+@pytest.fixture
+def stub_options():
+    """StubUpstreams options on top of zero latency; override in a module to change them"""
+    return {}
+
+
+@pytest.fixture
+def stub(stub_options):
+    """The local stub upstreams, answering without delay"""
+    upstreams = StubUpstreams(**{'latency': 0, 'article_latency': 0, 'tail_ratio': 0, **stub_options}).start()
+    yield upstreams
+    upstreams.stop()
+
+
+def make_checker(upstreams=None, providers=None, **kwargs):
+    """A FactChecker pointed at local upstreams (stub or replayed), with no
+    politeness interval toward them, and/or querying only the given providers"""
+    if upstreams is not None:
+        kwargs['endpoints'] = upstreams.endpoints()
+    checker = FactChecker(**kwargs)
+    if upstreams is not None:
+        checker.fetch_scheduler.limiter.host_intervals[upstreams.host] = 0
+    if providers is not None:
+        checker.providers = ProviderRegistry(providers)
+    return checker
@@ -0,0 +1,135 @@
+"""
+Near-duplicate detection for the sources of one claim.
+
+Wire stories are syndicated: the same AP or Reuters text turns up on many
+outlets, so search_news_api and search_duckduckgo can return one story
+under several URLs. Counting each copy would weigh the story several
+times, so copies are collapsed before scoring.
+
+Texts are compared by SimHash. Each run of three words in the text is hashed
+to 64 bits. Bit i of the fingerprint is set when most of those hashes have
+it set. Texts that share most of their word runs get fingerprints a few
+bits apart, while unrelated texts differ in about half the bits.
+Fingerprints are kept in a FingerprintCache keyed by the text itself, so an
+article met again (for another claim, or from the ArticleCache) is not
+hashed again.
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from urls import canonical_url
+
+WORD = re.compile(r'\w+')
+
+MASK = (1 << 64) - 1
+
+# Fingerprints at most this many bits apart are near-duplicates. A copy
+# with its own byline and footer and a word changed here and there is
+# typically 2-6 bits from the original; unrelated texts are about 32 apart
+MAX_DISTANCE = 6
+
+# Texts shorter than this (snippets, failed extractions) are never collapsed
+MIN_WORDS = 40
+
+
+def _mix(value):
+    """splitmix64 finalizer: spreads the bits of a 64-bit value"""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK
+    return value ^ (value >> 31)
+
+
+def simhash(words):
+    """64-bit SimHash of a list of lower-cased words, over 3-word shingles"""
+    crcs = [zlib.crc32(word.encode('utf-8')) for word in words]
+    hashes = [_mix((first << 32 | second) ^ (third * 0x9E3779B97F4A7C15) & MASK)
+              for first, second, third in zip(crcs, crcs[1:], crcs[2:])]
+    if not hashes:
+        return 0
+    # One column of '0'/'1' per bit, most significant first
+    half = len(hashes) / 2
+    fingerprint = 0
+    for column in zip(*[format(value, '064b') for value in hashes]):
+        fingerprint = fingerprint << 1 | (column.count('1') > half)
+    return fingerprint
+
+
+def distance(first, second):
+    """Number of bits in which two fingerprints differ"""
+    return bin(first ^ second).count('1')
+
+
+class FingerprintCache:
+    """Bounded LRU of text -> SimHash fingerprint (None for short texts)"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._fingerprints = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, text):
+        key = (len(text), zlib.crc32(text.encode('utf-8')))
+        with self._lock:
+            if key in self._fingerprints:
+                self._fingerprints.move_to_end(key)
+                self.hits += 1
+                return self._fingerprints[key]
+            self.misses += 1
+
+        words = WORD.findall(text.lower())
+        fingerprint = simhash(words) if len(words) >= MIN_WORDS else None
+        with self._lock:
+            self._fingerprints[key] = fingerprint
+            while len(self._fingerprints) > self.max_entries:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._fingerprints), 'hits': self.hits, 'misses': self.misses}
+
+
+class SourceDeduper:
+    """Recognizes the repeats among one claim's sources.
+
+    A source repeats an earlier one if its URL is another form of the same
+    article's (see urls.canonical_url) or its full_content is within
+    max_distance bits of an earlier source's.
+    """
+
+    def __init__(self, fingerprints, max_distance=MAX_DISTANCE):
+        self.fingerprints = fingerprints
+        self.max_distance = max_distance
+        self._urls = set()
+        self._kept = []
+        self.collapsed = 0
+
+    def is_repeat(self, result):
+        """True if result repeats a source seen before; otherwise remembers it"""
+        url = result.get('url')
+        key = canonical_url(url) if url else None
+        if key and key in self._urls:
+            self.collapsed += 1
+            return True
+
+        content = result.get('full_content') or ''
+        fingerprint = self.fingerprints.fingerprint(content) if content else None
+        if fingerprint is not None:
+            for kept in self._kept:
+                if distance(fingerprint, kept) <= self.max_distance:
+                    self.collapsed += 1
+                    return True
+            self._kept.append(fingerprint)
+
+        if key:
+            self._urls.add(key)
+        return False
+
+    def unique(self, results):
+        """results without the repeats, keeping each first copy"""
+        return [result for result in results if not self.is_repeat(result)]
@@ -0,0 +1,188 @@
+"""
+Polite parallel fetching for article pages.
+
+Fetches run on a bounded worker pool. Requests to the same host are spaced
+at least `min_interval` seconds apart, while different hosts are fetched in
+parallel, replacing the fixed time.sleep() calls between fetches.
+
+Each host has its own queue of waiting URLs. A dispatcher thread hands a
+host's next URL to the pool once the host's interval has passed, so pool
+workers only ever fetch: a host with a long queue never holds a worker
+that another, idle host could use.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from metrics import in_context
+from urls import host_of
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between requests to the same host"""
+
+    def __init__(self, min_interval=1.0, host_intervals=None):
+        self.min_interval = min_interval
+        self.host_intervals = host_intervals or {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def interval_for(self, host):
+        if host.startswith('www.'):
+            host = host[4:]
+        return self.host_intervals.get(host, self.min_interval)
+
+    def reserve(self, host):
+        """Reserve the next slot for this host and return the seconds until it.
+
+        Does not wait; asyncio callers sleep on the returned delay themselves.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval_for(host)
+        return slot - now
+
+    def try_reserve(self, host):
+        """Reserve a slot for this host if one is free now and return 0;
+        otherwise reserve nothing and return the seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                return slot - now
+            self._next_slot[host] = now + self.interval_for(host)
+        return 0
+
+    def acquire(self, host):
+        """Block until this host may be requested again, reserving the slot"""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class FetchScheduler:
+    """Bounded worker pool that fetches URLs with per-host politeness"""
+
+    def __init__(self, fetch, max_workers=8, min_interval=1.0, host_intervals=None):
+        self.fetch = fetch
+        self.limiter = HostRateLimiter(min_interval, host_intervals)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        # host -> deque of (url, Future, fetch bound to the caller's context)
+        self._queues = {}
+        # (monotonic time, host) for every host with queued URLs
+        self._due = []
+        self._changed = threading.Condition()
+        self._dispatcher = None
+
+    def throttle(self, url):
+        """Wait for a politeness slot for url's host (used by the search scrapers)"""
+        return self.limiter.acquire(host_of(url))
+
+    def submit(self, url):
+        """Schedule a fetch and return its Future"""
+        future = Future()
+        host = host_of(url)
+        with self._changed:
+            queue = self._queues.get(host)
+            if queue is None:
+                queue = self._queues[host] = deque()
+                heapq.heappush(self._due, (time.monotonic(), host))
+                self._changed.notify()
+            queue.append((url, future, in_context(self.fetch)))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name='fetch-dispatch', daemon=True)
+                self._dispatcher.start()
+        return future
+
+    def fetch_all(self, urls):
+        """Fetch every URL, returning results in the same order"""
+        futures = [self.submit(url) for url in urls]
+        return [future.result() for future in futures]
+
+    def _next_ready(self):
+        """Wait for a host whose slot has come; returns (url, Future, fetch)"""
+        with self._changed:
+            while True:
+                now = time.monotonic()
+                if not self._due or self._due[0][0] > now:
+                    self._changed.wait(self._due[0][0] - now if self._due else None)
+                    continue
+                due, host = heapq.heappop(self._due)
+                queue = self._queues[host]
+                if not queue:
+                    del self._queues[host]
+                    continue
+                # The search scrapers take slots through throttle() too
+                delay = self.limiter.try_reserve(host)
+                if delay:
+                    heapq.heappush(self._due, (now + delay, host))
+                    continue
+                item = queue.popleft()
+                if queue:
+                    heapq.heappush(self._due, (now + self.limiter.interval_for(host), host))
+                else:
+                    del self._queues[host]
+                return item
+
+    def _dispatch(self):
+        while True:
+            url, future, fetch = self._next_ready()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self.pool.submit(self._run, future, fetch, url)
+            except RuntimeError as e:
+                # The pool is shut down (at interpreter exit, for one): fail
+                # the fetch instead of leaving its caller waiting forever
+                future.set_exception(e)
+
+    @staticmethod
+    def _run(future, fetch, url):
+        try:
+            result = fetch(url)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+class FetchMemo:
+    """Remembers submit(url) results so each URL is fetched at most once.
+
+    One memo lives for one claim, or one batch of claims. submit is any
+    callable that starts a fetch and returns a Future (or an asyncio task).
+    URLs are remembered under key(url), so with urls.canonical_url the forms
+    of one article's URL share a download.
+    """
+
+    def __init__(self, submit, key=None):
+        self._submit = submit
+        self._key = key
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.requested = 0
+
+    def submit(self, url):
+        key = self._key(url) if self._key else url
+        with self._lock:
+            self.requested += 1
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = self._submit(url)
+            return future
+
+    def cancel(self):
+        """Cancel the fetches that are still pending"""
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+
+    def stats(self):
+        with self._lock:
+            return {'requested': self.requested, 'fetched': len(self._futures)}
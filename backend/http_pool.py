@@ -0,0 +1,252 @@
+"""
+Shared, pooled HTTP layer for every outbound call FactChecker makes.
+
+One requests.Session is shared by all threads. Its urllib3 connection pools
+keep connections alive between calls, so repeated requests to Wikipedia or
+DuckDuckGo reuse an open TCP+TLS connection instead of opening a new one.
+Failed requests (connection errors, 429 and 5xx answers) are retried with
+exponential backoff. A Retry-After header is honoured for at most
+RETRY_AFTER_MAX seconds, so one throttled search cannot hold a provider
+thread far past its deadline.
+
+Article pages can be downloaded as a stream instead (read_streamed). The
+body is handed over chunk by chunk and reading stops on a byte budget, on a
+wall-clock deadline, or as soon as the consumer has what it needs.
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from metrics import UPSTREAM_RESPONSES
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Longest Retry-After wait (seconds) before a retry; a provider's whole
+# deadline is 15 s by default
+RETRY_AFTER_MAX = 2
+
+# Media types worth downloading as article pages. A response without a
+# Content-Type is read too.
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Why read_streamed stopped reading a body
+COMPLETE = 'complete'        # the whole body was read
+ENOUGH = 'enough'            # the consumer needed no more
+MAX_BYTES = 'max_bytes'      # the byte budget ran out
+DEADLINE = 'deadline'        # the wall-clock deadline passed
+NOT_HTML = 'not_html'        # skipped on its Content-Type, body never read
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def is_html(content_type):
+    """True if a Content-Type header names an HTML page (or is missing)"""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return not media_type or media_type in HTML_CONTENT_TYPES
+
+
+def _cap_read_timeout(raw, remaining):
+    # Make the next socket read give up at the deadline. urllib3 resets the
+    # timeout when the connection is reused.
+    sock = getattr(getattr(raw, 'connection', None), 'sock', None)
+    if sock is not None:
+        current = sock.gettimeout()
+        if current is None or current > remaining:
+            sock.settimeout(max(remaining, 0.001))
+
+
+def read_streamed(response, consume, max_bytes, deadline, chunk_size=STREAM_CHUNK_SIZE):
+    """Feed the body of a stream=True response to consume(chunk).
+
+    Stops when consume returns True, the body ends, max_bytes (counted after
+    Content-Encoding decoding) have been read or time.monotonic() passes
+    deadline. Returns (bytes read, one of the stop reasons above).
+    """
+    raw = response.raw
+    # urllib3 2's read1 returns whatever has arrived instead of waiting for
+    # a full chunk, so a server trickling bytes cannot hold us past the deadline
+    read = getattr(raw, 'read1', None) or raw.read
+    received = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return received, DEADLINE
+        _cap_read_timeout(raw, remaining)
+        try:
+            chunk = read(min(chunk_size, max_bytes - received), decode_content=True)
+        except (ReadTimeoutError, socket.timeout):
+            if time.monotonic() >= deadline:
+                return received, DEADLINE
+            raise
+        if not chunk:
+            return received, COMPLETE
+        received += len(chunk)
+        if consume(chunk):
+            return received, ENOUGH
+        if received >= max_bytes:
+            return received, MAX_BYTES
+
+
+class DownloadCounters:
+    """Thread-safe counts of streamed article downloads by stop reason"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reasons = {}
+        self._bytes = 0
+
+    def record(self, reason, received=0):
+        with self._lock:
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+            self._bytes += received
+
+    def stats(self):
+        with self._lock:
+            return {'bytes_read': self._bytes, 'stopped': dict(self._reasons)}
+
+
+class ConnectionCounters:
+    """Thread-safe per-host counts of connections opened vs. checked out"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def record(self, host, opened):
+        with self._lock:
+            counts = self._hosts.setdefault(host, {'requests': 0, 'opened': 0})
+            if opened:
+                counts['opened'] += 1
+            else:
+                counts['requests'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            hosts = {host: dict(counts) for host, counts in self._hosts.items()}
+        for counts in hosts.values():
+            counts['reused'] = max(0, counts['requests'] - counts['opened'])
+        return hosts
+
+
+def _counting_pool(base, counters):
+    """Subclass a urllib3 pool class so it reports connection reuse"""
+
+    class CountingPool(base):
+        def _get_conn(self, timeout=None):
+            counters.record(self.host, opened=False)
+            return super()._get_conn(timeout)
+
+        def _new_conn(self):
+            counters.record(self.host, opened=True)
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools feed ConnectionCounters"""
+
+    def __init__(self, counters, **kwargs):
+        self.counters = counters
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.counters),
+            'https': _counting_pool(HTTPSConnectionPool, self.counters)
+        }
+
+
+class CappedRetry(Retry):
+    """urllib3 Retry that waits at most max_retry_after seconds for a Retry-After.
+
+    urllib3's own retry_after_max defaults to six hours and is missing
+    from older releases.
+    """
+
+    def __init__(self, *args, max_retry_after=RETRY_AFTER_MAX, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def parse_retry_after(self, retry_after):
+        return min(super().parse_retry_after(retry_after), self.max_retry_after)
+
+
+class PooledSession:
+    """Thread-safe keep-alive session with retries and split timeouts.
+
+    pool_maxsize is the number of idle connections kept per host, with
+    host_pool_sizes overriding it for specific hosts. connect_timeout and
+    read_timeout (seconds) replace the flat timeout=10 used before, and
+    max_retry_after caps the wait a Retry-After header asks for.
+    """
+
+    def __init__(self, headers=None, pool_maxsize=10, host_pool_sizes=None,
+                 retries=2, backoff_factor=0.5, connect_timeout=3.05, read_timeout=10,
+                 max_retry_after=RETRY_AFTER_MAX):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retry_after = max_retry_after
+        self.counters = ConnectionCounters()
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        default_adapter = self._adapter(pool_maxsize, retries, backoff_factor)
+        self.session.mount('http://', default_adapter)
+        self.session.mount('https://', default_adapter)
+
+        for host, size in (host_pool_sizes or {}).items():
+            adapter = self._adapter(size, retries, backoff_factor)
+            self.session.mount(f'https://{host}/', adapter)
+            self.session.mount(f'http://{host}/', adapter)
+
+    def _adapter(self, pool_maxsize, retries, backoff_factor):
+        retry = CappedRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            max_retry_after=self.max_retry_after
+        )
+        # pool_connections is how many distinct hosts keep a pool in memory
+        return CountingAdapter(
+            self.counters,
+            pool_connections=32,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+
+    def get(self, url, upstream='other', **kwargs):
+        """session.get, counting the response status under upstream (see metrics)"""
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = self.session.get(url, **kwargs)
+        except Exception:
+            UPSTREAM_RESPONSES.inc(upstream=upstream, status='error')
+            raise
+        UPSTREAM_RESPONSES.inc(upstream=upstream, status=response.status_code)
+        return response
+
+    def stats(self):
+        """Connection reuse counters, overall and per host"""
+        hosts = self.counters.snapshot()
+        totals = {'requests': 0, 'opened': 0, 'reused': 0}
+        for counts in hosts.values():
+            for key in totals:
+                totals[key] += counts[key]
+        return {'totals': totals, 'hosts': hosts}
@@ -0,0 +1,294 @@
+"""
+Persistent background jobs for long-running claim checks, stored in SQLite.
+
+POST /api/jobs adds a claim to JobQueue and answers at once with a job id;
+JobRunner threads take queued jobs (highest priority first, then oldest)
+and run check_claim_cached on them. Clients poll, or long-poll, the job
+until its result is stored.
+
+The queue lives in one SQLite file in WAL mode, like ArticleCache, so
+queued jobs survive a restart and every gunicorn worker can take jobs
+from it. Taking a job is a BEGIN IMMEDIATE transaction, so two workers
+never take the same one. A running job holds a lease: if its worker
+dies, the job is queued again once the lease expires, at most
+`max_attempts` times. At most `max_queued` jobs wait at once; submit()
+raises QueueFull beyond that.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from metrics import request_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    claim TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result BLOB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'jobs.sqlite3')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+MIN_PRIORITY = 0
+MAX_PRIORITY = 9
+DEFAULT_PRIORITY = 5
+
+
+class QueueFull(Exception):
+    """The queue already holds max_queued waiting jobs"""
+
+    def __init__(self, queued):
+        super().__init__(f"{queued} jobs already queued")
+        self.queued = queued
+
+
+class JobQueue:
+    """SQLite-backed priority queue of claim checks and their results"""
+
+    # Delete finished jobs older than result_ttl every this many finishes
+    PURGE_EVERY = 100
+
+    def __init__(self, path=DEFAULT_PATH, max_queued=1000, lease=120, max_attempts=3, result_ttl=24 * 3600):
+        self.path = path
+        self.max_queued = max_queued
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self._finishes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Wakes idle runners on submit and long-polls on finish in this
+        # process; other processes are noticed by polling
+        self.changed = threading.Condition()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA busy_timeout=5000')
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self, work):
+        """Run work(connection) inside BEGIN IMMEDIATE ... COMMIT"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(connection)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return result
+
+    def _notify(self):
+        with self.changed:
+            self.changed.notify_all()
+
+    def submit(self, claim, priority=DEFAULT_PRIORITY):
+        """Queue a claim and return its job id; raises QueueFull when full"""
+        job_id = uuid.uuid4().hex
+
+        def insert(connection):
+            queued = self.queued_count(connection)
+            if queued >= self.max_queued:
+                raise QueueFull(queued)
+            connection.execute(
+                'INSERT INTO jobs (id, claim, priority, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, claim, priority, QUEUED, time.time())
+            )
+
+        self._transaction(insert)
+        self._notify()
+        return job_id
+
+    def queued_count(self, connection=None):
+        connection = connection or self._connection()
+        return connection.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()[0]
+
+    def take(self):
+        """Mark the next job running and return (id, claim), or None if none is waiting"""
+        def take_next(connection):
+            self._requeue_expired(connection)
+            row = connection.execute(
+                'SELECT id, claim FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1',
+                (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    'UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?',
+                    (RUNNING, time.time(), row[0])
+                )
+            return row
+
+        return self._transaction(take_next)
+
+    def _requeue_expired(self, connection):
+        # Jobs whose worker died mid-check (a crash or restart)
+        expired = time.time() - self.lease
+        connection.execute(
+            'UPDATE jobs SET status = ?, finished_at = ?, error = ? '
+            'WHERE status = ? AND started_at < ? AND attempts >= ?',
+            (FAILED, time.time(), 'Worker stopped before finishing', RUNNING, expired, self.max_attempts)
+        )
+        connection.execute(
+            'UPDATE jobs SET status = ? WHERE status = ? AND started_at < ?',
+            (QUEUED, RUNNING, expired)
+        )
+
+    def finish(self, job_id, result=None, error=None):
+        """Store a job's result (or error) and wake anyone waiting on it"""
+        blob = zlib.compress(json.dumps(result).encode('utf-8'), 6) if error is None else None
+        self._connection().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+            (FAILED if error is not None else DONE, blob, error, time.time(), job_id)
+        )
+        self._notify()
+
+        with self._lock:
+            self._finishes += 1
+            purge = self._finishes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def get(self, job_id):
+        """The job as a dict (result decoded), or None if unknown"""
+        row = self._connection().execute(
+            'SELECT id, claim, priority, status, result, error, attempts, created_at, started_at, finished_at '
+            'FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = dict(zip(
+            ('id', 'claim', 'priority', 'status', 'result', 'error', 'attempts',
+             'created_at', 'started_at', 'finished_at'),
+            row
+        ))
+        if job['result'] is not None:
+            job['result'] = json.loads(zlib.decompress(job['result']).decode('utf-8'))
+        if job['status'] == QUEUED:
+            job['position'] = self._connection().execute(
+                'SELECT COUNT(*) FROM jobs WHERE status = ? AND '
+                '(priority > ? OR (priority = ? AND created_at < ?))',
+                (QUEUED, job['priority'], job['priority'], job['created_at'])
+            ).fetchone()[0]
+        return job
+
+    def wait(self, job_id, timeout, poll_interval=0.5):
+        """Long-poll: return the job once it is finished, or as it is after timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in (DONE, FAILED) or remaining <= 0:
+                return job
+            with self.changed:
+                self.changed.wait(min(remaining, poll_interval))
+
+    def purge(self):
+        """Delete finished jobs older than result_ttl"""
+        cursor = self._connection().execute(
+            'DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?',
+            (DONE, FAILED, time.time() - self.result_ttl)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        counts = dict(self._connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+class JobRunner:
+    """Worker threads that take jobs from a JobQueue and run them.
+
+    run(claim) returns the JSON-serializable result to store. Threads are
+    (re)started by ensure_started(), which also notices a fork (gunicorn
+    --preload), where threads do not survive.
+    """
+
+    def __init__(self, queue, run, workers=2, poll_interval=1.0):
+        self.queue = queue
+        self.run = run
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # Seconds a job takes, averaged over recent jobs, for Retry-After
+        self.average_duration = 10.0
+        self._pid = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() or not self.workers:
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f'job-{index}', daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def retry_after(self, queued):
+        """Seconds until the workers should have room for another job"""
+        workers = max(self.workers, 1)
+        return max(1, math.ceil(self.average_duration * (queued - self.queue.max_queued + 1) / workers))
+
+    def _work(self):
+        while True:
+            try:
+                job = self.queue.take()
+            except Exception as e:
+                logger.warning("Job queue error: %s", e)
+                job = None
+            if job is None:
+                with self.queue.changed:
+                    self.queue.changed.wait(self.poll_interval)
+                continue
+
+            job_id, claim = job
+            # Log lines of the check carry the job id
+            request_id.set(job_id[:12])
+            started = time.monotonic()
+            try:
+                result, error = self.run(claim), None
+            except Exception as e:
+                logger.exception("Job %s failed: %s", job_id, e)
+                result, error = None, f'Internal server error: {str(e)}'
+            self.average_duration = 0.8 * self.average_duration + 0.2 * (time.monotonic() - started)
+            try:
+                self.queue.finish(job_id, result, error)
+            except Exception as e:
+                logger.warning("Job queue error: %s", e)
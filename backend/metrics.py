@@ -0,0 +1,273 @@
+"""
+Timing spans, Prometheus metrics and request-scoped logging.
+
+span(stage) times a block of a claim check (a provider call, an article
+fetch, a parse, analyze_results) into the factchecker_stage_seconds
+histogram, so /metrics shows which stage dominates the tail. Metrics live
+in a process-wide Registry and are rendered in the Prometheus text format
+by render(); there is no client library dependency.
+
+Log lines carry the id of the request they belong to. The id is a context
+variable, which thread pools do not propagate on their own: submit work
+with submit_in_context (or wrap it with in_context) to keep it.
+
+The same context carries the request's Profile while one is running (see
+profiling.py): spans are added to it, and work submitted with
+submit_in_context is sampled by it.
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import math
+import threading
+import time
+import uuid
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25)
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+request_id = contextvars.ContextVar('request_id', default='-')
+
+# profiling.Profile of the check being profiled, if any
+active_profile = contextvars.ContextVar('active_profile', default=None)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [(name, value) for name, value in zip(names, values) if value != ''] + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [count per bucket (not cumulative), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = next(index for index, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append((f'{self.name}_bucket', labels, cumulative))
+            lines.append((f'{self.name}_sum', _format_labels(self.labelnames, key), total))
+            lines.append((f'{self.name}_count', _format_labels(self.labelnames, key), count))
+        return lines
+
+
+class Registry:
+    """The metrics a process exposes on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, families=()):
+        """Prometheus text exposition of every metric, plus families given as
+        (name, kind, help, [(labels dict, value), ...]) read at scrape time"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in metric.samples())
+        for name, kind, help, samples in families:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                rendered = _format_labels(list(labels), list(labels.values()))
+                lines.append(f'{name}{rendered} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'factchecker_stage_seconds',
+    'Time spent in each stage of a claim check',
+    ('stage', 'provider')
+))
+
+UPSTREAM_RESPONSES = REGISTRY.register(Counter(
+    'factchecker_upstream_responses_total',
+    'Responses from upstream servers by upstream and HTTP status ("error" when no response came back)',
+    ('upstream', 'status')
+))
+
+# Prometheus text format content type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def render(families=()):
+    return REGISTRY.render(families)
+
+
+def observe_stage(stage, seconds, provider=''):
+    STAGE_SECONDS.observe(seconds, stage=stage, provider=provider)
+    profile = active_profile.get()
+    if profile is not None:
+        profile.add_stage(stage, seconds, provider)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("span stage=%s provider=%s seconds=%.4f", stage, provider or '-', seconds)
+
+
+@contextlib.contextmanager
+def span(stage, provider=''):
+    """Time the block into factchecker_stage_seconds, failed or not"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, provider)
+
+
+def timed(stage):
+    """Decorator: every call of the function is a span of this stage"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class StageClock:
+    """Adds up many short calls (parsing a page chunk by chunk) into one span"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.seconds = 0.0
+
+    def call(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def wrap(self, fn):
+        return functools.partial(self.call, fn)
+
+    def observe(self):
+        observe_stage(self.stage, self.seconds)
+
+
+def new_request_id():
+    """Start a request: give this context a fresh id for its log lines"""
+    value = uuid.uuid4().hex[:12]
+    request_id.set(value)
+    return value
+
+
+def traced(fn):
+    """fn, sampled by the running profile when it runs on another thread"""
+    profile = active_profile.get()
+    return fn if profile is None else profile.traced(fn)
+
+
+def in_context(fn):
+    """fn bound to a copy of the current context, to run on another thread"""
+    context = contextvars.copy_context()
+    fn = traced(fn)
+    # A context can only be entered by one thread at a time
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def submit_in_context(pool, fn, *args, **kwargs):
+    """pool.submit that carries the caller's context variables over"""
+    return pool.submit(contextvars.copy_context().run, traced(fn), *args, **kwargs)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to every record"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+def configure_logging(level='INFO'):
+    """Root logging for the servers: one line per record, tagged with the request id"""
+    logging.basicConfig(level=level.upper(), format=LOG_FORMAT)
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(existing, RequestIdFilter) for existing in handler.filters):
+            handler.addFilter(RequestIdFilter())
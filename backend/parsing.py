@@ -0,0 +1,168 @@
+"""
+Pluggable HTML parsing for article extraction.
+
+extract_article_text() applies the article_selectors logic FactChecker has
+always used. It can run on one of four backends:
+
+    'html.parser'  BeautifulSoup over the pure-Python stdlib parser (the original)
+    'streaming'    the same tokenizer without a tree (streaming_extractor.py);
+                   same output as 'html.parser', stops once the text is final
+    'lxml'         BeautifulSoup over lxml's C parser, if lxml is installed
+    'selectolax'   selectolax's Lexbor engine (C, no Python tree), if installed
+
+lxml and selectolax build the tree the way browsers do. BeautifulSoup's
+html.parser does not, so on malformed pages (a <div> inside a <p>, for
+example) the faster backends can split paragraphs differently.
+bench/bench_parse.py reports how many saved pages each backend extracts
+exactly like 'html.parser'.
+
+Parsing holds the GIL. ParsePool runs extraction in worker processes
+instead: raw page bytes go in and the extracted text comes out.
+"""
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+IGNORED_TAGS = ["script", "style", "nav", "header", "footer", "aside"]
+
+ARTICLE_SELECTORS = [
+    'article',
+    '[role="main"]',
+    '.article-content',
+    '.article-body',
+    '.story-body',
+    '.entry-content',
+    'main'
+]
+
+# A container whose paragraphs hold at most this many characters is not
+# taken as the article; the next selector (and finally every <p>) is tried
+MIN_ARTICLE_CHARS = 200
+
+
+def available_backends():
+    """Backends usable in this environment, fastest first"""
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    backends.append('streaming')
+    if HAVE_LXML:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def soup_features(backend):
+    """BeautifulSoup tree builder for a backend (lxml serves selectolax users too)"""
+    if backend in ('lxml', 'selectolax') and HAVE_LXML:
+        return 'lxml'
+    return 'html.parser'
+
+
+def _extract_soup(html, max_chars, features):
+    soup = BeautifulSoup(html, features)
+
+    for script in soup(IGNORED_TAGS):
+        script.decompose()
+
+    content = ""
+
+    for selector in ARTICLE_SELECTORS:
+        article_elem = soup.select_one(selector)
+        if article_elem:
+            paragraphs = article_elem.find_all('p')
+            content = ' '.join([p.get_text(strip=True) for p in paragraphs])
+            if len(content) > MIN_ARTICLE_CHARS:
+                break
+
+    if len(content) < MIN_ARTICLE_CHARS:
+        paragraphs = soup.find_all('p')
+        content = ' '.join([p.get_text(strip=True) for p in paragraphs])
+
+    return content[:max_chars]
+
+
+def _paragraph_text(node):
+    # BeautifulSoup's find_all('p') looks at descendants only
+    return ' '.join([p.text(strip=True) for p in node.css('p') if p.mem_id != node.mem_id])
+
+
+def _extract_selectolax(html, max_chars):
+    if isinstance(html, bytes):
+        # Lexbor assumes UTF-8; decode the way BeautifulSoup would
+        html = UnicodeDammit(html, is_html=True).unicode_markup or ''
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(IGNORED_TAGS)
+
+    content = ""
+
+    for selector in ARTICLE_SELECTORS:
+        article_elem = tree.css_first(selector)
+        if article_elem is not None:
+            content = _paragraph_text(article_elem)
+            if len(content) > MIN_ARTICLE_CHARS:
+                break
+
+    if len(content) < MIN_ARTICLE_CHARS:
+        content = _paragraph_text(tree.root) if tree.root is not None else ""
+
+    return content[:max_chars]
+
+
+def extract_article_text(html, max_chars=5000, backend='html.parser'):
+    """Extract the main article text from a page's HTML (bytes or str)"""
+    if backend == 'streaming':
+        # streaming_extractor imports this module's selectors
+        from streaming_extractor import extract_streaming
+        return extract_streaming(html, max_chars)
+    if backend == 'selectolax':
+        if LexborHTMLParser is None:
+            raise ValueError("selectolax is not installed")
+        return _extract_selectolax(html, max_chars)
+    if backend == 'lxml' and not HAVE_LXML:
+        raise ValueError("lxml is not installed")
+    if backend not in ('lxml', 'html.parser'):
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return _extract_soup(html, max_chars, backend)
+
+
+class ParsePool:
+    """Article extraction on worker processes, so parsing runs outside the GIL.
+
+    Jobs carry the raw response bytes and return the extracted text. Workers
+    are spawned rather than forked because the server process is threaded.
+    """
+
+    def __init__(self, processes=None, backend='html.parser'):
+        self.backend = backend
+        self.pool = ProcessPoolExecutor(max_workers=processes,
+                                        mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, html, max_chars=5000):
+        """Schedule one extraction and return its Future"""
+        return self.pool.submit(extract_article_text, html, max_chars, self.backend)
+
+    def extract(self, html, max_chars=5000):
+        return self.submit(html, max_chars).result()
+
+    def shutdown(self):
+        # cancel_futures needs Python 3.9
+        if sys.version_info >= (3, 9):
+            self.pool.shutdown(cancel_futures=True)
+        else:
+            self.pool.shutdown()
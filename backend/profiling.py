@@ -0,0 +1,207 @@
+"""
+Opt-in profiling of one claim check.
+
+A Profile collects two views of a check while Profile.running() is active:
+
+- the spans it records (see metrics.span), added up per stage, so the
+  response shows how long the providers, article fetches, parsing and
+  analyze_results took;
+- stack samples: a sampler thread reads sys._current_frames() every
+  `interval` seconds for the threads working on the check (the caller and
+  any pool thread its work was submitted to with submit_in_context) and
+  sorts each stack into network, parse, analyze, wait or other by the
+  innermost frame it recognizes.
+
+The samples are also kept as collapsed stacks, one "frame;frame;... count"
+line per distinct stack, which flamegraph.pl and speedscope read.
+
+Nothing here runs unless a profile is started: with none active, a span
+costs one context variable lookup more.
+"""
+
+import contextlib
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from metrics import active_profile
+
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Innermost matching frame decides a sample's category. Paths are matched
+# with forward slashes.
+CATEGORY_PATHS = [
+    ('network', ('/socket.py', '/ssl.py', '/selectors.py', '/http/client.py', '/urllib3/', '/requests/',
+                 '/httpx/', '/httpcore/', '/anyio/', '/http_pool.py')),
+    ('parse', ('/bs4/', '/soupsieve/', '/html/parser.py', '/_markupbase.py', '/lxml/', '/selectolax/',
+               '/parsing.py', '/streaming_extractor.py')),
+    ('analyze', ('/relevance.py', '/stance.py', '/verdict.py', '/re/')),
+    ('wait', ('/threading.py', '/concurrent/futures/', '/queue.py'))
+]
+
+# FactChecker methods that belong to a category; other frames of the
+# backend's own modules count as "other"
+CATEGORY_FUNCTIONS = {
+    'analyze_results': 'analyze',
+    'score_source': 'analyze',
+    'find_claim_context_sentences': 'analyze',
+    'extract_claim_keywords': 'analyze',
+    'extract_article_content': 'parse',
+    'parse_article': 'parse',
+    'parse_scholar_results': 'parse',
+    'parse_search_hits': 'parse'
+}
+
+CATEGORIES = [name for name, paths in CATEGORY_PATHS] + ['other']
+
+THREAD_NUMBER = re.compile(r'[-_]\d+')
+
+
+def categorize(frames):
+    """Category of a stack given as (path, function) pairs, innermost first"""
+    for path, function in frames:
+        if function in CATEGORY_FUNCTIONS:
+            return CATEGORY_FUNCTIONS[function]
+        path = path.replace(os.sep, '/')
+        for category, markers in CATEGORY_PATHS:
+            if any(marker in path for marker in markers):
+                return category
+        if os.path.dirname(os.path.abspath(path)) == BACKEND_DIR:
+            return 'other'
+    return 'other'
+
+
+class Profile:
+    """Stage timings and stack samples of one check"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.id = uuid.uuid4().hex[:12]
+        self.interval = interval
+        self.stages = {}
+        self.categories = Counter()
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._threads = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_stage(self, stage, seconds, provider=''):
+        name = f'{stage}:{provider}' if provider else stage
+        with self._lock:
+            calls, total, longest = self.stages.get(name, (0, 0.0, 0.0))
+            self.stages[name] = (calls + 1, total + seconds, max(longest, seconds))
+
+    @contextlib.contextmanager
+    def watching(self):
+        """Sample the current thread for the duration of the block"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+
+    def traced(self, fn):
+        """fn, with the thread that runs it sampled while it does"""
+        def run(*args, **kwargs):
+            with self.watching():
+                return fn(*args, **kwargs)
+        return run
+
+    @contextlib.contextmanager
+    def running(self):
+        """Profile the check made inside the block (and the work it hands off)"""
+        token = active_profile.set(self)
+        sampler = threading.Thread(target=self._sample_until_stopped, name='profiler', daemon=True)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            with self.watching():
+                yield self
+        finally:
+            self._stop.set()
+            sampler.join()
+            self.duration = time.perf_counter() - started
+            active_profile.reset(token)
+
+    def _sample_until_stopped(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        with self._lock:
+            idents = list(self._threads)
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name))
+                frame = frame.f_back
+            thread = THREAD_NUMBER.sub('', names.get(ident, 'thread'))
+            collapsed = ';'.join([thread] + [f'{os.path.basename(path)}:{function}'
+                                             for path, function in reversed(stack)])
+            with self._lock:
+                self.categories[categorize(stack)] += 1
+                self.stacks[collapsed] += 1
+
+    def summary(self):
+        """The breakdown returned with a profiled response"""
+        with self._lock:
+            stages = dict(self.stages)
+            categories = Counter(self.categories)
+        total = sum(categories.values())
+        return {
+            'id': self.id,
+            'duration_ms': round(self.duration * 1000, 1),
+            'stages': {
+                name: {'calls': calls, 'total_ms': round(seconds * 1000, 1), 'max_ms': round(longest * 1000, 1)}
+                for name, (calls, seconds, longest) in sorted(stages.items())
+            },
+            'samples': {
+                'interval_ms': self.interval * 1000,
+                'count': total,
+                'share': {category: round(categories[category] / total, 3) if total else 0.0
+                          for category in CATEGORIES}
+            }
+        }
+
+    def collapsed(self):
+        """Samples as collapsed stacks (flamegraph.pl / speedscope input)"""
+        with self._lock:
+            stacks = sorted(self.stacks.items())
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+
+class ProfileStore:
+    """The most recent profiles, for downloading their samples"""
+
+    def __init__(self, max_profiles=20):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
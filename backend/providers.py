@@ -0,0 +1,253 @@
+"""
+Registry of source providers, each behind its own circuit breaker.
+
+A Provider declares a name, the reliability of its sources, a deadline, a
+concurrency limit and a search function that works on either engine:
+search(checker, claim, fetch) returns the results from a FactChecker, or a
+coroutine of them from an AsyncFactChecker (the two share method names).
+New providers are added with ProviderRegistry.register.
+
+Every call is recorded in the provider's ProviderHealth. A call that
+raises, times out or returns nothing (a CAPTCHA page parses to no results)
+is a failure; after `failure_threshold` consecutive failures the breaker
+opens and the provider is skipped. Once `reset_timeout` seconds have passed
+one probe call is let through: success closes the breaker again, failure
+keeps it open for another reset_timeout.
+"""
+
+import threading
+import time
+from collections import deque
+
+from metrics import observe_stage
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes of one provider call
+OK = 'ok'
+EMPTY = 'empty'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+
+# Live status reported by /api/sources for each breaker state
+STATUS = {CLOSED: 'active', HALF_OPEN: 'probing', OPEN: 'unavailable'}
+
+
+class Provider:
+    """A source of evidence and the limits it runs under.
+
+    sources lists the (name, type) pairs the provider reports results as,
+    for /api/sources. timeout=None uses the checker's provider_timeout.
+    """
+
+    def __init__(self, name, search, message='', reliability=5, timeout=None, concurrency=8, sources=()):
+        self.name = name
+        self.search = search
+        self.message = message or f'Searching {name}...'
+        self.reliability = reliability
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.sources = list(sources)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go ahead now; may claim the half-open probe"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            self._probing = False
+            if success:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a probe whose call was abandoned before it finished"""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self):
+        """Seconds until an open breaker lets a probe through (0 otherwise)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class LatencyWindow:
+    """Durations of the most recent calls, for percentiles"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentiles(self, points=(50, 90, 99)):
+        """{'p50': ms, ...} by nearest rank, or None for each point without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        result = {}
+        for point in points:
+            if samples:
+                rank = max(0, -(-point * len(samples) // 100) - 1)
+                result[f'p{point}'] = round(samples[rank] * 1000, 1)
+            else:
+                result[f'p{point}'] = None
+        return result
+
+
+class ProviderHealth:
+    """Breaker, latency and outcome counters of one provider"""
+
+    def __init__(self, provider, failure_threshold, reset_timeout):
+        self.name = provider.name
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyWindow()
+        # Caps calls in flight from the sync engine; the async engine keeps
+        # its own asyncio.Semaphore of the same size
+        self.slots = threading.BoundedSemaphore(provider.concurrency)
+        self.outcomes = {OK: 0, EMPTY: 0, ERROR: 0, TIMEOUT: 0}
+        self.skipped = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        if self.breaker.allow():
+            return True
+        with self._lock:
+            self.skipped += 1
+        return False
+
+    def record(self, seconds, outcome, error=None):
+        self.latency.add(seconds)
+        observe_stage('provider', seconds, self.name)
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome != OK:
+                self.last_error = error or outcome
+        self.breaker.record(outcome == OK)
+
+    def stats(self):
+        with self._lock:
+            outcomes, skipped, last_error = dict(self.outcomes), self.skipped, self.last_error
+        return {
+            'status': STATUS[self.breaker.state],
+            'breaker': {
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.consecutive_failures,
+                'retry_in': round(self.breaker.retry_in(), 1)
+            },
+            'latency_ms': self.latency.percentiles(),
+            'calls': outcomes,
+            'skipped': skipped,
+            'last_error': last_error
+        }
+
+
+class ProviderCall:
+    """One call of a provider from the sync engine, recorded on its health
+    exactly once: by the thread running the search, or by the caller when
+    the call's deadline passes first. A search that never returns still
+    counts as a timeout on time."""
+
+    def __init__(self, health):
+        self.health = health
+        self.started = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Mark the search as running; False once the call was given up"""
+        with self._lock:
+            if self._finished:
+                return False
+            self.started = time.monotonic()
+            return True
+
+    def finish(self, outcome, error=None):
+        """Record the call, unless it already was. A call whose search never
+        started is not the provider's fault: its breaker probe is handed back."""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        if self.started is None:
+            self.health.breaker.release()
+        else:
+            self.health.record(time.monotonic() - self.started, outcome, error)
+
+
+def outcome_of(results, finished, deadline):
+    """Classify a call that returned results at monotonic time finished"""
+    if deadline is not None and finished > deadline:
+        return TIMEOUT
+    return OK if results else EMPTY
+
+
+class ProviderRegistry:
+    """Ordered providers by name, each with its ProviderHealth"""
+
+    def __init__(self, providers=(), failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._providers = {}
+        self._health = {}
+        for provider in providers:
+            self.register(provider)
+
+    def register(self, provider):
+        """Add (or replace) a provider; results are reported in registration order"""
+        self._providers[provider.name] = provider
+        self._health[provider.name] = ProviderHealth(provider, self.failure_threshold, self.reset_timeout)
+        return provider
+
+    def __iter__(self):
+        return iter(list(self._providers.values()))
+
+    def __getitem__(self, name):
+        return self._providers[name]
+
+    def health(self, name):
+        return self._health[name]
+
+    def stats(self):
+        """Declared limits and live health of every provider"""
+        return [
+            dict({
+                'name': provider.name,
+                'reliability': provider.reliability,
+                'timeout': provider.timeout,
+                'concurrency': provider.concurrency
+            }, **self._health[provider.name].stats())
+            for provider in self
+        ]
@@ -0,0 +1,99 @@
+"""
+Sentence relevance stage for analyze_results.
+
+A document is lower-cased and split into sentences once. Each claim keyword
+is then mapped to its postings, the set of sentences that contain it, and
+sentences whose postings reach the keyword threshold are kept.
+
+The result is the same relevance set as the original nested loop, which
+tested every keyword with `in` against every sentence. Keywords are runs of
+word characters and sentences are split on punctuation, so every
+occurrence of a keyword lies inside a single sentence. One str.find scan of
+the whole document per keyword therefore yields exactly the sentences that
+the `in` test accepts.
+
+A materialized token -> sentence index was measured as well. Tokenizing a
+5 000-character page with a regex alone costs more than the old nested loop
+in CPython, so postings are built per keyword with C-level str.find scans
+instead.
+
+With whole_words=True, a keyword only counts as a whole token ("flat" no
+longer matches "flatten"). Boundaries follow the regex \\b rules.
+"""
+
+from bisect import bisect_right
+from collections import Counter
+
+
+def _is_word_char(char):
+    # Matches the re module's \w for str patterns
+    return char.isalnum() or char == '_'
+
+
+class SentenceIndex:
+    """One document split into sentences, with keyword -> sentence postings"""
+
+    def __init__(self, content):
+        self.text = content.lower()
+
+        # Same sentences as re.split(r'[.!?]+', text), several times faster:
+        # runs of separators leave empty pieces, which only re.split's
+        # leading and trailing pieces may keep
+        pieces = self.text.replace('!', '.').replace('?', '.').split('.')
+        self.sentences = []
+        self.starts = []
+        offset = 0
+        last = len(pieces) - 1
+        for position, piece in enumerate(pieces):
+            if piece or position == 0 or position == last:
+                self.sentences.append(piece)
+                self.starts.append(offset)
+            offset += len(piece) + 1
+
+    def sentence_at(self, offset):
+        return bisect_right(self.starts, offset) - 1
+
+    def postings(self, keyword, whole_words=False):
+        """Ids of sentences containing keyword"""
+        found = set()
+        text = self.text
+        find = text.find
+        size = len(keyword)
+        offset = find(keyword)
+        while offset != -1:
+            if whole_words and (
+                (offset > 0 and _is_word_char(text[offset - 1])) or
+                (offset + size < len(text) and _is_word_char(text[offset + size]))
+            ):
+                offset = find(keyword, offset + 1)
+                continue
+
+            sentence = self.sentence_at(offset)
+            found.add(sentence)
+            # One hit per sentence is enough; skip to the next one
+            if sentence + 1 < len(self.starts):
+                offset = find(keyword, self.starts[sentence + 1])
+            else:
+                offset = -1
+        return found
+
+    def relevant_sentences(self, keywords, whole_words=False):
+        """Stripped sentences containing at least min(2, len(keywords)) keywords"""
+        needed = min(2, len(keywords))
+        if needed == 0:
+            return [sentence.strip() for sentence in self.sentences]
+
+        # A keyword repeated in the claim counts once per repetition, as in
+        # the original per-keyword loop
+        hits = Counter()
+        postings = {}
+        for keyword in keywords:
+            if keyword not in postings:
+                postings[keyword] = self.postings(keyword, whole_words)
+            hits.update(postings[keyword])
+
+        return [
+            self.sentences[sentence].strip()
+            for sentence in sorted(hits)
+            if hits[sentence] >= needed
+        ]
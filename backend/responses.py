@@ -0,0 +1,96 @@
+"""
+Response encoding shared by app.py and asgi.py: JSON text, compression and
+field projection.
+
+dumps() writes compact JSON with sorted keys, through orjson when it is
+installed and the json module otherwise. encode_body() compresses a body
+as the request's Accept-Encoding allows: brotli when the brotli package is
+installed and the client takes it, else gzip. Bodies shorter than
+MIN_COMPRESS_BYTES are sent as they are.
+
+Clients that only need the verdict can ask for less: ?fields=a,b keeps
+only those top-level fields of the body, and ?include_content=false leaves
+each source's full_content out (see parse_projection).
+"""
+
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies shorter than this gain less from compression than it costs
+MIN_COMPRESS_BYTES = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def dumps(value):
+    """Compact JSON text of value, keys sorted"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    """'br', 'gzip' or None: the compression to use for an Accept-Encoding header.
+    The coding with the higher q wins; brotli on a tie."""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get('*', 0.0)
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0.0
+    for coding in offers:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def encode_body(text, accept_encoding):
+    """(payload bytes, extra headers) for a response body of text"""
+    payload = text.encode('utf-8')
+    coding = negotiate_encoding(accept_encoding) if len(payload) >= MIN_COMPRESS_BYTES else None
+    if coding == 'br':
+        payload = brotli.compress(payload, quality=BROTLI_QUALITY)
+    elif coding == 'gzip':
+        payload = gzip.compress(payload, GZIP_LEVEL)
+    else:
+        return payload, {'Vary': 'Accept-Encoding'}
+    return payload, {'Content-Encoding': coding, 'Vary': 'Accept-Encoding'}
+
+
+def parse_projection(fields, include_content):
+    """(set of fields or None for all, include full_content?) from the
+    ?fields= and ?include_content= query values (None when absent)"""
+    names = {name.strip() for name in fields.split(',') if name.strip()} if fields else None
+    return names or None, (include_content or '').strip().lower() not in FALSE_VALUES
@@ -0,0 +1,112 @@
+"""
+Single-flight request coalescing.
+
+When several threads ask for the same key at once, only the first (the
+leader) runs the work. The others wait for it and receive the same result,
+or the same exception. AsyncSingleFlight does the same for coroutines on
+one event loop.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per in-flight key.
+
+        Returns (result, shared), where shared is True for callers that
+        waited on another thread's call instead of running fn themselves.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced_waiters': self.coalesced
+            }
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines sharing one event loop.
+
+    The leader's coroutine runs as its own task, so a caller that is
+    cancelled (a provider past its deadline) does not cancel the work for
+    the callers still waiting on it.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) once per in-flight key; returns (result, shared)"""
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key, task):
+        del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'coalesced_waiters': self.coalesced
+        }
@@ -0,0 +1,151 @@
+"""
+Compact records for the sources of a checked claim.
+
+A result keeps a dozen or so sources for as long as the verdict cache
+holds it, each with up to 5000 characters of article text. SourceRecord
+stores a source in __slots__ rather than a dict, and its article text
+zlib-compressed; the text is decompressed only when full_content is read.
+Scoring needs just the sentences that discuss the claim, which the record
+keeps once they have been found (see SourceRecord.relevant).
+
+The compressed texts come from a ContentStore keyed by the text itself,
+so an article met for several claims, and kept in several cached results,
+is held once.
+
+Records write themselves as JSON (to_json, to_submit_json), so responses
+are encoded straight from them without a dict per source.
+"""
+
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+# Keys of a provider's result dict, in the order SourceRecord.to_json writes them
+FIELDS = ('full_content', 'reliability_score', 'snippet', 'source', 'title', 'url')
+
+
+class SourceRecord:
+    """One source of a claim: a provider's result dict in compact form.
+
+    Reads like the dict it came from (record['url'], record.get('snippet')),
+    so code written for result dicts keeps working.
+    """
+
+    __slots__ = ('source', 'title', 'url', 'snippet', 'reliability_score', 'extra', 'relevant', '_content')
+
+    def __init__(self, source='', title='', url='', snippet='', reliability_score=5, content=None, extra=None):
+        self.source = source
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.reliability_score = reliability_score
+        # Any keys beyond FIELDS that a provider added, or None
+        self.extra = extra
+        # (claim keywords, sentences of the text that discuss them), once scored
+        self.relevant = None
+        self._content = content
+
+    @classmethod
+    def from_result(cls, result, store):
+        extra = {key: value for key, value in result.items() if key not in FIELDS} or None
+        return cls(result.get('source', ''), result.get('title', ''), result.get('url', ''),
+                   result.get('snippet', ''), result.get('reliability_score', 5),
+                   store.put(result.get('full_content') or ''), extra)
+
+    @property
+    def full_content(self):
+        return zlib.decompress(self._content).decode('utf-8') if self._content else ''
+
+    def size_hint(self):
+        """Approximate bytes held by this record, its shared text included"""
+        return (len(self._content or b'') + len(self.source) + len(self.title) + len(self.url)
+                + len(self.snippet) + sum(len(sentence) for sentence in (self.relevant or ((), ()))[1]))
+
+    def keys(self):
+        return FIELDS + tuple(self.extra or ())
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def to_json(self, dumps=json.dumps, include_content=True):
+        """The record as compact JSON (the dict it came from, keys sorted),
+        without full_content if include_content is false. dumps encodes
+        each value; extra values must be JSON-encodable."""
+        if self.extra:
+            keys = sorted(key for key in self.keys() if include_content or key != 'full_content')
+            return '{' + ','.join(f'{dumps(key)}:{dumps(self[key])}' for key in keys) + '}'
+        content = f'"full_content":{dumps(self.full_content)},' if include_content else ''
+        return (f'{{{content}"reliability_score":{dumps(self.reliability_score)},"snippet":{dumps(self.snippet)},'
+                f'"source":{dumps(self.source)},"title":{dumps(self.title)},"url":{dumps(self.url)}}}')
+
+    def to_submit_json(self, dumps=json.dumps):
+        """The record as a /submit source (see app.format_source)"""
+        return (f'{{"body":{dumps(self.snippet or "")},"link":{dumps(self.url or "")},'
+                f'"website":{dumps(self.source or "Unknown")}}}')
+
+    def __repr__(self):
+        return f'SourceRecord({self.source!r}, {self.url!r})'
+
+
+class ContentStore:
+    """Bounded LRU of zlib-compressed texts, keyed by a digest of the text.
+
+    put() returns the compressed bytes. A text already stored comes back as
+    the same bytes object, so every record of it shares one copy; eviction
+    only stops new records from sharing it.
+    """
+
+    def __init__(self, max_entries=4096, level=1):
+        self.max_entries = max_entries
+        self.level = level
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, text):
+        if not text:
+            return None
+        data = text.encode('utf-8')
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            compressed = self._texts.get(key)
+            if compressed is not None:
+                self._texts.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = zlib.compress(data, self.level)
+        with self._lock:
+            compressed = self._texts.setdefault(key, compressed)
+            while len(self._texts) > self.max_entries:
+                self._texts.popitem(last=False)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._texts),
+                'bytes': sum(len(compressed) for compressed in self._texts.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,171 @@
+"""
+Stance pattern matching for analyze_results.
+
+The support, contradiction and uncertainty patterns are compiled once at
+import time, and one pass over the text counts all three categories.
+
+The counts must equal summing re.findall(pattern, text, re.IGNORECASE) over
+every pattern. A plain alternation cannot give that: it consumes text, so
+matches of different patterns that overlap (for example "is not" and
+"not true" in "is not true") would be lost. Instead, this works like a
+keyword automaton.
+
+Every pattern starts with a word, so its matches can only begin where one
+of its leading words starts. One pass over the text's words looks each
+word up in a table of leading words. Only the patterns listed for that word
+are tried, anchored at that position. Each pattern keeps its own "next
+allowed start", so matches of one pattern never overlap, as with findall.
+A pattern with a greedy ".*" (head .* tail) matches at most once per line,
+so it is counted per line: a head followed by a tail on the same line.
+"""
+
+import re
+
+SUPPORT_PATTERNS = [
+    r'\b(is|are|was|were)\s+(true|correct|accurate|valid|confirmed|verified)\b',
+    r'\b(proves?|shows?|demonstrates?|confirms?|validates?)\s+that\b',
+    r'\b(evidence|research|studies|data)\s+(shows?|suggests?|indicates?|proves?)\b',
+    r'\b(indeed|in fact|actually|truly)\b',
+    r'\b(established|proven|documented)\s+(fact|truth)\b'
+]
+
+CONTRADICT_PATTERNS = [
+    r'\b(is|are|was|were)\s+(not|false|incorrect|inaccurate|untrue|wrong|fake)\b',
+    r'\b(no evidence|lacks evidence|unproven|unverified|unfounded|baseless)\b',
+    r'\b(myth|hoax|misconception|misinformation|disinformation)\b',
+    r'\b(debunked|refuted|disproven|contradicted|disputed)\b',
+    r'\b(however|but|although|despite)\b.*\b(not|false|incorrect)\b',
+    r'\bnot\s+(true|accurate|correct|valid|proven)\b'
+]
+
+UNCERTAINTY_PATTERNS = [
+    r'\b(unclear|unknown|uncertain|disputed|controversial|debated)\b',
+    r'\b(may|might|could|possibly|perhaps|potentially)\s+be\b',
+    r'\b(some|many|few)\s+(believe|think|claim|argue)\b',
+    r'\b(mixed|conflicting|varying)\s+(evidence|views|opinions)\b'
+]
+
+CATEGORIES = [
+    ('support', SUPPORT_PATTERNS),
+    ('contradict', CONTRADICT_PATTERNS),
+    ('uncertain', UNCERTAINTY_PATTERNS)
+]
+
+
+WORD = re.compile(r'\w+')
+LEADING_GROUP = re.compile(r'^\\b\(([^()]*)\)')
+LEADING_WORD = re.compile(r'^\\b(\w+)(?!\?)')
+
+
+def leading_words(pattern):
+    """Words a match of pattern can start with, or None if unknown"""
+    group = LEADING_GROUP.match(pattern)
+    if group:
+        words = set()
+        for alternative in group.group(1).split('|'):
+            word = re.match(r'(\w+)(\?)?', alternative)
+            if not word:
+                return None
+            if word.group(2):
+                # "proves?" may start as "prove" or "proves"
+                words.update([word.group(1), word.group(1)[:-1]])
+            elif len(word.group(1)) == len(alternative) or not alternative[len(word.group(1))].isalnum():
+                words.add(word.group(1))
+            else:
+                return None
+        return words
+
+    word = LEADING_WORD.match(pattern)
+    return {word.group(1)} if word else None
+
+
+class StanceMatcher:
+    """Counts support/contradict/uncertain pattern matches in one pass"""
+
+    def __init__(self, categories=CATEGORIES):
+        self.categories = [name for name, patterns in categories]
+        self.dispatch = {}
+        self.patterns = []
+        # Patterns whose leading words cannot be derived; run with findall
+        self.fallback = []
+
+        for name, patterns in categories:
+            for pattern in patterns:
+                if '.*' in pattern:
+                    head, tail = pattern.split('.*', 1)
+                    head_words, tail_words = leading_words(head), leading_words(tail)
+                    if head_words is None or tail_words is None:
+                        self.fallback.append((name, re.compile(pattern, re.IGNORECASE)))
+                        continue
+                    entry = ('span', name, len(self.patterns),
+                             re.compile(head, re.IGNORECASE), re.compile(tail, re.IGNORECASE))
+                    self._register(head_words | tail_words, entry)
+                else:
+                    words = leading_words(pattern)
+                    if words is None:
+                        self.fallback.append((name, re.compile(pattern, re.IGNORECASE)))
+                        continue
+                    entry = ('word', name, len(self.patterns), re.compile(pattern, re.IGNORECASE), None)
+                    self._register(words, entry)
+                self.patterns.append(entry)
+
+    def _register(self, words, entry):
+        for word in words:
+            self.dispatch.setdefault(word.lower(), []).append(entry)
+
+    def count(self, text):
+        """Return {category: match count}, identical to per-pattern re.findall"""
+        counts = dict.fromkeys(self.categories, 0)
+        # For word patterns: next allowed match start. For span patterns:
+        # 0 = waiting for a head, 1 = head seen on this line, 2 = counted
+        state = [0] * len(self.patterns)
+        spans = [entry[2] for entry in self.patterns if entry[0] == 'span']
+        line_end = text.find('\n')
+        dispatch = self.dispatch
+
+        for word in WORD.finditer(text):
+            token = word.group()
+            if token.isascii():
+                candidates = dispatch.get(token.lower())
+                if not candidates:
+                    continue
+            else:
+                # re.IGNORECASE folds some non-ASCII letters onto ASCII ones
+                # (dotted I, long s, Kelvin sign), so try every pattern
+                candidates = self.patterns
+
+            position = word.start()
+            if 0 <= line_end < position:
+                for index in spans:
+                    state[index] = 0
+                line_end = text.find('\n', position)
+
+            for kind, name, index, regex, tail in candidates:
+                if kind == 'word':
+                    if position >= state[index]:
+                        match = regex.match(text, position)
+                        if match:
+                            counts[name] += 1
+                            state[index] = match.end()
+                elif state[index] == 1:
+                    if tail.match(text, position):
+                        counts[name] += 1
+                        state[index] = 2
+                elif state[index] == 0 and regex.match(text, position):
+                    state[index] = 1
+
+        for name, regex in self.fallback:
+            counts[name] += len(regex.findall(text))
+
+        return counts
+
+
+def count_with_findall(text, categories=CATEGORIES):
+    """Reference implementation: one re.findall per pattern"""
+    return {
+        name: sum(len(re.findall(pattern, text, re.IGNORECASE)) for pattern in patterns)
+        for name, patterns in categories
+    }
+
+
+STANCE_MATCHER = StanceMatcher()
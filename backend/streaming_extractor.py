@@ -0,0 +1,370 @@
+"""
+Article extraction without building a document tree.
+
+StreamingExtractor runs BeautifulSoup's own html.parser tokenizer, so tags,
+entities and string types are exactly what BeautifulSoup would see. It does
+not build a tree from the events. It keeps a stack of open tag names and one
+running text per paragraph instead, and while the page streams past it:
+
+- skips everything inside IGNORED_TAGS, as if those elements were decomposed;
+- notes the first element matching each of ARTICLE_SELECTORS;
+- appends each stripped string to every open <p>, and each closed <p> to
+  the containers it sits in.
+
+Text is never kept beyond max_chars per paragraph or container, whatever the
+size of the page. Parsing stops as soon as the answer can no longer change:
+every higher-priority selector has matched and closed too short, and the
+winning container either has closed or already holds max_chars settled
+characters. The result is the same text extract_article_text(html,
+backend='html.parser') returns (test_extractor.py checks this on
+fixtures/pages/).
+
+Only simple selectors are supported: a tag name, a .class or an
+[attribute="value"].
+"""
+
+import codecs
+import re
+from collections import deque
+
+from bs4.builder._htmlparser import BeautifulSoupHTMLParser, HTMLParserTreeBuilder
+from bs4.dammit import UnicodeDammit
+from bs4.element import CData
+
+from parsing import ARTICLE_SELECTORS, IGNORED_TAGS, MIN_ARTICLE_CHARS
+
+# BeautifulSoup splits multi-valued attributes such as class on this
+CLASS_SPLIT = re.compile(r'\S+')
+
+# Bytes of a downloaded page buffered before its charset is chosen
+SNIFF_BYTES = 16 * 1024
+
+
+def _compile_selector(selector):
+    """Predicate over (tag name, attribute dict) for one simple CSS selector"""
+    if re.fullmatch(r'[a-z][a-z0-9-]*', selector):
+        return lambda name, attrs: name == selector
+    if re.fullmatch(r'\.[A-Za-z_][\w-]*', selector):
+        wanted = selector[1:]
+        return lambda name, attrs: wanted in CLASS_SPLIT.findall(attrs.get('class', ''))
+    match = re.fullmatch(r'\[([a-z][a-z0-9-]*)="([^"]*)"\]', selector)
+    if match:
+        # soupsieve compiles [attr="value"] to ^value$ with DOTALL
+        attribute, value = match.group(1), re.compile('^%s$' % re.escape(match.group(2)), re.DOTALL)
+        return lambda name, attrs: attribute in attrs and value.match(attrs[attribute]) is not None
+    raise ValueError(f"Unsupported selector for streaming extraction: {selector}")
+
+
+class _Settled(Exception):
+    """Raised inside the tokenizer once the extracted text is final"""
+
+
+class _Element:
+    """What the tokenizer needs back from handle_starttag"""
+
+    __slots__ = ('is_empty_element',)
+
+    def __init__(self, is_empty_element):
+        self.is_empty_element = is_empty_element
+
+
+VOID_ELEMENT = _Element(True)
+OPEN_ELEMENT = _Element(False)
+
+
+class _Paragraph:
+    """Stripped strings of one <p>, kept up to `cap` characters"""
+
+    __slots__ = ('text', 'length', 'closed', 'collectors')
+
+    def __init__(self, collectors):
+        self.text = ''
+        self.length = 0
+        self.closed = False
+        self.collectors = collectors
+
+
+class _Collector:
+    """' '.join of a container's paragraph texts, kept up to `cap` characters.
+
+    `length` is the exact length of the join so far. Paragraphs are folded
+    into `text` once they close, in document order.
+    """
+
+    __slots__ = ('text', 'length', 'count', 'folded', 'pending', 'closed')
+
+    def __init__(self):
+        self.text = ''
+        self.length = 0
+        self.count = 0
+        self.folded = 0
+        self.pending = deque()
+        self.closed = False
+
+    def add(self, paragraph):
+        if self.count:
+            self.length += 1
+        self.count += 1
+        self.pending.append(paragraph)
+
+    def fold(self, cap):
+        pending = self.pending
+        while pending and pending[0].closed:
+            paragraph = pending.popleft()
+            if len(self.text) < cap:
+                self.text = ((self.text + ' ' if self.folded else '') + paragraph.text)[:cap]
+            self.folded += 1
+
+    def settled_text(self, cap):
+        """The part of the final join that later markup cannot change"""
+        if not self.pending:
+            return self.text
+        # Only the first open paragraph can still grow, and only at its end
+        return ((self.text + ' ' if self.folded else '') + self.pending[0].text)[:cap]
+
+
+class StreamingExtractor:
+    """Incremental article extraction: feed() page text, then close().
+
+    It stands in for the BeautifulSoup object BeautifulSoupHTMLParser
+    reports to, implementing just the calls the tokenizer makes.
+    """
+
+    builder = HTMLParserTreeBuilder(store_line_numbers=False)
+    matchers = [_compile_selector(selector) for selector in ARTICLE_SELECTORS]
+    ignored_tags = frozenset(IGNORED_TAGS)
+
+    def __init__(self, max_chars=5000, original_encoding=None):
+        self.max_chars = max_chars
+        # beautifulsoup4 < 4.13 decodes &#128;-&#159; with the page's charset
+        self.original_encoding = original_encoding
+        # Anything past this length cannot make it into the result, but one
+        # more character decides the MIN_ARTICLE_CHARS comparison
+        self.cap = max(max_chars, MIN_ARTICLE_CHARS + 1)
+        self.contains_replacement_characters = False
+        self.result = None
+
+        self.stack = []
+        self.open_counts = {}
+        self.ignore_depth = 0
+        self.container_depth = 0
+        self.current_data = []
+        self.open_paragraphs = []
+        self.open_collectors = []
+        self.collectors = [None] * len(self.matchers)
+        self.all_paragraphs = _Collector()
+
+        try:
+            self.parser = BeautifulSoupHTMLParser(self, convert_charrefs=False)
+        except TypeError:
+            # beautifulsoup4 < 4.13 sets the soup after construction
+            self.parser = BeautifulSoupHTMLParser(convert_charrefs=False)
+            self.parser.soup = self
+
+    @property
+    def done(self):
+        """True once the result is final and further input would be ignored"""
+        return self.result is not None
+
+    def feed(self, markup):
+        """Parse the next piece of the page; returns True once done"""
+        if self.result is None:
+            try:
+                self.parser.feed(markup)
+            except _Settled:
+                pass
+        return self.result is not None
+
+    def close(self):
+        """Finish parsing and return the article text"""
+        if self.result is None:
+            try:
+                self.parser.close()
+                self.endData()
+                while self.stack:
+                    self._pop()
+                self.result = self._final_text()
+            except _Settled:
+                pass
+        return self.result
+
+    # BeautifulSoup's tree-building calls
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, sourceline=None, sourcepos=None, **kwargs):
+        self.endData()
+        ignored = name in self.ignored_tags
+        paragraph = collector = None
+
+        if ignored:
+            self.ignore_depth += 1
+        elif not self.ignore_depth:
+            if name == 'p':
+                # A container's own <p> is not one of its paragraphs
+                paragraph = _Paragraph([self.all_paragraphs] + self.open_collectors)
+                for owner in paragraph.collectors:
+                    owner.add(paragraph)
+                self.open_paragraphs.append(paragraph)
+            for index, matches in enumerate(self.matchers):
+                if self.collectors[index] is None and matches(name, attrs):
+                    if collector is None:
+                        collector = _Collector()
+                        self.open_collectors.append(collector)
+                    self.collectors[index] = collector
+
+        container = name in self.builder.string_containers
+        if container:
+            self.container_depth += 1
+        self.stack.append((name, ignored, container, paragraph, collector))
+        self.open_counts[name] = self.open_counts.get(name, 0) + 1
+
+        if name in self.builder.empty_element_tags:
+            return VOID_ELEMENT
+        return OPEN_ELEMENT
+
+    def handle_endtag(self, name, nsprefix=None):
+        self.endData()
+        if self.open_counts.get(name):
+            while self._pop() != name:
+                pass
+
+    def handle_data(self, data):
+        self.current_data.append(data)
+
+    def endData(self, containerClass=None):
+        if not self.current_data:
+            return
+        data = ''.join(self.current_data)
+        self.current_data = []
+
+        if self.ignore_depth or not self.open_paragraphs:
+            return
+        if containerClass is None:
+            # Strings inside <script>, <template> etc. are not NavigableStrings
+            if self.container_depth:
+                return
+        elif containerClass is not CData:
+            # Comments, doctypes and processing instructions
+            return
+
+        text = data.strip()
+        if not text:
+            return
+        for paragraph in self.open_paragraphs:
+            paragraph.length += len(text)
+            if len(paragraph.text) < self.cap:
+                paragraph.text = (paragraph.text + text)[:self.cap]
+            for owner in paragraph.collectors:
+                owner.length += len(text)
+        self._check_settled()
+
+    # Bookkeeping
+
+    def _pop(self):
+        name, ignored, container, paragraph, collector = self.stack.pop()
+        self.open_counts[name] -= 1
+        if ignored:
+            self.ignore_depth -= 1
+        if container:
+            self.container_depth -= 1
+        if paragraph is not None:
+            paragraph.closed = True
+            self.open_paragraphs.pop()
+            for owner in paragraph.collectors:
+                owner.fold(self.cap)
+        if collector is not None:
+            collector.closed = True
+            self.open_collectors.pop()
+        if paragraph is not None or collector is not None:
+            self._check_settled()
+        return name
+
+    def _final_text(self):
+        # The selector loop of parsing._extract_soup, on the collected texts
+        content = None
+        for collector in self.collectors:
+            if collector is not None:
+                content = collector
+                if collector.length > MIN_ARTICLE_CHARS:
+                    break
+        if content is None or content.length < MIN_ARTICLE_CHARS:
+            content = self.all_paragraphs
+        return content.text[:self.max_chars]
+
+    def _check_settled(self):
+        for collector in self.collectors:
+            if collector is None:
+                # This selector may still match further down the page
+                return
+            if collector.length > MIN_ARTICLE_CHARS:
+                return self._settle(collector)
+            if not collector.closed:
+                return
+        last = self.collectors[-1]
+        self._settle(last if last.length >= MIN_ARTICLE_CHARS else self.all_paragraphs)
+
+    def _settle(self, collector):
+        if collector.closed:
+            text = collector.text
+        else:
+            text = collector.settled_text(self.cap)
+            if len(text) < self.max_chars:
+                return
+        self.result = text[:self.max_chars]
+        raise _Settled()
+
+
+def extract_streaming(html, max_chars=5000):
+    """Extract the main article text from a page's HTML (bytes or str)"""
+    encoding = None
+    if isinstance(html, bytes):
+        dammit = UnicodeDammit(html, is_html=True)
+        html, encoding = dammit.unicode_markup or '', dammit.original_encoding
+    extractor = StreamingExtractor(max_chars, encoding)
+    extractor.feed(html)
+    return extractor.close()
+
+
+class ByteStreamExtractor:
+    """StreamingExtractor fed raw response bytes as they arrive.
+
+    The charset is chosen by UnicodeDammit, as BeautifulSoup would choose
+    it, but from the first SNIFF_BYTES of the page (or all of it, if
+    shorter). The rest is decoded incrementally with that charset.
+    """
+
+    def __init__(self, max_chars=5000):
+        self.max_chars = max_chars
+        self.head = b''
+        self.decoder = None
+        self.extractor = None
+
+    def feed(self, chunk):
+        """Parse the next chunk of the body; returns True once done"""
+        if self.decoder is None:
+            self.head += chunk
+            if len(self.head) < SNIFF_BYTES:
+                return False
+            return self._start(final=False)
+        return self.extractor.feed(self.decoder.decode(chunk))
+
+    def close(self):
+        """Finish parsing whatever was received and return the article text"""
+        if self.decoder is None:
+            self._start(final=True)
+        elif not self.extractor.done:
+            self.extractor.feed(self.decoder.decode(b'', final=True))
+        return self.extractor.close()
+
+    def _start(self, final):
+        sample = self.head
+        if not final:
+            # Cut after an ASCII '>' so a multi-byte character is not split
+            sample = sample[:sample.rfind(b'>') + 1] or sample
+        encoding = UnicodeDammit(sample, is_html=True).original_encoding or 'utf-8'
+        if codecs.lookup(encoding).name == 'utf-8':
+            # UnicodeDammit drops a byte order mark
+            encoding = 'utf-8-sig'
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.extractor = StreamingExtractor(self.max_chars, encoding)
+        head, self.head = self.head, b''
+        return self.extractor.feed(self.decoder.decode(head, final=final))
@@ -4,11 +4,15 @@ Test script for the Fact Checker API
 Run this after starting the server to test endpoints
 """
 
+import os
 import requests
 import json
 from time import sleep
 
-BASE_URL = "http://localhost:5000"
+BASE_URL = os.environ.get("API_URL", "http://localhost:5050")
+
+# A script run against a live server, not a pytest module
+__test__ = False
 
 def print_section(title):
     """Print a formatted section header"""
@@ -114,11 +118,9 @@ def main():
     """Run all tests"""
     print("\n🚀 Fact Checker API Test Suite")
     print("="*60)
-    print("Make sure the server is running on http://localhost:5000")
+    print(f"Make sure the server is running on {BASE_URL}")
     print("="*60)
     
-    input("\nPress Enter to start tests...")
-    
     # Test 1: Health Check
     health_ok = test_health()
     
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite article cache and its use by fetch_article_content.
+Run with: python -m pytest test_article_cache.py
+"""
+
+import sqlite3
+
+import pytest
+
+import article_cache
+from app import FactChecker
+from article_cache import ArticleCache
+from bench.stub_upstreams import StubUpstreams
+
+TEXT = "The committee published its findings on the bridge collapse. " * 40
+
+
+class Clock:
+    """Stands in for the time module, moved by hand"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(article_cache, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'nested' / 'articles.sqlite3')
+
+
+def test_round_trip_across_connections(cache_path):
+    writer = ArticleCache(cache_path)
+    writer.put('https://example.com/a', TEXT, etag='"abc"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+
+    # A second instance stands in for another server process
+    reader = ArticleCache(cache_path)
+    article = reader.get('https://example.com/a')
+    assert article.content == TEXT
+    assert article.conditional_headers() == {
+        'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+    assert reader.get('https://example.com/missing') is None
+    stats = reader.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+    # Stored compressed
+    assert stats['bytes'] < len(TEXT) / 4
+
+    assert sqlite3.connect(cache_path).execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_expiry_and_revalidation(cache_path, clock):
+    cache = ArticleCache(cache_path, fresh_ttl=60)
+    cache.put('https://example.com/a', TEXT)
+    assert cache.is_fresh(cache.get('https://example.com/a'))
+
+    clock.now += 61
+    stale = cache.get('https://example.com/a')
+    assert not cache.is_fresh(stale) and stale.content == TEXT
+
+    cache.revalidated('https://example.com/a')
+    assert cache.is_fresh(cache.get('https://example.com/a'))
+    assert cache.stats()['revalidations'] == 1
+
+
+def test_evicts_least_recently_used(cache_path, clock):
+    cache = ArticleCache(cache_path)
+    for index in range(3):
+        cache.put(f'https://example.com/{index}', f'{index} {TEXT}')
+        clock.now += cache.TOUCH_INTERVAL + 1
+    # Reading the oldest entry makes it recently used
+    cache.get('https://example.com/0')
+
+    cache.max_bytes = cache.total_bytes() - 1
+    assert cache.evict() == 1
+    assert cache.get('https://example.com/1') is None
+    assert cache.get('https://example.com/0') is not None and cache.get('https://example.com/2') is not None
+
+
+def test_fetch_uses_and_revalidates_cache(cache_path, clock):
+    with StubUpstreams(latency=0, article_latency=0, tail_ratio=0) as stub:
+        url = f'{stub.base_url}/article/reuters.com/story'
+        checker = FactChecker(article_cache=ArticleCache(cache_path, fresh_ttl=60))
+
+        text = checker.fetch_article_content(url)
+        assert text and stub.article_requests == 1
+
+        # Fresh: no request at all
+        assert checker.fetch_article_content(url) == text
+        assert stub.article_requests == 1
+
+        # Stale: a conditional request, answered 304, keeps the stored text
+        clock.now += 61
+        assert checker.fetch_article_content(url) == text
+        assert stub.article_requests == 2
+        assert checker.article_cache.stats()['revalidations'] == 1
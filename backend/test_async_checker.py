@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests that the asyncio engine returns what the threaded engine does,
+against the local stub upstreams, and that one host's politeness interval
+does not hold up downloads from other hosts.
+Run with: python -m pytest test_async_checker.py
+"""
+
+import asyncio
+
+import pytest
+
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+
+CLAIMS = ["The Earth is flat", "Water boils at 100 degrees", "The Eiffel Tower is in Paris"]
+
+
+def comparable(result):
+    """The parts of a check_claim result both engines must agree on"""
+    return {
+        'claim': result['claim'],
+        'analysis': result['analysis'],
+        'sources': [source.as_dict() for source in result['sources']],
+        'timed_out_providers': result['timed_out_providers'],
+        'skipped_providers': result['skipped_providers']
+    }
+
+
+def check_async(checker, claims, method='check_claim'):
+    async def run():
+        engine = AsyncFactChecker(checker)
+        try:
+            return await asyncio.gather(*(getattr(engine, method)(claim) for claim in claims))
+        finally:
+            await engine.aclose()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('batch_wikipedia', [True, False])
+def test_same_results_as_sync_engine(stub, batch_wikipedia):
+    expected = [make_checker(stub, batch_wikipedia=batch_wikipedia).check_claim(claim) for claim in CLAIMS]
+    results = check_async(make_checker(stub, batch_wikipedia=batch_wikipedia), CLAIMS)
+
+    assert [comparable(result) for result in results] == [comparable(result) for result in expected]
+    assert all(result['sources'] and any(source['full_content'] for source in result['sources'])
+               for result in results)
+
+
+def test_shares_the_verdict_cache(stub):
+    checker = make_checker(stub)
+    expected = checker.check_claim_cached(CLAIMS[0])
+    requests = stub.request_count
+
+    result, = check_async(checker, CLAIMS[:1], 'check_claim_cached')
+    assert result['cache'] == 'hit'
+    assert comparable(result) == comparable(expected)
+    assert stub.request_count == requests
+
+
+def test_throttled_host_does_not_hold_download_slots():
+    class Response:
+        status_code = 404
+
+    async def get(url, **kwargs):
+        return Response()
+
+    async def stream_article(url, headers, max_chars):
+        return Response(), None, None
+
+    async def run():
+        engine = AsyncFactChecker(FactChecker(), max_article_fetches=2)
+        engine.http.get = get
+        engine.stream_article = stream_article
+        engine.limiter.host_intervals['a.example'] = 1.0
+        done = {}
+
+        async def fetch(url):
+            await engine.fetch_article_content(url)
+            done[url] = loop.time() - start
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await asyncio.gather(*(fetch(f'https://a.example/{index}') for index in range(3)),
+                                 fetch('https://b.example/0'))
+        finally:
+            await engine.aclose()
+        return done
+
+    done = asyncio.run(run())
+    # a.example's later fetches wait out its interval without a download slot
+    assert done['https://b.example/0'] < 0.5
+    assert done['https://a.example/2'] >= 1.9
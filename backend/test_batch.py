@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for batch claim checking (FactChecker.check_claims and /submit/batch),
+against the local stub upstreams.
+Run with: python -m pytest test_batch.py
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from fetch_scheduler import FetchMemo
+from providers import Provider, ProviderRegistry
+
+CLAIMS = [
+    "The Earth is flat",
+    "Water boils at 100 degrees Celsius",
+    "the earth is FLAT!",
+    "The Eiffel Tower is in Paris",
+]
+
+
+@pytest.fixture
+def stub_options():
+    return {'article_pool': 4}
+
+
+def test_fetch_memo():
+    started = []
+    memo = FetchMemo(lambda url: started.append(url) or url.upper())
+    assert [memo.submit(url) for url in ['a', 'b', 'a', 'a']] == ['A', 'B', 'A', 'A']
+    assert started == ['a', 'b']
+    assert memo.stats() == {'requested': 4, 'fetched': 2}
+
+
+def test_results_in_input_order(stub):
+    checker = make_checker(stub)
+    progress = []
+    results = checker.check_claims(CLAIMS, progress=lambda done, total: progress.append((done, total)))
+
+    assert [result['claim'] for result in results] == CLAIMS
+    assert all('error' not in result for result in results)
+    # "the earth is FLAT!" normalizes like the first claim and is checked once
+    assert results[0]['analysis'] == results[2]['analysis']
+    assert checker.claim_flight.stats()['leaders'] == 3
+    assert progress[-1] == (4, 4)
+    assert [done for done, total in progress] == sorted(done for done, total in progress)
+
+
+def test_articles_fetched_once_per_batch(stub):
+    checker = make_checker(stub)
+    memo = FetchMemo(checker.fetch_scheduler.submit)
+    list(checker.check_claims_iter(CLAIMS, memo=memo))
+
+    stats = memo.stats()
+    assert stats['fetched'] < stats['requested']
+    assert stub.article_requests == stats['fetched']
+
+
+def test_partial_results_on_timeout(stub):
+    stub.latency = 1.0
+    checker = make_checker(stub, batch_concurrency=1)
+    results = checker.check_claims(CLAIMS[:2], timeout=0.2)
+
+    assert [result['claim'] for result in results] == CLAIMS[:2]
+    assert all(result['error'] == 'Timed out after 0.2s' for result in results)
+
+
+def slow_checker():
+    def search(checker, claim, fetch):
+        time.sleep(0.3)
+        return [{'source': 'Reuters', 'title': claim, 'url': f'https://www.reuters.com/{len(claim)}',
+                 'snippet': 'The flat Earth claim is false.', 'full_content': '', 'reliability_score': 9}]
+
+    async def search_async(checker, claim, fetch):
+        return await checker.offload(search, checker, claim, fetch)
+
+    checker = FactChecker(batch_concurrency=1)
+    checker.providers = ProviderRegistry([Provider('news', search)])
+    return checker, ProviderRegistry([Provider('news', search_async)])
+
+
+def cached_claims(checker, claims):
+    return [claim for claim in claims if checker.verdict_cache.get(checker.normalize_claim(claim))[1] != 'miss']
+
+
+def test_timeout_finishes_running_checks_in_background():
+    claims = ["The Earth is flat", "Water boils at 100 degrees"]
+    checker, _ = slow_checker()
+    results = checker.check_claims(claims, timeout=0.1)
+    assert [result['error'] for result in results] == ['Timed out after 0.1s'] * 2
+
+    # The check already running fills the cache; the queued one never ran
+    time.sleep(0.5)
+    assert cached_claims(checker, claims) == claims[:1]
+
+    checker, async_providers = slow_checker()
+    checker.providers = async_providers
+
+    async def run():
+        engine = AsyncFactChecker(checker)
+        try:
+            results = [result async for indexes, result in engine.check_claims_iter(claims, timeout=0.1)]
+            await asyncio.sleep(0.5)
+            return results
+        finally:
+            await engine.aclose()
+
+    assert [result['error'] for result in asyncio.run(run())] == ['Timed out after 0.1s'] * 2
+    assert cached_claims(checker, claims) == claims[:1]
+
+
+def test_async_matches_sync(stub):
+    sync_results = make_checker(stub).check_claims(CLAIMS)
+
+    async def run():
+        engine = AsyncFactChecker(make_checker(stub))
+        memo = FetchMemo(engine.submit_article)
+        results = [None] * len(CLAIMS)
+        try:
+            async for indexes, result in engine.check_claims_iter(CLAIMS, memo=memo):
+                for index in indexes:
+                    results[index] = dict(result, claim=CLAIMS[index])
+        finally:
+            await engine.aclose()
+        return results, memo.stats()
+
+    async_results, stats = asyncio.run(run())
+    assert [result['analysis'] for result in async_results] == [result['analysis'] for result in sync_results]
+    assert stats['fetched'] < stats['requested']
+
+
+def test_endpoint(stub, monkeypatch):
+    monkeypatch.setattr(flask_app, 'fact_checker', make_checker(stub))
+    client = flask_app.app.test_client()
+
+    assert client.post('/submit/batch', json={}).status_code == 400
+    assert client.post('/submit/batch', json={'messages': 'one claim'}).status_code == 400
+    assert client.post('/submit/batch', json={'messages': ['a claim'], 'timeout': -1}).status_code == 400
+
+    messages = CLAIMS + ['no']
+    body = client.post('/submit/batch', json={'messages': messages}).get_json()
+    assert [item['index'] for item in body['results']] == list(range(len(messages)))
+    assert [item['topic'] for item in body['results']] == messages
+    assert 'Message too short' in body['results'][-1]['error']
+    assert (body['total'], body['completed'], body['failed'], body['partial']) == (5, 4, 1, True)
+
+    response = client.post('/submit/batch', json={'messages': messages},
+                           headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1]['summary']['completed'] == 4
+    assert sorted(line['result']['index'] for line in lines[:-1]) == list(range(len(messages)))
+    assert [line['answered'] for line in lines[:-1]] == sorted(line['answered'] for line in lines[:-1])
+
+
+def test_asgi_endpoint(stub, monkeypatch):
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(make_checker(stub)))
+    messages = CLAIMS + ['no']
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            body = (await client.post('/submit/batch', json={'messages': messages})).json()
+            stream = await client.post('/submit/batch', json={'messages': messages},
+                                       headers={'Accept': 'application/x-ndjson'})
+        await asgi.checker.aclose()
+        return body, stream
+
+    body, stream = asyncio.run(run())
+    assert [item['topic'] for item in body['results']] == messages
+    assert (body['completed'], body['failed']) == (4, 1)
+    lines = [json.loads(line) for line in stream.text.splitlines()]
+    assert lines[-1]['summary']['completed'] == 4
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the recorded-upstream replay server, the recorder and the
+benchmark suite's baseline comparison.
+Run with: python -m pytest test_bench.py
+"""
+
+import pytest
+
+from bench.bench_suite import compare
+from bench.fixture_upstreams import FixtureUpstreams, Recordings, article_key
+from bench.page_fixtures import ARTICLES
+from bench.record_upstreams import Recorder
+from conftest import make_checker
+
+
+@pytest.fixture
+def upstreams():
+    server = FixtureUpstreams(latency=0, article_latency=0).start()
+    yield server
+    server.stop()
+
+
+def test_replays_closest_recording(upstreams):
+    result = make_checker(upstreams).check_claim("The Earth is flat 17")
+    by_source = {}
+    for source in result['sources']:
+        by_source.setdefault(source['source'], []).append(source)
+
+    assert [source['title'] for source in by_source['Wikipedia']] == [
+        'Flat Earth', 'Spherical Earth', 'Figure of the Earth'
+    ]
+    assert by_source['Wikipedia'][0]['full_content'].startswith('Flat Earth is an archaic')
+    # Recorded result links now lead back to the replay server
+    reuters = by_source['Reuters'][0]
+    assert reuters['url'].startswith(f"{upstreams.base_url}/article/www.reuters.com/")
+    assert reuters['full_content']
+    assert len(by_source['Google Scholar']) == 4
+    assert result['timed_out_providers'] == []
+
+
+def test_unbatched_wikipedia_extracts(upstreams):
+    checker = make_checker(upstreams)
+    checker.batch_wikipedia = False
+    results = checker.search_wikipedia("Water boils at 100 degrees Celsius")
+    assert [result['title'] for result in results] == ['Boiling point', 'Water', 'High-altitude cooking']
+    assert all(result['full_content'] for result in results)
+
+
+def test_each_article_url_has_its_own_page():
+    recordings = Recordings()
+    pages = [recordings.article(article_key(url)) for url in ARTICLES]
+    assert len(set(pages)) == len(ARTICLES) == len(recordings.articles)
+    for url, page in zip(ARTICLES, pages):
+        layout, topic, own = ARTICLES[url]
+        assert all(sentence in page for sentence in own), url
+
+
+def test_recordings_round_trip(upstreams, tmp_path):
+    recorder = Recorder(str(tmp_path))
+    checker = make_checker(upstreams)
+    checker.stream_articles = False
+    checker.http.get = recorder.wrap(checker.http.get)
+    recorded_result = checker.check_claim("The Eiffel Tower was completed in 1889")
+    recorder.save()
+
+    recordings = Recordings(str(tmp_path))
+    assert list(recordings.queries['wikipedia']) == ['the eiffel tower was completed in 1889']
+    assert len(recordings.queries['duckduckgo']) == 5
+    assert len(recordings.queries['scholar']) == 1
+    assert recordings.articles
+
+    with FixtureUpstreams(latency=0, article_latency=0, directory=str(tmp_path)) as replay:
+        replayed = make_checker(replay).check_claim("The Eiffel Tower was completed in 1889")
+    assert replayed['source_count'] == recorded_result['source_count']
+    assert replayed['analysis']['verdict'] == recorded_result['analysis']['verdict']
+
+
+def test_compare_with_baseline():
+    baseline = {'results': {'flask': {'claims_per_s': 10.0, 'p50': 1.0, 'p90': 2.0, 'p99': 4.0, 'peak_rss_mb': 100.0}}}
+    results = {
+        'flask': {'claims_per_s': 12.0, 'p50': 1.0, 'p90': 2.0, 'p99': 5.0, 'peak_rss_mb': 90.0},
+        'asgi': {'claims_per_s': 20.0}
+    }
+    [line] = compare(results, baseline)
+    assert line.startswith('flask')
+    assert 'claims_per_s 10 -> 12 (+20.0%, better)' in line
+    assert 'p99 4 -> 5 (+25.0%)' in line
+    assert 'peak_rss_mb 100 -> 90 (-10.0%, better)' in line
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for SimHash near-duplicate detection and the collapsing of
+syndicated sources before scoring.
+Run with: python -m pytest test_dedup.py
+"""
+
+import asyncio
+import random
+
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from dedup import MAX_DISTANCE, FingerprintCache, SourceDeduper, distance, simhash
+from providers import Provider, ProviderRegistry
+
+
+def random_text(seed, words=200):
+    rng = random.Random(seed)
+    return ' '.join(f'w{rng.randrange(5000)}' for _ in range(words))
+
+
+# A wire story of realistic length: a lead that discusses the claim, then
+# body text
+WIRE_STORY = ("Scientists have debunked the myth that the Earth is flat, the agency said on Tuesday. "
+              + random_text(99, 400))
+
+
+def syndicated(text):
+    """text as another outlet runs it: own byline and footer, one word changed"""
+    return f"By Staff Writer. {text.replace('Tuesday', 'Wednesday')} Copyright 2026 Example Outlet."
+
+
+def source(name, url, content):
+    return {'source': name, 'title': name, 'url': url, 'snippet': '', 'full_content': content,
+            'reliability_score': 9}
+
+
+def test_simhash_distances():
+    words = WIRE_STORY.lower().split()
+    assert distance(simhash(words), simhash(syndicated(WIRE_STORY).lower().split())) <= MAX_DISTANCE
+    unrelated = [distance(simhash(random_text(seed).split()), simhash(random_text(seed + 100).split()))
+                 for seed in range(20)]
+    assert min(unrelated) > 2 * MAX_DISTANCE
+    assert simhash([]) == 0
+
+
+def test_fingerprint_cache():
+    cache = FingerprintCache(max_entries=2)
+    fingerprint = cache.fingerprint(WIRE_STORY)
+    assert cache.fingerprint(WIRE_STORY) == fingerprint
+    assert cache.fingerprint('Too short to compare.') is None
+    cache.fingerprint(random_text(1))
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 3}
+
+
+def test_deduper():
+    dedupe = SourceDeduper(FingerprintCache())
+    results = [
+        source('Associated Press', 'https://apnews.com/article/flat-earth', WIRE_STORY),
+        source('Web Search', 'https://www.apnews.com/article/flat-earth/', ''),
+        source('Web Search', 'https://localpaper.example/news/flat-earth', syndicated(WIRE_STORY)),
+        source('Reuters', 'https://reuters.com/science/other', random_text(7)),
+        source('Google Scholar', '', ''),
+        source('Google Scholar', '', '')
+    ]
+    assert [result['source'] for result in dedupe.unique(results)] == [
+        'Associated Press', 'Reuters', 'Google Scholar', 'Google Scholar'
+    ]
+    assert dedupe.collapsed == 2
+
+
+def wire_checker():
+    def news(checker, claim, fetch):
+        return [source('Associated Press', 'https://apnews.com/article/flat-earth', WIRE_STORY)]
+
+    def web(checker, claim, fetch):
+        return [source('Web Search', 'https://localpaper.example/flat-earth', syndicated(WIRE_STORY)),
+                source('Web Search', 'https://other.example/flat-earth', syndicated(syndicated(WIRE_STORY)))]
+
+    async def news_async(checker, claim, fetch):
+        return news(checker, claim, fetch)
+
+    async def web_async(checker, claim, fetch):
+        return web(checker, claim, fetch)
+
+    checker = FactChecker()
+    checker.providers = ProviderRegistry([Provider('news', news), Provider('web', web)])
+    async_providers = ProviderRegistry([Provider('news', news_async), Provider('web', web_async)])
+    return checker, async_providers
+
+
+def test_syndicated_story_counted_once():
+    checker, async_providers = wire_checker()
+    result = checker.check_claim("The Earth is flat")
+    assert [source['source'] for source in result['sources']] == ['Associated Press']
+    assert result['analysis']['stats'] == {'supporting': 0, 'contradicting': 1, 'neutral': 0, 'total': 1}
+
+    events = list(checker.check_claim_stream("Is the Earth flat"))
+    assert [event for event, data in events] == ['source', 'result']
+
+    checker.providers = async_providers
+    engine = AsyncFactChecker(checker)
+
+    async def run():
+        try:
+            return await engine.check_claim("The Earth is flat")
+        finally:
+            await engine.aclose()
+
+    assert asyncio.run(run())['source_count'] == 1
+    # Each text was fingerprinted once
+    assert checker.fingerprints.stats()['misses'] == 3
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for size- and time-bounded article downloads, against a local server.
+Run with: python -m pytest test_downloads.py
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from parsing import extract_article_text
+
+PARAGRAPH = "<p>" + "The committee published its findings on the bridge collapse. " * 4 + "</p>"
+
+PAGES = {
+    # Article text first, then megabytes of comments
+    '/long': ("<html><body><article>" + PARAGRAPH * 100 + "</article>"
+              + "<div class='comments'>" + PARAGRAPH * 8000 + "</div></body></html>"),
+    # No container: every <p> on the page counts, so only the budget stops it
+    '/flat': "<html><body>" + PARAGRAPH * 8000 + "</body></html>",
+    '/short': "<html><body><article>" + PARAGRAPH * 3 + "</article></body></html>",
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/trickle':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', '100000')
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b'<p>slow</p>')
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+            return
+
+        if self.path == '/report.pdf':
+            payload, content_type = b'%PDF-1.7' + b'\0' * 500000, 'application/pdf'
+        else:
+            payload, content_type = PAGES[self.path].encode('utf-8'), 'text/html; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except OSError:
+            pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def limited_checker(**kwargs):
+    """A FactChecker with download limits small enough for the test pages"""
+    kwargs.setdefault('max_article_bytes', 256 * 1024)
+    kwargs.setdefault('article_deadline', 5)
+    return make_checker(**kwargs)
+
+
+def stream_both(checker, url):
+    """(text, stop reason) from the sync and the async engine"""
+    response, text, reason = checker.stream_article(url)
+
+    async def run():
+        engine = AsyncFactChecker(checker)
+        try:
+            response, text, reason = await engine.stream_article(url)
+            return text, reason
+        finally:
+            await engine.aclose()
+
+    return (text, reason), asyncio.run(run())
+
+
+def test_stops_once_text_is_settled(base_url):
+    checker = limited_checker()
+    expected = extract_article_text(PAGES['/long'])
+    for text, reason in stream_both(checker, f"{base_url}/long"):
+        assert (text, reason) == (expected, 'enough')
+    assert checker.downloads.stats()['bytes_read'] < 2 * 256 * 1024
+
+
+def test_whole_small_page(base_url):
+    checker = limited_checker()
+    expected = extract_article_text(PAGES['/short'])
+    for text, reason in stream_both(checker, f"{base_url}/short"):
+        assert (text, reason) == (expected, 'complete')
+
+
+def test_byte_budget(base_url):
+    checker = limited_checker(max_article_bytes=64 * 1024)
+    for text, reason in stream_both(checker, f"{base_url}/flat"):
+        assert reason == 'max_bytes'
+        assert text == extract_article_text(PAGES['/flat'])
+    assert checker.downloads.stats()['bytes_read'] == 2 * 64 * 1024
+
+
+def test_deadline(base_url):
+    checker = limited_checker(article_deadline=0.5)
+    started = time.monotonic()
+    for text, reason in stream_both(checker, f"{base_url}/trickle"):
+        assert reason == 'deadline'
+        assert text.startswith('slow')
+    assert time.monotonic() - started < 3
+
+
+def test_skips_non_html(base_url):
+    checker = limited_checker()
+    for text, reason in stream_both(checker, f"{base_url}/report.pdf"):
+        assert (text, reason) == ('', 'not_html')
+    assert checker.downloads.stats() == {'bytes_read': 0, 'stopped': {'not_html': 2}}
+
+
+def test_buffered_backend(base_url):
+    """Non-streaming backends still get the budgeted body in one piece"""
+    checker = limited_checker(parser_backend='html.parser')
+    expected = extract_article_text(PAGES['/short'])
+    for text, reason in stream_both(checker, f"{base_url}/short"):
+        assert (text, reason) == (expected, 'complete')
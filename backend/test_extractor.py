@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the streaming article extractor.
+Run with: python -m pytest test_extractor.py
+"""
+
+import glob
+import os
+import random
+
+from parsing import extract_article_text
+from streaming_extractor import StreamingExtractor, extract_streaming
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+LIMITS = [100, 200, 201, 1000, 5000, 10 ** 6]
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'rb') as handle:
+            pages[os.path.basename(path)] = handle.read()
+    return pages
+
+
+def test_saved_pages():
+    """Same text as the BeautifulSoup extractor on every saved page and limit"""
+    pages = load_pages()
+    assert pages, f"no pages in {PAGES_DIR}; run python -m bench.page_fixtures"
+    for name, html in pages.items():
+        for max_chars in LIMITS:
+            assert extract_streaming(html, max_chars) == extract_article_text(html, max_chars), (name, max_chars)
+
+
+def test_edge_cases():
+    """Nesting, void and stray end tags, CDATA, string containers, unclosed ignored tags"""
+    long_text = 'word ' * 60
+    cases = [
+        '',
+        '<p>only</p>',
+        f'<article><p>short</p></article><div class="story-body"><p>{long_text}</p></div>',
+        f'<article><p>{long_text}<p>nested {long_text}</p> tail</p></article>',
+        f'<main role="main"><p>{long_text}</p></main>',
+        f'<div role="main\n"><p>{long_text}</p></div><p>outside</p>',
+        f'<div class=" x  article-body "><p>{long_text}<br>after</br> break</p></div>',
+        f'<article><p>a<![CDATA[cdata]]>b<!-- comment --></p><p><template>t</template>{long_text}</p></article>',
+        f'<p>before<script>var x = "<p>";</script>after</p><nav><p>{long_text}</p></nav>',
+        f'<header><p>{long_text}',
+        f'<article><p>{"x" * 200}</p></article><p>fallback</p>',
+        f'<article><p>{"x" * 199}</p></article><p>fallback</p>',
+        f'<p>&amp;&#169;&#128;&nbsp;{long_text}<p/><p>{long_text}',
+    ]
+    for html in cases:
+        for max_chars in LIMITS:
+            assert extract_streaming(html, max_chars) == extract_article_text(html, max_chars), (html[:60], max_chars)
+
+
+def test_random_markup():
+    """Tag soup mixing containers, ignored tags, entities and markup declarations"""
+    tags = ['p', 'p', 'div', 'article', 'main', 'section', 'span', 'br', 'img', 'hr',
+            'script', 'style', 'nav', 'header', 'footer', 'aside', 'template', 'rt']
+    attributes = ['', '', ' class="article-body"', ' class="x story-body"', ' role="main"',
+                  ' class="entry-content"', ' class="ARTICLE-CONTENT"', ' ROLE="main"']
+    texts = ['lorem ipsum', ' ', '\n', 'a &amp; b', '&#169;', '&nbsp;x', 'y' * 120, '<!-- c -->',
+             '<![CDATA[cd]]>', '<!DOCTYPE html>', '<?pi?>', '</br>', '<p/>', '<br/>']
+    rng = random.Random(2026)
+
+    for _ in range(1000):
+        pieces = []
+        for _ in range(rng.randint(5, 120)):
+            roll = rng.random()
+            if roll < 0.35:
+                pieces.append(f'<{rng.choice(tags)}{rng.choice(attributes)}>')
+            elif roll < 0.6:
+                pieces.append(f'</{rng.choice(tags)}>')
+            else:
+                pieces.append(rng.choice(texts))
+        html = ''.join(pieces)
+        max_chars = rng.choice(LIMITS)
+        assert extract_streaming(html, max_chars) == extract_article_text(html, max_chars), (html, max_chars)
+
+
+def test_stops_once_settled():
+    """Input after a long enough <article> is never parsed"""
+    extractor = StreamingExtractor(max_chars=100)
+    # The text is handed over at the next tag, here <br>
+    assert extractor.feed('<article><p>' + 'word ' * 60 + '<br>')
+    assert extractor.feed('<p>ignored</p>' * 1000)
+    assert extractor.close() == ('word ' * 60)[:100]
+
+
+def test_incremental_feed():
+    """Feeding a page in small pieces gives the same text as one feed"""
+    for name, html in load_pages().items():
+        text = html.decode('utf-8', 'replace')
+        extractor = StreamingExtractor()
+        for start in range(0, len(text), 997):
+            if extractor.feed(text[start:start + 997]):
+                break
+        assert extractor.close() == extract_streaming(text), name
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent provider fan-out and its deadlines.
+Run with: python -m pytest test_fanout.py
+"""
+
+import time
+
+from conftest import make_checker
+from providers import Provider
+
+CLAIM = "The Earth is flat"
+
+
+def results(name, count=1):
+    return [{'source': name, 'title': f'{name} {index}', 'url': f'https://{name}.example/{index}',
+             'snippet': f'{name} says the Earth is round.', 'full_content': '', 'reliability_score': 8}
+            for index in range(count)]
+
+
+def sleeping(name, seconds, count=1):
+    def search(checker, claim, fetch):
+        time.sleep(seconds)
+        return results(name, count)
+    return search
+
+
+def urls(result):
+    return [source['url'] for source in result['sources']]
+
+
+def test_providers_run_at_once_in_registry_order():
+    checker = make_checker(providers=[
+        Provider('first', sleeping('first', 0.3)),
+        Provider('second', sleeping('second', 0.1, count=2)),
+        Provider('third', sleeping('third', 0.2))
+    ])
+    started = time.monotonic()
+    result = checker.check_claim(CLAIM)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    # Reported in registry order, not in the order they finished
+    assert urls(result) == urls({'sources': results('first') + results('second', 2) + results('third')})
+    assert result['timed_out_providers'] == []
+
+
+def test_slow_provider_times_out():
+    checker = make_checker(providers=[
+        Provider('fast', sleeping('fast', 0)),
+        Provider('slow', sleeping('slow', 1), timeout=0.2)
+    ])
+    started = time.monotonic()
+    result = checker.check_claim(CLAIM)
+
+    assert time.monotonic() - started < 0.6
+    assert result['timed_out_providers'] == ['slow']
+    assert urls(result) == ['https://fast.example/0']
+
+
+def test_request_budget_caps_every_provider():
+    checker = make_checker(providers=[
+        Provider('fast', sleeping('fast', 0)),
+        Provider('slow', sleeping('slow', 1), timeout=5)
+    ], request_budget=0.2)
+    assert checker.provider_deadline(checker.providers['slow']) == 0.2
+
+    started = time.monotonic()
+    result = checker.check_claim(CLAIM)
+    assert time.monotonic() - started < 0.6
+    assert result['timed_out_providers'] == ['slow']
+
+
+def test_failing_provider_does_not_sink_the_others():
+    def broken(checker, claim, fetch):
+        raise RuntimeError('upstream exploded')
+
+    checker = make_checker(providers=[Provider('broken', broken), Provider('fine', sleeping('fine', 0))])
+    result = checker.check_claim(CLAIM)
+    assert urls(result) == ['https://fine.example/0']
+    assert result['timed_out_providers'] == []
+    assert checker.providers.health('broken').outcomes['error'] == 1
+
+
+def test_sequential_mode_matches_fanout():
+    providers = [Provider('first', sleeping('first', 0.05)), Provider('second', sleeping('second', 0, count=2))]
+    fanned = make_checker(providers=providers).check_claim(CLAIM)
+    sequential = make_checker(providers=providers, fanout=False).check_claim(CLAIM)
+    assert urls(sequential) == urls(fanned)
+    assert sequential['analysis'] == fanned['analysis']
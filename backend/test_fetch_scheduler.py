@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for per-host politeness in the article fetch scheduler.
+Run with: python -m pytest test_fetch_scheduler.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from fetch_scheduler import FetchScheduler
+
+
+class Recorder:
+    """A fetch function that notes when each URL was fetched"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.times = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        with self._lock:
+            self.times[url] = time.monotonic() - self.started
+        return f'page {url}'
+
+
+def test_idle_host_is_not_delayed():
+    fetch = Recorder()
+    scheduler = FetchScheduler(fetch, max_workers=2, min_interval=0.5)
+    busy = [scheduler.submit(f'https://www.reuters.com/{index}') for index in range(6)]
+    idle = scheduler.submit('https://www.bbc.com/news')
+
+    assert idle.result(timeout=5) == 'page https://www.bbc.com/news'
+    # Queued reuters URLs wait for their host without holding a worker
+    assert fetch.times['https://www.bbc.com/news'] < 0.2
+    assert [future.result(timeout=5) for future in busy][-1] == 'page https://www.reuters.com/5'
+
+
+def test_same_host_is_spaced():
+    fetch = Recorder()
+    scheduler = FetchScheduler(fetch, max_workers=4, min_interval=0.1, host_intervals={'fast.example': 0})
+    assert scheduler.fetch_all([f'https://slow.example/{index}' for index in range(3)] +
+                               [f'https://fast.example/{index}' for index in range(3)])[0] == 'page https://slow.example/0'
+
+    slow = sorted(fetch.times[f'https://slow.example/{index}'] for index in range(3))
+    assert all(later - earlier >= 0.09 for earlier, later in zip(slow, slow[1:]))
+    assert max(fetch.times[f'https://fast.example/{index}'] for index in range(3)) < 0.1
+
+
+def test_errors_reach_the_caller():
+    def fetch(url):
+        raise ValueError(f'cannot fetch {url}')
+
+    future = FetchScheduler(fetch, min_interval=0).submit('https://broken.example/')
+    with pytest.raises(ValueError, match='cannot fetch https://broken.example/'):
+        future.result(timeout=5)
+
+
+def test_fetch_fails_once_the_pool_is_shut_down():
+    fetch = Recorder()
+    scheduler = FetchScheduler(fetch, max_workers=1, min_interval=0)
+    assert scheduler.submit('https://www.reuters.com/0').result(timeout=5)
+    scheduler.pool.shutdown()
+
+    with pytest.raises(RuntimeError, match='shutdown'):
+        scheduler.submit('https://www.reuters.com/1').result(timeout=5)
+    assert 'https://www.reuters.com/1' not in fetch.times
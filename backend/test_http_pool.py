@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled HTTP sessions' retry policy, against a local server
+that answers 429 with a long Retry-After.
+Run with: python -m pytest test_http_pool.py
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from async_checker import AsyncPooledSession
+from http_pool import RETRY_AFTER_MAX, CappedRetry, PooledSession
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        # Throttled on every odd request: one 429 per call, then the page
+        if self.server.requests % 2:
+            self.send_response(429)
+            self.send_header('Retry-After', '3600')
+            payload = b'slow down'
+        else:
+            self.send_response(200)
+            payload = b'results'
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/search'
+
+
+def test_retry_after_is_capped():
+    retry = CappedRetry(total=2)
+    assert retry.parse_retry_after('3600') == RETRY_AFTER_MAX
+    assert retry.parse_retry_after('1') == 1
+    # The cap survives the copies urllib3 makes on each retry
+    assert retry.new(total=1).parse_retry_after('3600') == RETRY_AFTER_MAX
+
+
+def test_session_retries_after_capped_wait(server):
+    session = PooledSession(max_retry_after=0.2)
+    started = time.monotonic()
+    response = session.get(url(server))
+    assert time.monotonic() - started < 1
+    assert (response.status_code, response.content) == (200, b'results')
+    assert server.requests == 2
+
+
+def test_async_session_retries_after_capped_wait(server):
+    session = AsyncPooledSession(max_retry_after=0.2)
+
+    async def run():
+        try:
+            return await session.get(url(server))
+        finally:
+            await session.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(run())
+    assert time.monotonic() - started < 1
+    assert (response.status_code, response.content) == (200, b'results')
+    assert server.requests == 2
+    throttled = httpx.Response(429, headers={'Retry-After': '3600'})
+    assert AsyncPooledSession()._backoff(throttled, 0) == RETRY_AFTER_MAX
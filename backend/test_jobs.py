@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent background job queue and the /api/jobs endpoints.
+Run with: python -m pytest test_jobs.py
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobRunner, QueueFull
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def test_priority_then_age(queue_path):
+    queue = JobQueue(queue_path)
+    low = queue.submit('low priority claim', priority=1)
+    first = queue.submit('first urgent claim', priority=8)
+    second = queue.submit('second urgent claim', priority=8)
+
+    assert queue.get(low)['position'] == 2
+    assert [queue.take()[0] for _ in range(3)] == [first, second, low]
+    assert queue.take() is None
+    assert queue.stats() == {QUEUED: 0, RUNNING: 3, DONE: 0, FAILED: 0}
+
+
+def test_bounded(queue_path):
+    queue = JobQueue(queue_path, max_queued=2)
+    queue.submit('claim one')
+    queue.submit('claim two')
+    with pytest.raises(QueueFull):
+        queue.submit('claim three')
+
+    # Running jobs do not count against the bound
+    queue.take()
+    queue.submit('claim three')
+
+
+def test_survives_restart(queue_path):
+    job_id = JobQueue(queue_path).submit('queued before a restart')
+    reopened = JobQueue(queue_path)
+    assert reopened.take() == (job_id, 'queued before a restart')
+
+
+def test_expired_lease_requeues(queue_path):
+    queue = JobQueue(queue_path, lease=0, max_attempts=2)
+    job_id = queue.submit('worker crashed on this one')
+    assert queue.take()[0] == job_id
+    # The first worker died without finishing; the lease is already over
+    assert queue.take()[0] == job_id
+    assert queue.take() is None
+    job = queue.get(job_id)
+    assert (job['status'], job['attempts']) == (FAILED, 2)
+
+
+def test_result_round_trip_and_wait(queue_path):
+    queue = JobQueue(queue_path)
+    job_id = queue.submit('a claim to finish')
+    queue.take()
+    threading.Timer(0.2, queue.finish, args=(job_id, {'verdict': 'LIKELY_TRUE'})).start()
+
+    job = queue.wait(job_id, timeout=5)
+    assert job['status'] == DONE
+    assert job['result'] == {'verdict': 'LIKELY_TRUE'}
+    assert queue.wait('no-such-job', timeout=0.1) is None
+
+
+def test_runner_records_failures(queue_path):
+    queue = JobQueue(queue_path)
+
+    def run(claim):
+        if 'bad' in claim:
+            raise ValueError('scraper exploded')
+        return {'claim': claim}
+
+    JobRunner(queue, run, workers=2).ensure_started()
+    good, bad = queue.submit('a good claim'), queue.submit('a bad claim')
+    assert queue.wait(good, timeout=5)['result'] == {'claim': 'a good claim'}
+    assert queue.wait(bad, timeout=5)['error'] == 'Internal server error: scraper exploded'
+
+
+def test_server_runner_is_built_on_first_request(queue_path, monkeypatch):
+    monkeypatch.setenv('JOB_QUEUE_PATH', queue_path)
+    monkeypatch.setenv('JOB_WORKERS', '0')
+    monkeypatch.setattr(flask_app, 'job_runner', None)
+    client = flask_app.app.test_client()
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+    runner = flask_app.job_runner
+    assert runner.queue.path == queue_path and runner.workers == 0
+    assert flask_app.get_job_runner() is runner
+
+
+@pytest.fixture
+def patched_app(queue_path, monkeypatch):
+    queue = JobQueue(queue_path, max_queued=3)
+    runner = JobRunner(queue, lambda claim: {'claim': claim, 'verdict': 'LIKELY_TRUE'}, workers=1)
+    monkeypatch.setattr(flask_app, 'job_runner', runner)
+    return queue, runner
+
+
+def test_flask_endpoints(patched_app):
+    client = flask_app.app.test_client()
+    assert client.post('/api/jobs', json={'claim': 'ok', 'priority': 3}).status_code == 400
+    assert client.post('/api/jobs', json={'claim': 'The Earth is flat', 'priority': 10}).status_code == 400
+
+    response = client.post('/api/jobs', json={'claim': 'The Earth is flat', 'priority': 7})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert response.headers['Location'] == f'/api/jobs/{job_id}'
+
+    body = client.get(f'/api/jobs/{job_id}?wait=5').get_json()
+    assert body['status'] == DONE
+    assert body['result'] == {'claim': 'The Earth is flat', 'verdict': 'LIKELY_TRUE'}
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+
+def test_flask_backpressure(patched_app):
+    queue, runner = patched_app
+    runner.workers = 0
+    client = flask_app.app.test_client()
+    for _ in range(3):
+        assert client.post('/api/jobs', json={'claim': 'The Earth is flat'}).status_code == 202
+
+    response = client.post('/api/jobs', json={'claim': 'The Earth is flat'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['retry_after'] == int(response.headers['Retry-After'])
+
+
+def test_asgi_endpoints(patched_app):
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            created = await client.post('/api/jobs', json={'claim': 'Water boils at 100 degrees'})
+            job_id = created.json()['job_id']
+            finished = await client.get(f'/api/jobs/{job_id}', params={'wait': 5})
+            missing = await client.get('/api/jobs/unknown')
+            nested = await client.get(f'/api/jobs/{job_id}/extra')
+        return created, finished, missing, nested
+
+    created, finished, missing, nested = asyncio.run(run())
+    assert created.status_code == 202
+    assert created.headers['location'] == f"/api/jobs/{created.json()['job_id']}"
+    assert finished.json()['status'] == DONE
+    assert (missing.status_code, nested.status_code) == (404, 404)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for timing spans, the /metrics and /api/stats endpoints and request-tagged logging.
+Run with: python -m pytest test_metrics.py
+"""
+
+import asyncio
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from job_queue import JobQueue, JobRunner
+from metrics import (
+    STAGE_SECONDS, UPSTREAM_RESPONSES, Counter, Histogram, Registry, RequestIdFilter, in_context,
+    new_request_id, request_id, span, submit_in_context
+)
+
+STAGES = [('check', ''), ('analyze', ''), ('fetch', ''), ('parse', ''), ('provider', 'wikipedia'),
+          ('provider', 'news'), ('provider', 'scholar'), ('provider', 'web')]
+
+
+def stage_counts():
+    return {stage: STAGE_SECONDS.count(stage=stage[0], provider=stage[1]) for stage in STAGES}
+
+
+def test_exposition_format():
+    registry = Registry()
+    latency = registry.register(Histogram('demo_seconds', 'Demo latency', ('stage',), buckets=(0.1, 1)))
+    hits = registry.register(Counter('demo_total', 'Demo counter', ('result',)))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, stage='parse')
+    hits.inc(result='hit')
+    hits.inc(2, result='miss')
+
+    text = registry.render([('demo_ratio', 'gauge', 'Demo gauge', [({}, 0.25)])])
+    assert text.splitlines() == [
+        '# HELP demo_seconds Demo latency',
+        '# TYPE demo_seconds histogram',
+        'demo_seconds_bucket{stage="parse",le="0.1"} 1',
+        'demo_seconds_bucket{stage="parse",le="1"} 2',
+        'demo_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'demo_seconds_sum{stage="parse"} 5.55',
+        'demo_seconds_count{stage="parse"} 3',
+        '# HELP demo_total Demo counter',
+        '# TYPE demo_total counter',
+        'demo_total{result="hit"} 1',
+        'demo_total{result="miss"} 2',
+        '# HELP demo_ratio Demo gauge',
+        '# TYPE demo_ratio gauge',
+        'demo_ratio 0.25',
+    ]
+
+
+def test_span_records_failures():
+    before = STAGE_SECONDS.count(stage='demo')
+    with pytest.raises(ValueError):
+        with span('demo'):
+            raise ValueError('parse failed')
+    assert STAGE_SECONDS.count(stage='demo') == before + 1
+
+
+def test_context_reaches_pool_threads():
+    pool = ThreadPoolExecutor(max_workers=2)
+    expected = new_request_id()
+    assert submit_in_context(pool, request_id.get).result() == expected
+    assert pool.submit(in_context(request_id.get)).result() == expected
+    # Without the context copy a pool thread sees the default
+    assert pool.submit(request_id.get).result() == '-'
+    pool.shutdown()
+
+
+def test_metrics_endpoint(stub, monkeypatch):
+    monkeypatch.setattr(flask_app, 'fact_checker', make_checker(stub))
+    before = stage_counts()
+    scholar_before = UPSTREAM_RESPONSES.value(upstream='scholar', status=200)
+    client = flask_app.app.test_client()
+
+    assert client.post('/submit', json={'message': 'The Earth is flat'}).status_code == 200
+    assert client.post('/submit', json={'message': 'The Earth is flat'}).get_json()['cache'] == 'hit'
+
+    after = stage_counts()
+    assert all(after[stage] > before[stage] for stage in STAGES)
+    assert UPSTREAM_RESPONSES.value(upstream='scholar', status=200) == scholar_before + 1
+
+    response = client.get('/metrics')
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'factchecker_verdict_cache_hit_ratio 0.5' in text
+    assert 'factchecker_verdict_cache_lookups_total{result="hit"} 1' in text
+    assert 'factchecker_provider_calls_total{provider="scholar",outcome="ok"} 1' in text
+    assert re.search(r'factchecker_stage_seconds_bucket\{stage="provider",provider="web",le="\+Inf"\} \d+', text)
+    assert re.search(r'factchecker_upstream_responses_total\{upstream="article",status="200"\} \d+', text)
+
+
+def test_asgi_metrics(stub, monkeypatch):
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(make_checker(stub)))
+    before = stage_counts()
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await client.post('/submit', json={'message': 'The Earth is flat'})
+            response = await client.get('/metrics')
+        await asgi.checker.aclose()
+        return response
+
+    response = asyncio.run(run())
+    after = stage_counts()
+    assert all(after[stage] > before[stage] for stage in STAGES)
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert 'factchecker_verdict_cache_lookups_total{result="miss"} 1' in response.text
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    runner = JobRunner(JobQueue(str(tmp_path / 'jobs.sqlite3')), lambda claim: {}, workers=0)
+    monkeypatch.setattr(flask_app, 'job_runner', runner)
+    return runner
+
+
+STATS_KEYS = {'verdict_cache', 'article_cache', 'single_flight', 'http', 'downloads', 'fingerprints', 'content',
+              'jobs'}
+
+
+def test_stats_endpoint(stub, jobs, monkeypatch):
+    monkeypatch.setattr(flask_app, 'fact_checker', make_checker(stub))
+    client = flask_app.app.test_client()
+    client.post('/submit', json={'message': 'The Earth is flat'})
+
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert set(stats) == STATS_KEYS
+    assert stats['content']['entries'] > 0
+
+
+def test_asgi_stats(stub, jobs, monkeypatch):
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(make_checker(stub)))
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await client.post('/submit', json={'message': 'The Earth is flat'})
+            response = await client.get('/api/stats')
+        await asgi.checker.aclose()
+        return response
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    stats = response.json()
+    assert set(stats) == STATS_KEYS
+    assert stats['content']['entries'] > 0
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.addFilter(RequestIdFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_log_lines_carry_request_id(stub, monkeypatch):
+    monkeypatch.setattr(flask_app, 'fact_checker', make_checker(stub))
+    handler = Records()
+    root = logging.getLogger()
+    level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    try:
+        flask_app.app.test_client().post('/submit', json={'message': 'The Earth is flat'})
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+    threads = {record.threadName.split('_')[0] for record in handler.records}
+    ids = {record.request_id for record in handler.records}
+    # Provider and fetch pool threads log under the request's id
+    assert {'provider', 'fetch'} <= threads
+    assert len(ids) == 1 and ids != {'-'}
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the parser backends, their dispatch and the parse process pool.
+Run with: python -m pytest test_parsing.py
+"""
+
+import glob
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app import FactChecker
+from bench.stub_upstreams import StubUpstreams
+from parsing import HAVE_LXML, LexborHTMLParser, ParsePool, available_backends, extract_article_text, soup_features
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES = {
+    os.path.basename(path): open(path, 'rb').read()
+    for path in sorted(glob.glob(os.path.join(BACKEND_DIR, 'fixtures', 'pages', '*.html')))
+}
+
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = ParsePool(2, 'html.parser')
+    yield pool
+    pool.shutdown()
+
+
+def test_streaming_matches_html_parser():
+    assert PAGES
+    for name, html in PAGES.items():
+        expected = extract_article_text(html, 5000, 'html.parser')
+        assert extract_article_text(html, 5000, 'streaming') == expected, name
+        text = html.decode('utf-8', 'replace')
+        assert (extract_article_text(text, 300, 'streaming') ==
+                extract_article_text(text, 300, 'html.parser')), name
+
+
+def test_backend_dispatch():
+    assert available_backends()[-1] == 'html.parser' and 'streaming' in available_backends()
+    assert soup_features('html.parser') == soup_features('streaming') == 'html.parser'
+    assert soup_features('lxml') == ('lxml' if HAVE_LXML else 'html.parser')
+
+    with pytest.raises(ValueError, match='Unknown parser backend'):
+        extract_article_text('<p>text</p>', backend='html5lib')
+    if not HAVE_LXML:
+        with pytest.raises(ValueError, match='lxml is not installed'):
+            extract_article_text('<p>text</p>', backend='lxml')
+    if LexborHTMLParser is None:
+        with pytest.raises(ValueError, match='selectolax is not installed'):
+            extract_article_text('<p>text</p>', backend='selectolax')
+
+
+def test_pool_matches_in_process(pool):
+    futures = {name: pool.submit(html, 5000) for name, html in PAGES.items()}
+    for name, future in futures.items():
+        assert future.result(timeout=60) == extract_article_text(PAGES[name], 5000, 'html.parser'), name
+
+
+def test_checker_parses_on_the_pool():
+    with StubUpstreams(latency=0, article_latency=0, tail_ratio=0) as stub:
+        url = f'{stub.base_url}/article/reuters.com/story'
+        expected = FactChecker().fetch_article_content(url)
+        checker = FactChecker(parse_processes=1)
+        try:
+            assert checker.parse_pool is not None
+            assert checker.fetch_article_content(url) == expected
+        finally:
+            checker.parse_pool.shutdown()
+    assert expected
+
+
+def test_spawned_workers_skip_app_setup(tmp_path):
+    # Run as a script, so spawned workers re-import it as __mp_main__ and,
+    # through it, the app module
+    script = tmp_path / 'server.py'
+    script.write_text(textwrap.dedent(f"""
+        import os
+        import sys
+        sys.path.insert(0, {BACKEND_DIR!r})
+        import app
+
+        if __name__ == '__main__':
+            # Only a worker setting up the server at import could create this
+            os.environ['ARTICLE_CACHE_PATH'] = {str(tmp_path / 'articles.sqlite3')!r}
+            os.environ['JOB_QUEUE_PATH'] = {str(tmp_path / 'jobs.sqlite3')!r}
+            checker = app.FactChecker(parse_processes=1)
+            print(checker.parse_article(b'<article><p>' + b'Parsed in a worker. ' * 20 + b'</p></article>'))
+            checker.parse_pool.shutdown()
+    """))
+    output = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.startswith('Parsed in a worker.')
+    assert os.listdir(tmp_path) == ['server.py']
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request profiling and the /api/profiles endpoint.
+Run with: python -m pytest test_profiling.py
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from metrics import traced
+from profiling import BACKEND_DIR, Profile, categorize
+
+
+@pytest.fixture
+def stub_options():
+    return {'latency': 0.01, 'article_latency': 0.02}
+
+
+@pytest.fixture
+def checker(stub, monkeypatch):
+    checker = make_checker(stub)
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    monkeypatch.setattr(flask_app, 'profiling_enabled', True)
+    return checker
+
+
+def test_categorize():
+    app_py = os.path.join(BACKEND_DIR, 'app.py')
+    lib = '/usr/lib/python3.11'
+    assert categorize([(f'{lib}/socket.py', 'readinto'), (app_py, 'search_wikipedia')]) == 'network'
+    assert categorize([(f'{lib}/site-packages/bs4/element.py', 'find_all'), (app_py, 'parse_search_hits')]) == 'parse'
+    assert categorize([(os.path.join(BACKEND_DIR, 'relevance.py'), 'relevant_sentences')]) == 'analyze'
+    assert categorize([(app_py, 'analyze_results'), (f'{lib}/threading.py', 'run')]) == 'analyze'
+    assert categorize([(f'{lib}/threading.py', 'wait'), (app_py, 'iter_provider_results')]) == 'wait'
+    # A backend frame that is none of these stops the search
+    assert categorize([(app_py, 'search_wikipedia'), (f'{lib}/threading.py', 'run')]) == 'other'
+
+
+def test_nothing_wrapped_when_off():
+    def work():
+        return 1
+    assert traced(work) is work
+
+
+def test_profile_covers_pool_threads(checker):
+    profile = Profile(interval=0.001)
+    with profile.running():
+        checker.check_claim("The Earth is flat")
+    summary = profile.summary()
+
+    assert {'check', 'analyze', 'fetch', 'provider:wikipedia', 'provider:news'} <= set(summary['stages'])
+    assert summary['stages']['fetch']['calls'] > 1
+    assert summary['samples']['count'] > 0
+    assert abs(sum(summary['samples']['share'].values()) - 1) < 0.01
+    threads = {line.split(';')[0] for line in profile.collapsed().splitlines()}
+    assert {'MainThread', 'provider'} <= threads
+    # The sampler stops with the block
+    count = summary['samples']['count']
+    checker.check_claim("Water boils at 100 degrees")
+    assert profile.summary()['samples']['count'] == count
+
+
+def test_flask_profiled_submit(checker):
+    client = flask_app.app.test_client()
+    client.post('/submit', json={'message': 'The Earth is flat'})
+
+    body = client.post('/submit', json={'message': 'The Earth is flat'}, headers={'X-Profile': '1'}).get_json()
+    assert body['cache'] == 'bypass'
+    assert body['profile']['stages']['check']['calls'] == 1
+    dump = client.get(body['profile']['dump'])
+    assert dump.status_code == 200
+    assert dump.headers['Content-Disposition'] == f'attachment; filename="profile-{body["profile"]["id"]}.txt"'
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in dump.get_data(as_text=True).splitlines())
+
+    verified = client.post('/api/verify?profile=1', json={'claim': 'The Earth is flat'}).get_json()
+    assert 'provider:scholar' in verified['profile']['stages']
+    assert client.get('/api/profiles/unknown').status_code == 404
+
+
+def test_gated_by_config(checker, monkeypatch):
+    monkeypatch.setattr(flask_app, 'profiling_enabled', False)
+    client = flask_app.app.test_client()
+    body = client.post('/submit', json={'message': 'The Earth is flat'}, headers={'X-Profile': '1'}).get_json()
+    assert 'profile' not in body and body['cache'] == 'miss'
+
+    monkeypatch.setattr(flask_app, 'profiling_enabled', True)
+    body = client.post('/submit?profile=1', json={'message': 'The Earth is flat'}).get_json()
+    monkeypatch.setattr(flask_app, 'profiling_enabled', False)
+    assert client.get(body['profile']['dump']).status_code == 404
+
+
+def test_asgi_profiled_submit(checker, monkeypatch):
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(checker))
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            body = (await client.post('/submit', json={'message': 'The Earth is flat'},
+                                      headers={'X-Profile': 'true'})).json()
+            dump = await client.get(body['profile']['dump'])
+        await asgi.checker.aclose()
+        return body, dump
+
+    body, dump = asyncio.run(run())
+    assert body['cache'] == 'bypass'
+    assert {'check', 'provider:web'} <= set(body['profile']['stages'])
+    assert dump.status_code == 200
+    assert dump.headers['content-disposition'].startswith('attachment')
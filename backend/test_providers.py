@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the provider registry and its circuit breakers, against the
+local stub upstreams.
+Run with: python -m pytest test_providers.py
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import app as flask_app
+import asgi
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from providers import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyWindow, Provider, ProviderRegistry
+
+# Breakers that open after two failures and probe again after a second
+BREAKER = {'breaker_failures': 2, 'breaker_reset': 1}
+
+
+def scholar_status(checker):
+    return next(source['status'] for source in flask_app.sources_payload(checker)['sources']
+                if source['name'] == 'Google Scholar')
+
+
+def test_breaker_states():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    breaker.record(False)
+    assert breaker.allow() and breaker.state == CLOSED
+    breaker.record(False)
+    assert not breaker.allow() and breaker.state == OPEN
+
+    time.sleep(0.15)
+    # One probe at a time once the reset timeout has passed
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+
+def test_abandoned_probe_is_released():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_latency_percentiles():
+    window = LatencyWindow()
+    assert window.percentiles() == {'p50': None, 'p90': None, 'p99': None}
+    for ms in range(1, 101):
+        window.add(ms / 1000)
+    assert window.percentiles() == {'p50': 50.0, 'p90': 90.0, 'p99': 99.0}
+
+
+def test_captcha_opens_breaker(stub):
+    checker = make_checker(stub, **BREAKER)
+    stub.scholar_captcha = True
+    for claim in ["The Earth is flat", "Water boils at 100 degrees"]:
+        assert checker.check_claim(claim)['skipped_providers'] == []
+    assert scholar_status(checker) == 'unavailable'
+
+    requests_before = stub.scholar_requests
+    result = checker.check_claim("The Eiffel Tower is in Paris")
+    assert result['skipped_providers'] == ['scholar']
+    assert stub.scholar_requests == requests_before
+    assert result['source_count'] > 0
+
+    # After the reset timeout a probe goes through and closes the breaker
+    stub.scholar_captcha = False
+    time.sleep(1.05)
+    result = checker.check_claim("The Eiffel Tower is in Paris")
+    assert result['skipped_providers'] == []
+    assert any(source['source'] == 'Google Scholar' for source in result['sources'])
+    assert scholar_status(checker) == 'active'
+
+    scholar = next(item for item in flask_app.sources_payload(checker)['providers'] if item['name'] == 'scholar')
+    assert scholar['calls'] == {'ok': 1, 'empty': 2, 'error': 0, 'timeout': 0}
+    assert scholar['skipped'] == 1
+    assert scholar['latency_ms']['p50'] is not None
+
+
+def test_plugin_provider_and_timeouts(stub):
+    checker = make_checker(stub, breaker_failures=1, breaker_reset=60)
+    checker.providers.register(Provider(
+        'slow', lambda checker, claim, fetch: time.sleep(0.5) or [], timeout=0.1, concurrency=1
+    ))
+
+    result = checker.check_claim("The Earth is flat")
+    assert result['timed_out_providers'] == ['slow']
+    # Recorded at the deadline, without waiting for the search to return
+    assert checker.check_claim("The Earth is flat")['skipped_providers'] == ['slow']
+
+    slow = checker.providers.stats()[-1]
+    assert (slow['name'], slow['status'], slow['calls']['timeout']) == ('slow', 'unavailable', 1)
+
+
+def test_slow_provider_does_not_starve_the_others():
+    def news(checker, claim, fetch):
+        return [{'source': 'Reuters', 'title': claim, 'url': f'https://www.reuters.com/{len(claim)}',
+                 'snippet': claim, 'full_content': '', 'reliability_score': 9}]
+
+    checker = FactChecker(batch_concurrency=8, breaker_failures=100)
+    checker.provider_pool = ThreadPoolExecutor(max_workers=4)
+    checker.providers = ProviderRegistry([
+        Provider('hung', lambda checker, claim, fetch: time.sleep(1) or [], timeout=0.1, concurrency=1),
+        Provider('news', news, timeout=0.5)
+    ])
+
+    # Eight claims queue on the hung provider's one slot; each waiter gives
+    # up its pool thread at the deadline instead of holding it
+    results = checker.check_claims([f'Claim number {index} about the Earth' for index in range(8)])
+    assert all(result['timed_out_providers'] == ['hung'] for result in results)
+    assert all(result['sources'] for result in results)
+
+    hung = checker.providers.stats()[0]
+    assert hung['calls']['timeout'] >= 1 and hung['calls']['timeout'] + hung['skipped'] <= 8
+
+
+def test_async_engine_shares_breakers(stub):
+    checker = make_checker(stub, **BREAKER)
+    stub.scholar_captcha = True
+
+    async def slow(checker, claim, fetch):
+        await asyncio.sleep(0.5)
+        return []
+
+    checker.providers.register(Provider('slow', slow, timeout=0.1))
+
+    async def run():
+        engine = AsyncFactChecker(checker)
+        try:
+            return [await engine.check_claim(claim) for claim in ["The Earth is flat", "Water boils", "Paris"]]
+        finally:
+            await engine.aclose()
+
+    results = asyncio.run(run())
+    assert [result['timed_out_providers'] for result in results[:2]] == [['slow'], ['slow']]
+    assert results[2]['skipped_providers'] == ['scholar', 'slow']
+    assert scholar_status(checker) == 'unavailable'
+
+
+def test_sources_endpoints(stub, monkeypatch):
+    checker = make_checker(stub, **BREAKER)
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(checker))
+
+    body = flask_app.app.test_client().get('/api/sources').get_json()
+    assert [source['name'] for source in body['sources']] == [
+        'Wikipedia', 'Reuters', 'Associated Press', 'BBC News', 'NPR', 'Google Scholar', 'Web Search'
+    ]
+    assert {source['status'] for source in body['sources']} == {'active'}
+    assert [provider['name'] for provider in body['providers']] == ['wikipedia', 'news', 'scholar', 'web']
+    assert body['providers'][0]['timeout'] == checker.provider_timeout
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return (await client.get('/api/sources')).json()
+
+    assert asyncio.run(run()) == body
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests that SentenceIndex finds the same relevant sentences as the original
+keyword x sentence loop it replaced.
+Run with: python -m pytest test_relevance.py
+"""
+
+import random
+import re
+
+import pytest
+
+from bench.bench_relevance import legacy_relevant_sentences
+from relevance import SentenceIndex
+
+
+def whole_word_relevant_sentences(claim_keywords, content):
+    """legacy_relevant_sentences with a regex \\b match instead of `in`"""
+    sentences = re.split(r'[.!?]+', content.lower())
+    needed = min(2, len(claim_keywords))
+    return [
+        sentence.strip() for sentence in sentences
+        if sum(1 for keyword in claim_keywords if re.search(rf'\b{re.escape(keyword)}\b', sentence)) >= needed
+    ]
+
+
+CASES = [
+    # Overlapping keywords: one is a substring of the other, or of other words
+    (['flat', 'flatten', 'earth'], "Flatten the Earth. The flat earth is flat! Earthquakes flatten towns."),
+    (['earth', 'earthquake'], "An earthquake shook the Earth. Earthquake season. earth, earth, earth"),
+    # A keyword repeated in the claim counts once per repetition
+    (['earth', 'earth'], "The Earth is round. Mars is red."),
+    # Runs of separators, and separators at both ends
+    (['earth', 'round'], "...The Earth is round?! Really... round earth!!! "),
+    (['earth', 'round'], "earth round."),
+    (['earth', 'round'], ".earth round"),
+    # Empty sentences and empty documents
+    (['earth', 'round'], ". . ! ? .."),
+    (['earth', 'round'], ""),
+    # One keyword needs one hit; no keywords keeps every sentence
+    (['earth'], "The Earth. The moon. Earthly things."),
+    ([], "The Earth. The moon!"),
+    # Punctuation that does not split sentences
+    (['earth', 'round'], "The Earth, it's round; \"round\" (earth) - round-earth."),
+    (['water_boils', '100'], "water_boils at 100 degrees. Water boils at 100."),
+]
+
+
+@pytest.mark.parametrize('keywords, content', CASES)
+def test_matches_legacy_loop(keywords, content):
+    assert SentenceIndex(content).relevant_sentences(keywords) == legacy_relevant_sentences(keywords, content)
+
+
+@pytest.mark.parametrize('keywords, content', CASES)
+def test_whole_words_match_regex(keywords, content):
+    assert (SentenceIndex(content).relevant_sentences(keywords, whole_words=True) ==
+            whole_word_relevant_sentences(keywords, content))
+
+
+def test_sentences_match_re_split():
+    for content in ["", ".", "a.b", "..a..b..", "a!?b", "end.", "?start", "no separators"]:
+        assert SentenceIndex(content).sentences == re.split(r'[.!?]+', content.lower())
+
+
+def test_random_documents():
+    # Few letters and many separators, so keywords overlap and sentences are often empty
+    rng = random.Random(0)
+    alphabet = 'aabbe .!?,'
+    for _ in range(500):
+        content = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        keywords = [''.join(rng.choice('abe') for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(0, 4))]
+        index = SentenceIndex(content)
+        assert index.relevant_sentences(keywords) == legacy_relevant_sentences(keywords, content)
+        assert (index.relevant_sentences(keywords, whole_words=True) ==
+                whole_word_relevant_sentences(keywords, content))
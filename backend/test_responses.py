@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for response encoding: fast JSON, Accept-Encoding negotiation and
+?fields= / ?include_content= projection.
+Run with: python -m pytest test_responses.py
+"""
+
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+import responses
+from app import FactChecker
+from async_checker import AsyncFactChecker
+from providers import Provider, ProviderRegistry
+from responses import dumps, encode_body, negotiate_encoding, parse_projection
+
+ARTICLE = "Scientists have debunked the myth that the Earth is flat, the agency said. " * 30
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    def search(checker, claim, fetch):
+        return [{'source': 'Reuters', 'title': 'Fact check', 'url': 'https://www.reuters.com/fact-check',
+                 'snippet': 'The flat Earth claim is false.', 'full_content': ARTICLE, 'reliability_score': 9}]
+
+    checker = FactChecker()
+    checker.providers = ProviderRegistry([Provider('news', search)])
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(checker))
+    return checker
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(responses, 'brotli', None)
+    assert negotiate_encoding('gzip, deflate') == 'gzip'
+    assert negotiate_encoding('br;q=1.0, gzip;q=0.5') == 'gzip'
+    assert negotiate_encoding('gzip;q=0') is None
+    assert negotiate_encoding('*') == 'gzip'
+    assert negotiate_encoding('identity') is None
+    assert negotiate_encoding('') is None and negotiate_encoding(None) is None
+
+    monkeypatch.setattr(responses, 'brotli', object())
+    assert negotiate_encoding('gzip, br') == 'br'
+    assert negotiate_encoding('br;q=0.5, gzip') == 'gzip'
+
+
+def test_encode_body():
+    text = dumps({'full_content': ARTICLE})
+    payload, headers = encode_body(text, 'gzip')
+    assert headers == {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+    assert gzip.decompress(payload).decode('utf-8') == text
+    assert encode_body('{"ok":true}', 'gzip') == (b'{"ok":true}', {'Vary': 'Accept-Encoding'})
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_dumps(monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(responses, 'orjson', None)
+    value = {'b': [1, 2.5, None], 'a': 'Café "flat" Earth', 'c': {'z': True, 'y': ''}}
+    text = dumps(value)
+    assert json.loads(text) == value
+    assert text.index('"a"') < text.index('"b"') < text.index('"c"') and ', ' not in text
+
+
+def test_parse_projection():
+    assert parse_projection(None, None) == (None, True)
+    assert parse_projection('analysis, claim,', 'false') == ({'analysis', 'claim'}, False)
+    assert parse_projection('', '1') == (None, True)
+
+
+def test_flask_projection_and_compression(checker):
+    client = flask_app.app.test_client()
+    full = client.post('/api/verify', json={'claim': 'The Earth is flat'})
+    assert full.headers['Vary'] == 'Accept-Encoding' and 'Content-Encoding' not in full.headers
+    assert full.get_json()['sources'][0]['full_content'] == ARTICLE
+
+    compressed = client.post('/api/verify', json={'claim': 'The Earth is flat'}, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert len(compressed.data) < len(full.data) / 5
+    assert json.loads(gzip.decompress(compressed.data)) == dict(full.get_json(), cache='hit')
+
+    light = client.post('/api/verify?include_content=false', json={'claim': 'The Earth is flat'}).get_json()
+    assert 'full_content' not in light['sources'][0]
+    assert light['sources'][0]['url'] == 'https://www.reuters.com/fact-check'
+
+    verdict = client.post('/api/verify?fields=analysis,claim', json={'claim': 'The Earth is flat'}).get_json()
+    assert set(verdict) == {'analysis', 'claim'}
+    submitted = client.post('/submit?fields=resolution,sources', json={'message': 'The Earth is flat'}).get_json()
+    assert submitted['resolution'] == 'LIKELY_FALSE' and set(submitted) == {'resolution', 'sources'}
+
+
+def test_asgi_projection_and_compression(checker):
+    # Answered from the verdict cache the two servers share
+    checker.check_claim_cached('The Earth is flat')
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            verified = await client.post('/api/verify', json={'claim': 'The Earth is flat'},
+                                         headers={'Accept-Encoding': 'gzip'})
+            light = await client.post('/api/verify?include_content=false', json={'claim': 'The Earth is flat'})
+            submitted = await client.post('/submit?fields=resolution', json={'message': 'The Earth is flat'})
+        await asgi.checker.aclose()
+        return verified, light, submitted
+
+    verified, light, submitted = asyncio.run(run())
+    assert verified.headers['content-encoding'] == 'gzip'
+    assert verified.json()['sources'][0]['full_content'] == ARTICLE
+    assert 'full_content' not in light.json()['sources'][0]
+    assert submitted.json() == {'resolution': 'LIKELY_FALSE'}
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical in-flight calls.
+Run with: python -m pytest test_singleflight.py
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import FactChecker
+from providers import Provider, ProviderRegistry
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, 'key', work, 21) for _ in range(5)]
+        while flight.stats()['coalesced_waiters'] < 4:
+            time.sleep(0.01)
+        release.set()
+        outcomes = [future.result() for future in futures]
+
+    assert calls == [21]
+    assert sorted(outcomes) == [(42, False)] + [(42, True)] * 4
+    assert flight.stats() == {'in_flight': 0, 'leaders': 1, 'coalesced_waiters': 4}
+    # Once finished, the next call for the key runs again
+    assert flight.do('key', work, 1) == (2, False)
+
+
+def test_callers_share_the_error():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('upstream exploded')
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'key', fail) for _ in range(3)]
+        while flight.stats()['coalesced_waiters'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match='upstream exploded'):
+                future.result()
+
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_async_waiter_cancellation_keeps_the_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return 'page'
+
+    async def run():
+        impatient = asyncio.ensure_future(flight.do('url', work))
+        patient = asyncio.ensure_future(flight.do('url', work))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient, impatient.cancelled()
+
+    assert asyncio.run(run()) == (('page', True), True)
+    assert calls == [1]
+    assert flight.stats() == {'in_flight': 0, 'leaders': 1, 'coalesced_waiters': 1}
+
+
+def test_async_callers_share_the_error():
+    flight = AsyncSingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('upstream exploded')
+
+    async def run():
+        return await asyncio.gather(flight.do('url', fail), flight.do('url', fail), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert [str(error) for error in errors] == ['upstream exploded'] * 2
+
+
+def test_identical_claims_checked_once():
+    calls = []
+
+    def search(checker, claim, fetch):
+        calls.append(claim)
+        time.sleep(0.2)
+        return [{'source': 'Reuters', 'title': 'Fact check', 'url': 'https://www.reuters.com/1',
+                 'snippet': 'The flat Earth claim is false.', 'full_content': '', 'reliability_score': 9}]
+
+    checker = FactChecker()
+    checker.providers = ProviderRegistry([Provider('news', search)])
+    claims = ["The Earth is flat", "the earth is FLAT", "The Earth is flat"]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(checker.check_claim_cached, claims))
+
+    assert len(calls) == 1
+    assert [result['claim'] for result in results] == claims
+    assert {result['cache'] for result in results} == {'miss'}
+    assert checker.claim_flight.stats()['coalesced_waiters'] == 2
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for compact source records, the shared content store and the
+responses written from them.
+Run with: python -m pytest test_sources.py
+"""
+
+import asyncio
+import json
+import random
+
+import httpx
+
+import app as flask_app
+import asgi
+from app import FactChecker, format_source
+from async_checker import AsyncFactChecker
+from providers import Provider, ProviderRegistry
+from sources import ContentStore, SourceRecord
+from verdict_cache import estimate_size
+
+
+def article(seed):
+    rng = random.Random(seed)
+    body = ' '.join(f'word{rng.randrange(2000)}' for _ in range(600))
+    return f"Scientists have debunked the myth that the Earth is flat. {body}."
+
+
+ARTICLE = article(0)
+
+
+def news_result(index, content=ARTICLE):
+    return {'source': 'Reuters', 'title': f'Fact check {index}', 'url': f'https://www.reuters.com/{index}',
+            'snippet': 'The flat Earth claim is false.', 'full_content': content, 'reliability_score': 9}
+
+
+def test_record_reads_like_its_dict():
+    store = ContentStore()
+    result = dict(news_result(1), doi='10.1000/1')
+    record = SourceRecord.from_result(result, store)
+
+    assert record.as_dict() == result
+    assert record['full_content'] == ARTICLE
+    assert record.get('doi') == '10.1000/1' and 'doi' in record
+    assert record.get('missing', 'default') == 'default'
+    assert json.loads(record.to_json()) == result
+    assert json.loads(record.to_submit_json()) == format_source(result)
+
+    empty = SourceRecord.from_result({'source': 'Google Scholar', 'url': ''}, store)
+    assert empty.full_content == '' and empty['reliability_score'] == 5
+    assert json.loads(empty.to_submit_json()) == format_source(empty)
+
+
+def test_content_store_shares_texts():
+    store = ContentStore(max_entries=2)
+    first = SourceRecord.from_result(news_result(1), store)
+    second = SourceRecord.from_result(news_result(2), store)
+    assert first._content is second._content
+    assert len(first._content) < len(ARTICLE) / 2
+
+    store.put('another text')
+    store.put('a third text')
+    stats = store.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (2, 1, 3)
+    # Evicted from the store, still held by its records
+    assert second.full_content == ARTICLE
+    assert estimate_size({'sources': [first]}) < len(ARTICLE)
+    # ...and counted in their size, for the verdict cache's bound
+    assert estimate_size({'sources': [first]}) > len(first._content)
+
+
+def test_cache_hit_keeps_texts_evicted_from_the_store(monkeypatch):
+    extract = article(7)[:500]
+
+    def search(checker, claim, fetch):
+        # Like a Wikipedia extract: text with no article page behind it
+        return [{'source': 'Wikipedia', 'title': 'Flat Earth', 'url': 'https://en.wikipedia.org/wiki/Flat_Earth',
+                 'snippet': 'Flat Earth', 'full_content': extract, 'reliability_score': 8}]
+
+    checker = FactChecker()
+    checker.providers = ProviderRegistry([Provider('wikipedia', search)])
+    checker.content_store.max_entries = 1
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    client = flask_app.app.test_client()
+
+    missed = client.post('/api/verify', json={'claim': 'The Earth is flat'}).get_json()
+    checker.content_store.put('a text that evicts the extract')
+    hit = client.post('/api/verify', json={'claim': 'The Earth is flat'}).get_json()
+    assert missed['cache'] == 'miss' and hit['cache'] == 'hit'
+    assert hit['sources'] == missed['sources']
+    assert hit['sources'][0]['full_content'] == extract
+
+
+def stub_checker(monkeypatch):
+    calls = []
+
+    def search(checker, claim, fetch):
+        return [news_result(index, article(index)) for index in range(3)]
+
+    checker = FactChecker()
+    checker.providers = ProviderRegistry([Provider('news', search)])
+    find = checker.find_claim_context_sentences
+    checker.find_claim_context_sentences = lambda *args: calls.append(args) or find(*args)
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    return checker, calls
+
+
+def test_stream_scores_each_source_once(monkeypatch):
+    checker, calls = stub_checker(monkeypatch)
+    events = list(checker.check_claim_stream("The Earth is flat"))
+    result = events[-1][1]
+    assert all(isinstance(source, SourceRecord) for source in result['sources'])
+    assert result['analysis']['verdict'] == 'LIKELY_FALSE'
+    # Scored as each source arrived; the final analysis reuses the sentences
+    assert len(calls) == 3
+
+
+def test_endpoints_written_from_records(monkeypatch):
+    checker, _ = stub_checker(monkeypatch)
+    client = flask_app.app.test_client()
+    verified = client.post('/api/verify', json={'claim': 'The Earth is flat'})
+    submitted = client.post('/submit', json={'message': 'The Earth is flat'}).get_json()
+
+    assert verified.mimetype == 'application/json'
+    result = checker.verdict_cache.get(checker.normalize_claim('The Earth is flat'))[0]
+    expected = json.loads(json.dumps(flask_app.plain_result(dict(result, cache='miss'))))
+    assert verified.get_json() == expected
+    assert submitted == flask_app.format_submit_result(dict(result, cache='hit'))
+
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(checker))
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as http:
+            body = (await http.post('/submit', json={'message': 'The Earth is flat'})).json()
+        await asgi.checker.aclose()
+        return body
+
+    assert asyncio.run(run()) == submitted
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Golden-output tests for the single-pass stance matcher.
+Run with: python -m pytest test_stance.py
+"""
+
+import json
+import os
+import random
+
+from stance import STANCE_MATCHER, count_with_findall
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'stance_corpus.json')
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as corpus_file:
+        return json.load(corpus_file)
+
+
+def test_golden_corpus():
+    """Counts match the recorded output of the original per-pattern findall loops"""
+    for entry in load_corpus():
+        expected = {key: entry[key] for key in ('support', 'contradict', 'uncertain')}
+        assert STANCE_MATCHER.count(entry['text']) == expected, entry['text'][:80]
+
+
+def test_matches_findall_on_random_text():
+    """Overlapping, repeated and multi-line matches are counted like re.findall"""
+    vocab = ("is are was were not true false however but although despite no evidence "
+             "shows that indeed in fact myth disputed unclear may be some believe mixed views "
+             "İs ſome NOT TRUE is_not isn't").split()
+    separators = [' ', '  ', '\n', ',', '-', '', '\t']
+    rng = random.Random(2026)
+
+    for _ in range(2000):
+        text = ''.join(rng.choice(vocab) + rng.choice(separators) for _ in range(rng.randint(0, 40)))
+        assert STANCE_MATCHER.count(text) == count_with_findall(text), repr(text)
+
+
+if __name__ == '__main__':
+    test_golden_corpus()
+    test_matches_findall_on_random_text()
+    print("✅ Stance matcher matches the golden corpus")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Tests for the streamed /submit/stream endpoint: the event sequence of
+check_claim_stream and its Server-Sent Events encoding.
+Run with: python -m pytest test_streaming.py
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import app as flask_app
+import asgi
+from app import sse_event
+from async_checker import AsyncFactChecker
+from conftest import make_checker
+from providers import Provider
+
+CLAIM = "The Earth is flat"
+DEBUNKED = "Scientists have debunked the myth that the Earth is flat; the flat Earth claim is false."
+
+
+def debunking(checker, claim, fetch):
+    return [{'source': 'Reuters', 'title': f'Fact check {index}', 'url': f'https://www.reuters.com/{index}',
+             'snippet': DEBUNKED, 'full_content': '', 'reliability_score': 9} for index in range(2)]
+
+
+async def async_debunking(checker, claim, fetch):
+    return debunking(checker, claim, fetch)
+
+
+def stalled(checker, claim, fetch):
+    time.sleep(0.5)
+    return []
+
+
+async def async_stalled(checker, claim, fetch):
+    await asyncio.sleep(0.5)
+    return []
+
+
+def debunking_checker(search=debunking, slow=stalled):
+    return make_checker(providers=[Provider('news', search), Provider('slow', slow, timeout=0.1)])
+
+
+def parse_sse(text):
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for block in text.split('\n\n'):
+        if not block:
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_sse_encoding():
+    assert sse_event('result', {'resolution': 'LIKELY_FALSE', 'topic': 'a\nb'}) == (
+        'event: result\ndata: {"resolution":"LIKELY_FALSE","topic":"a\\nb"}\n\n'
+    )
+
+
+def test_event_sequence():
+    checker = debunking_checker()
+    events = list(checker.check_claim_stream(CLAIM))
+
+    assert [event for event, payload in events] == ['source', 'source', 'timeout', 'result']
+    first, second = events[0][1], events[1][1]
+    assert (first['provider'], first['stance']) == ('news', 'contradicting')
+    # Each source carries the verdict over everything seen so far
+    assert first['analysis']['stats']['contradicting'] == 1
+    assert second['analysis']['stats']['contradicting'] == 2
+    assert events[2][1] == {'provider': 'slow'}
+
+    result = events[-1][1]
+    assert result['cache'] == 'miss' and result['timed_out_providers'] == ['slow']
+    assert result['analysis'] == second['analysis']
+    assert [source['url'] for source in result['sources']] == [
+        'https://www.reuters.com/0', 'https://www.reuters.com/1'
+    ]
+
+    # Cached: only the result
+    cached = list(checker.check_claim_stream(CLAIM))
+    assert [(event, payload['cache']) for event, payload in cached] == [('result', 'hit')]
+
+
+STORY = ' '.join([DEBUNKED] + [f"Survey point {index} was measured from orbit and from the ground." for index in range(40)])
+
+
+def syndicated(url, reliability):
+    return {'source': 'Reuters', 'title': 'Fact check', 'url': url, 'snippet': DEBUNKED, 'full_content': STORY,
+            'reliability_score': reliability}
+
+
+def late_original(checker, claim, fetch):
+    time.sleep(0.2)
+    return [syndicated('https://www.reuters.com/a', 9)]
+
+
+async def async_late_original(checker, claim, fetch):
+    await asyncio.sleep(0.2)
+    return [syndicated('https://www.reuters.com/a', 9)]
+
+
+def early_copy(checker, claim, fetch):
+    return [syndicated('https://example.com/b', 6)]
+
+
+async def async_early_copy(checker, claim, fetch):
+    return [syndicated('https://example.com/b', 6)]
+
+
+def syndication_checker(news, web):
+    return make_checker(providers=[Provider('news', news), Provider('web', web)])
+
+
+def streamed_and_kept(events):
+    streamed = [payload['source']['url'] for event, payload in events if event == 'source']
+    return streamed, [source['url'] for source in events[-1][1]['sources']]
+
+
+def test_result_keeps_the_streamed_copy():
+    # The fast provider's copy is streamed first; the result must not swap it for the slow one's
+    events = list(syndication_checker(late_original, early_copy).check_claim_stream(CLAIM))
+    assert streamed_and_kept(events) == (['https://example.com/b'], ['https://example.com/b'])
+
+    async def run():
+        engine = AsyncFactChecker(syndication_checker(async_late_original, async_early_copy))
+        try:
+            return [event async for event in engine.check_claim_stream(CLAIM)]
+        finally:
+            await engine.aclose()
+
+    events = asyncio.run(run())
+    assert streamed_and_kept(events) == (['https://example.com/b'], ['https://example.com/b'])
+
+
+@pytest.fixture
+def patched(monkeypatch):
+    checker = debunking_checker()
+    monkeypatch.setattr(flask_app, 'fact_checker', checker)
+    return checker
+
+
+def test_flask_stream(patched):
+    client = flask_app.app.test_client()
+    response = client.post('/submit/stream', json={'message': CLAIM})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    events = parse_sse(response.get_data(as_text=True))
+    assert [event for event, data in events] == ['source', 'source', 'timeout', 'result']
+    first = events[0][1]
+    assert first.pop('confidence').endswith('%')
+    assert first == {
+        'source': {'website': 'Reuters', 'body': DEBUNKED, 'link': 'https://www.reuters.com/0'},
+        'stance': 'contradicting',
+        'resolution': 'LIKELY_FALSE',
+        'supporting': 0, 'contradicting': 1, 'neutral': 0
+    }
+    assert events[-1][1]['resolution'] == 'LIKELY_FALSE' and events[-1][1]['timed_out'] == ['slow']
+
+    # GET for EventSource, answered from the cache this time
+    events = parse_sse(client.get('/submit/stream', query_string={'message': CLAIM}).get_data(as_text=True))
+    assert [(event, data['cache']) for event, data in events] == [('result', 'hit')]
+
+    assert client.post('/submit/stream', json={'message': 'ok'}).status_code == 400
+
+
+def test_asgi_stream(monkeypatch):
+    monkeypatch.setattr(asgi, 'checker', AsyncFactChecker(debunking_checker(async_debunking, async_stalled)))
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            response = await client.post('/submit/stream', json={'message': CLAIM})
+        await asgi.checker.aclose()
+        return response
+
+    response = asyncio.run(run())
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = parse_sse(response.text)
+    assert [event for event, data in events] == ['source', 'source', 'timeout', 'result']
+    assert events[-1][1]['resolution'] == 'LIKELY_FALSE'
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for URL canonicalization, trusted-domain lookup and per-claim
+article dedupe.
+Run with: python -m pytest test_urls.py
+"""
+
+import threading
+from concurrent.futures import Future
+
+from app import FactChecker
+from providers import Provider, ProviderRegistry
+from urls import DomainClassifier, canonical_url, extract_real_url
+
+
+def test_extract_real_url():
+    href = ('//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.reuters.com%2Fworld%2Fstory%3Fid%3D7%26page%3D2'
+            '&rut=abc123')
+    assert extract_real_url(href) == 'https://www.reuters.com/world/story?id=7&page=2'
+    assert extract_real_url('https://example.org/a?b=1') == 'https://example.org/a?b=1'
+    assert extract_real_url('not a url') == 'not a url'
+
+
+def test_canonical_url():
+    key = canonical_url('https://www.reuters.com/world/story/?b=2&a=1')
+    assert key == 'https://reuters.com/world/story?a=1&b=2'
+    assert canonical_url('http://reuters.com:80/world/story?a=1&utm_source=x&b=2#top') == key
+    assert canonical_url('//duckduckgo.com/l/?uddg=https%3A%2F%2Freuters.com%2Fworld%2Fstory%3Fa%3D1%26b%3D2') == key
+    # Different query values and ports stay distinct
+    assert canonical_url('https://reuters.com/world/story?a=2&b=2') != key
+    assert canonical_url('https://reuters.com:8443/world/story?a=1&b=2') != key
+    assert canonical_url('') == ''
+
+
+def test_domain_suffix_lookup():
+    domains = DomainClassifier(['nih.gov', 'edu', 'wikipedia.org'], score=8)
+    assert domains.classify('https://www.ncbi.nlm.nih.gov/pmc/articles/1') == 8
+    assert domains.classify('https://en.wikipedia.org/wiki/Flat_Earth') == 8
+    assert domains.classify('https://physics.mit.edu/') == 8
+    # Substrings of a host or URL are not suffixes
+    assert domains.classify('https://education.com/edu') is None
+    assert domains.classify('https://notnih.gov/') is None
+    assert domains.classify('https://spam.example/?u=https://nih.gov', default=5) == 5
+
+
+def test_load_large_list(tmp_path):
+    path = tmp_path / 'domains.txt'
+    path.write_text('# trusted outlets\n\n' + ''.join(f'outlet{index}.example  # n{index}\n'
+                                                       for index in range(5000)))
+    checker = FactChecker(trusted_domains_path=str(path))
+    assert len(checker.trusted_domains) == 5016
+    assert checker.web_reliability('https://news.outlet4999.example/story') == 8
+    assert checker.web_reliability('https://outlet5000.example/story') == 5
+    assert checker.web_reliability('https://www.bbc.com/news/1') == 8
+
+
+def test_article_fetched_and_scored_once():
+    fetches = []
+    lock = threading.Lock()
+
+    def submit(url):
+        with lock:
+            fetches.append(url)
+        future = Future()
+        future.set_result('Scientists have debunked the myth that the Earth is flat.')
+        return future
+
+    def search(source, url):
+        def run(checker, claim, fetch):
+            return [{'source': source, 'title': 'Flat Earth', 'url': url, 'snippet': '',
+                     'full_content': fetch(url).result(), 'reliability_score': 9}]
+        return run
+
+    checker = FactChecker()
+    checker.fetch_scheduler.submit = submit
+    checker.providers = ProviderRegistry([
+        Provider('news', search('Reuters', 'https://www.reuters.com/science/flat-earth?utm_source=ddg')),
+        Provider('web', search('Web Search', 'http://reuters.com/science/flat-earth/'))
+    ])
+    result = checker.check_claim("The Earth is flat")
+
+    assert len(fetches) == 1
+    assert [source['source'] for source in result['sources']] == ['Reuters']
+    assert result['analysis']['stats']['total'] == 1
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-claim verdict cache and check_claim_cached.
+Run with: python -m pytest test_verdict_cache.py
+"""
+
+import pytest
+
+import verdict_cache
+from app import FactChecker
+from providers import Provider, ProviderRegistry
+from verdict_cache import VerdictCache, estimate_size
+
+
+class Clock:
+    """Stands in for the time module, moved by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(verdict_cache, 'time', clock)
+    return clock
+
+
+def test_hit_miss_and_ttl(clock):
+    cache = VerdictCache(ttl=10, stale_ttl=60)
+    assert cache.get('earth flat') == (None, 'miss')
+
+    cache.set('earth flat', {'verdict': 'LIKELY_FALSE'})
+    assert cache.get('earth flat') == ({'verdict': 'LIKELY_FALSE'}, 'hit')
+
+    clock.now += 11
+    assert cache.get('earth flat') == ({'verdict': 'LIKELY_FALSE'}, 'stale')
+
+    clock.now += 50
+    assert cache.get('earth flat') == (None, 'miss')
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes']) == (0, 0)
+    assert (stats['hits'], stats['stale_hits'], stats['misses'], stats['hit_rate']) == (1, 1, 2, 0.5)
+
+
+def test_lru_bounded_by_size(clock):
+    value = {'sources': ['x' * 100]}
+    size = estimate_size(value)
+    cache = VerdictCache(max_bytes=2 * size)
+    cache.set('first', value)
+    cache.set('second', value)
+    # Reading 'first' makes 'second' the least recently used
+    cache.get('first')
+    cache.set('third', value)
+
+    assert cache.get('second') == (None, 'miss')
+    assert cache.get('first')[1] == cache.get('third')[1] == 'hit'
+    assert cache.stats()['bytes'] == 2 * size
+
+    # Larger than the whole cache: not stored, nothing evicted for it
+    cache.set('huge', {'sources': ['x' * 1000]})
+    assert cache.get('huge') == (None, 'miss')
+    assert cache.stats()['entries'] == 2
+
+
+def test_zero_ttl_disables():
+    cache = VerdictCache(ttl=0)
+    cache.set('earth flat', {'verdict': 'LIKELY_FALSE'})
+    assert cache.get('earth flat') == (None, 'miss')
+
+
+def counting_checker(**kwargs):
+    calls = []
+
+    def search(checker, claim, fetch):
+        calls.append(claim)
+        return [{'source': 'Reuters', 'title': 'Fact check', 'url': f'https://www.reuters.com/{len(calls)}',
+                 'snippet': 'The flat Earth claim is false.', 'full_content': '', 'reliability_score': 9}]
+
+    checker = FactChecker(**kwargs)
+    checker.providers = ProviderRegistry([Provider('news', search)])
+    return checker, calls
+
+
+def test_check_claim_cached(clock):
+    checker, calls = counting_checker(cache_ttl=10, cache_stale_ttl=60)
+
+    first = checker.check_claim_cached("The Earth is flat")
+    # Same normalized claim: case, stop words and spacing do not matter
+    second = checker.check_claim_cached("the   EARTH is flat")
+    assert (first['cache'], second['cache']) == ('miss', 'hit')
+    assert second['claim'] == "the   EARTH is flat"
+    assert second['sources'] == first['sources']
+    assert calls == ["The Earth is flat"]
+
+    # "is not flat" is a different claim
+    assert checker.check_claim_cached("The Earth is not flat")['cache'] == 'miss'
+
+    # A stale entry is served at once and recomputed in the background
+    clock.now += 11
+    stale = checker.check_claim_cached("The Earth is flat")
+    assert stale['cache'] == 'stale' and stale['sources'] == first['sources']
+    checker.refresh_pool.shutdown(wait=True)
+    assert len(calls) == 3
+    assert checker.check_claim_cached("The Earth is flat")['sources'][0]['url'] == 'https://www.reuters.com/3'
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-request batched Wikipedia provider.
+Run with: python -m pytest test_wikipedia.py
+"""
+
+from app import FactChecker
+from conftest import make_checker
+
+
+def test_batch_response_split_per_title():
+    checker = FactChecker()
+    # Pages come back keyed by page id, in no particular order
+    data = {'query': {
+        'search': [
+            {'title': 'Flat Earth', 'snippet': '<span class="searchmatch">Flat</span> Earth is a myth'},
+            {'title': 'Spherical Earth', 'snippet': 'The <b>shape</b> of the planet'},
+            {'title': 'Geodesy', 'snippet': 'Measuring the Earth'}
+        ],
+        'pages': {
+            '736': {'title': 'Spherical Earth', 'extract': 'The Earth is an oblate spheroid.'},
+            '12': {'title': 'Flat Earth', 'extract': 'Flat Earth is an archaic conception. ' * 200}
+        }
+    }}
+
+    results = checker.parse_wikipedia_batch(data)
+    assert [result['title'] for result in results] == ['Flat Earth', 'Spherical Earth', 'Geodesy']
+    assert [result['url'] for result in results] == [
+        'https://en.wikipedia.org/wiki/Flat_Earth',
+        'https://en.wikipedia.org/wiki/Spherical_Earth',
+        'https://en.wikipedia.org/wiki/Geodesy'
+    ]
+    assert results[0]['snippet'] == 'Flat Earth is a myth'
+    assert len(results[0]['full_content']) == 5000
+    assert results[1]['full_content'] == 'The Earth is an oblate spheroid.'
+    # A hit whose extract did not come back keeps its snippet only
+    assert results[2]['full_content'] == ''
+    assert checker.parse_wikipedia_batch({}) == []
+
+
+def test_batched_matches_per_title_requests(stub):
+    checker = make_checker(stub)
+
+    before = stub.request_count
+    batched = checker.search_wikipedia_batched("The Earth is flat")
+    assert stub.request_count - before == 1
+
+    before = stub.request_count
+    unbatched = checker.search_wikipedia("The Earth is flat")
+    assert stub.request_count - before == 1 + len(unbatched)
+
+    assert batched == unbatched
+    assert len(batched) == 3 and all(result['full_content'] for result in batched)
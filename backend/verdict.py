@@ -0,0 +1,116 @@
+"""
+Verdict arithmetic shared by analyze_results and the streaming endpoint.
+
+classify_stance turns one source's pattern counts into a stance and a
+weight. VerdictTally adds those weights up and turns them into the verdict
+dict. Because the tally can be read at any point, the same code gives both
+the running provisional verdict and the final one.
+"""
+
+# Each support/contradict pattern match adds this share of a source's weight
+SCORE_STEP = 0.2
+
+
+def classify_stance(support_score, contradict_score, uncertain_score, weight):
+    """Return (stance, weighted amount, reason) for one source"""
+    if uncertain_score >= 2:
+        return 'neutral', weight, 'uncertainty'
+    if contradict_score > support_score * 1.5:
+        return 'contradicting', weight * (1 + contradict_score * SCORE_STEP), None
+    if support_score > contradict_score * 1.5:
+        return 'supporting', weight * (1 + support_score * SCORE_STEP), None
+    if support_score == 0 and contradict_score == 0:
+        # No clear stance found in relevant sentences
+        return 'neutral', weight * 0.5, 'no clear stance'
+    # Mixed signals
+    return 'neutral', weight * 0.7, 'mixed'
+
+
+class VerdictTally:
+    """Running totals of weighted stances across sources"""
+
+    def __init__(self):
+        self.weighted_positive = 0
+        self.weighted_negative = 0
+        self.weighted_neutral = 0
+        self.supporting_count = 0
+        self.contradicting_count = 0
+        self.neutral_count = 0
+        self.total = 0
+
+    def add(self, stance, amount):
+        """Record one scored source"""
+        self.total += 1
+        if stance == 'supporting':
+            self.weighted_positive += amount
+            self.supporting_count += 1
+        elif stance == 'contradicting':
+            self.weighted_negative += amount
+            self.contradicting_count += 1
+        else:
+            self.weighted_neutral += amount
+            self.neutral_count += 1
+
+    def add_unscored(self):
+        """Record a source with no claim-relevant sentences"""
+        self.total += 1
+        self.neutral_count += 1
+
+    def result(self):
+        """Verdict, confidence, summary and stats for the sources so far"""
+        if self.total == 0:
+            return {
+                'verdict': 'INSUFFICIENT_DATA',
+                'confidence': 0,
+                'summary': 'Not enough information found to verify this claim.',
+                'stats': {
+                    'supporting': 0,
+                    'contradicting': 0,
+                    'neutral': 0,
+                    'total': 0
+                }
+            }
+
+        weighted_positive = self.weighted_positive
+        weighted_negative = self.weighted_negative
+        weighted_neutral = self.weighted_neutral
+        total_weight = weighted_positive + weighted_negative + weighted_neutral
+
+        # Calculate verdict - now MUCH more conservative
+        if total_weight == 0:
+            verdict = 'INSUFFICIENT_DATA'
+            confidence = 0
+        elif weighted_negative > weighted_positive * 3:
+            verdict = 'LIKELY_FALSE'
+            confidence = min(90, int((weighted_negative / total_weight) * 100))
+        elif weighted_positive > weighted_negative * 3:
+            verdict = 'LIKELY_TRUE'
+            confidence = min(90, int((weighted_positive / total_weight) * 100))
+        elif weighted_neutral > (weighted_positive + weighted_negative):
+            verdict = 'DISPUTED'
+            confidence = 45
+        elif weighted_positive > weighted_negative * 1.5:
+            verdict = 'LIKELY_TRUE'
+            confidence = min(70, int((weighted_positive / total_weight) * 85))
+        elif weighted_negative > weighted_positive * 1.5:
+            verdict = 'LIKELY_FALSE'
+            confidence = min(70, int((weighted_negative / total_weight) * 85))
+        else:
+            verdict = 'DISPUTED'
+            confidence = 50
+
+        summary = (f"Analyzed {self.total} sources focusing on claim-relevant content: "
+                   f"{self.supporting_count} supporting, {self.contradicting_count} contradicting, "
+                   f"{self.neutral_count} neutral/unclear.")
+
+        return {
+            'verdict': verdict,
+            'confidence': confidence,
+            'summary': summary,
+            'stats': {
+                'supporting': self.supporting_count,
+                'contradicting': self.contradicting_count,
+                'neutral': self.neutral_count,
+                'total': self.total
+            }
+        }
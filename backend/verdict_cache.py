@@ -0,0 +1,100 @@
+"""
+In-memory verdict cache that sits in front of FactChecker.check_claim.
+
+Entries are fresh for `ttl` seconds. After that they are served as stale
+(while a refresh runs in the background) until `stale_ttl` seconds, then
+dropped. The cache is an LRU bounded by the approximate JSON size of its
+entries, so one huge result cannot crowd memory.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Approximate memory cost of a cached result, in bytes of JSON.
+
+    Objects with a size_hint() method (sources.SourceRecord) count as what
+    it returns; other values json cannot encode count as their str().
+    """
+    hinted = 0
+
+    def default(obj):
+        nonlocal hinted
+        size_hint = getattr(obj, 'size_hint', None)
+        if size_hint is None:
+            return str(obj)
+        hinted += size_hint()
+        return None
+
+    return len(json.dumps(value, default=default)) + hinted
+
+
+class VerdictCache:
+    """Thread-safe TTL + LRU cache keyed by normalized claim"""
+
+    def __init__(self, ttl=600, stale_ttl=3600, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (value, state) where state is 'hit', 'stale' or 'miss'"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, 'miss'
+
+            value, size, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age > self.stale_ttl:
+                self._remove(key)
+                self.misses += 1
+                return None, 'miss'
+
+            self._entries.move_to_end(key)
+            if age > self.ttl:
+                self.stale_hits += 1
+                return value, 'stale'
+            self.hits += 1
+            return value, 'hit'
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, key):
+        value, size, stored_at = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+            }
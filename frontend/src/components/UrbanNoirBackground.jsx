@@ -30,27 +30,61 @@ export default function UrbanNoirBackground() {
     setLoading(true);
     
     try {
-      const response = await fetch("/submit", {
+      // Stream the casefile: sources show up as soon as they are scored
+      const response = await fetch("/submit/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: text.trim() })
       });
       
-      const data = await response.json();
-      
       if (!response.ok) {
+        const data = await response.json();
         console.error("Server error:", data);
         alert(`Error: ${data.error || 'Unknown error'}`);
         setLoading(false);
         return;
       }
       
-      console.log("Success! Server response:", data);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let sources = [];
       
- 
-      setReportData(data);
-      setHasNewReport(true);
-      setLoading(false);
+      const handleEvent = (event, data) => {
+        if (event === "source") {
+          sources = [...sources, data.source];
+          setReportData({ ...data, topic: text.trim(), sources });
+          setLoading(false);
+        } else if (event === "result") {
+          console.log("Success! Server response:", data);
+          setReportData(data);
+          setHasNewReport(true);
+          setLoading(false);
+        } else if (event === "error") {
+          console.error("Server error:", data);
+          alert(`Error: ${data.error || 'Unknown error'}`);
+          setLoading(false);
+        }
+      };
+      
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split("\n\n");
+        buffer = messages.pop();
+        
+        for (const message of messages) {
+          let event = "message";
+          let data = "";
+          for (const line of message.split("\n")) {
+            if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          if (data) handleEvent(event, JSON.parse(data));
+        }
+      }
       
     } catch (error) {
       console.error("Error submitting:", error);